@@ -0,0 +1,196 @@
+import sys
+import time
+import socket
+import struct
+import threading
+
+# Steam server queries (A2S_INFO and A2S_PLAYER) straight to the server's query port over
+# UDP, so the player count doesn't depend on dayzsalauncher.com being up or quick.
+#
+#   python Utils/a2s.py 127.0.0.1 27016
+#
+# Newer servers answer the first request with a challenge (an 'A' packet with 4 bytes),
+# the request is then sent again with the challenge on the end. Answers are cached for a
+# few seconds so the killfeed gate and the window polling at the same time share one query.
+
+HEADER = b"\xFF\xFF\xFF\xFF"
+SPLIT_HEADER = b"\xFE\xFF\xFF\xFF"
+A2S_INFO_REQUEST = HEADER + b"TSource Engine Query\x00"
+A2S_PLAYER_REQUEST = HEADER + b"U"
+NO_CHALLENGE = b"\xFF\xFF\xFF\xFF"
+CHALLENGE_RESPONSE = b"A"
+INFO_RESPONSE = b"I"
+PLAYER_RESPONSE = b"D"
+QUERY_TIMEOUT = 2.0
+CACHE_TTL = 10  # Seconds an answer is reused for
+
+
+class A2SError(Exception):
+    pass
+
+
+class Reader:
+    """Reads the little endian fields A2S packets are made of."""
+
+    def __init__(self, data, offset=0):
+        self.data = data
+        self.offset = offset
+
+    def unpack(self, format):
+        values = struct.unpack_from("<" + format, self.data, self.offset)
+        self.offset += struct.calcsize("<" + format)
+        return values[0] if len(values) == 1 else values
+
+    def string(self):
+        end = self.data.index(b"\x00", self.offset)
+        value = self.data[self.offset:end].decode("utf-8", errors="replace")
+        self.offset = end + 1
+        return value
+
+    def remaining(self):
+        return len(self.data) - self.offset
+
+
+def parse_info(payload):
+    """The fields of an A2S_INFO answer (payload starts after the 'I'), the rest is ignored."""
+    reader = Reader(payload)
+    info = {"protocol": reader.unpack("B")}
+    info["name"] = reader.string()
+    info["map"] = reader.string()
+    info["folder"] = reader.string()
+    info["game"] = reader.string()
+    info["app_id"] = reader.unpack("H")
+    info["players"], info["max_players"], info["bots"] = reader.unpack("BBB")
+    return info
+
+
+def parse_players(payload):
+    """[{"name", "score", "duration"}] from an A2S_PLAYER answer (payload starts after the 'D')."""
+    reader = Reader(payload)
+    count = reader.unpack("B")
+    players = []
+    for _ in range(count):
+        if reader.remaining() < 10:
+            break  # Some servers say more players than they send
+        reader.unpack("B")  # Index, always 0 on most servers
+        name = reader.string()
+        score, duration = reader.unpack("lf")
+        players.append({"name": name, "score": score, "duration": duration})
+    return players
+
+
+def parse_split_packet(data):
+    """(answer id, total packets, packet number, payload) from a split answer."""
+    reader = Reader(data, 4)
+    answer_id, total, number = reader.unpack("lBB")
+    reader.unpack("H")  # Max packet size
+    return answer_id, total, number, data[reader.offset:]
+
+
+class A2SClient:
+    """Queries one server's query port. address is (host, query port)."""
+
+    def __init__(self, address, timeout=QUERY_TIMEOUT, ttl=CACHE_TTL):
+        self.address = address
+        self.timeout = timeout
+        self.ttl = ttl
+        self._cache = {}  # request name -> (monotonic time, answer)
+        self._lock = threading.Lock()
+        self.queries_sent = 0
+        self.last_error = None
+
+    def _receive(self, sock):
+        """One whole answer, put back together if the server split it over several packets."""
+        data, _ = sock.recvfrom(65535)
+        if data[:4] == HEADER:
+            return data[4:]
+        if data[:4] != SPLIT_HEADER:
+            raise A2SError("Not an A2S answer")
+        answer_id, total, number, payload = parse_split_packet(data)
+        parts = {number: payload}
+        while len(parts) < total:
+            data, _ = sock.recvfrom(65535)
+            if data[:4] != SPLIT_HEADER:
+                continue
+            other_id, _, number, payload = parse_split_packet(data)
+            if other_id == answer_id:
+                parts[number] = payload
+        whole = b"".join(parts[index] for index in range(total))
+        if whole[:4] != HEADER:
+            raise A2SError("Split answer without a header")
+        return whole[4:]
+
+    def _request(self, request, expected, challenge=b""):
+        """Sends request, answering a challenge if the server asks for one. Returns the payload."""
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(self.timeout)
+            packet = request + challenge
+            for _ in range(3):
+                self.queries_sent += 1
+                try:
+                    sock.sendto(packet, self.address)
+                    answer = self._receive(sock)
+                except socket.timeout:
+                    raise A2SError(f"No answer from {self.address[0]}:{self.address[1]} within {self.timeout}s")
+                except OSError as e:
+                    raise A2SError(f"Query to {self.address[0]}:{self.address[1]} failed: {e}")
+                kind, payload = answer[:1], answer[1:]
+                if kind == CHALLENGE_RESPONSE and len(payload) >= 4:
+                    packet = request + payload[:4]
+                    continue
+                if kind != expected:
+                    raise A2SError(f"Unexpected answer type {kind!r}")
+                return payload
+        raise A2SError("The server kept asking for a new challenge")
+
+    def _cached(self, name, fetch, max_age):
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            cached = self._cache.get(name)
+            if cached and time.monotonic() - cached[0] < max_age:
+                return cached[1]
+            answer = fetch()
+            self._cache[name] = (time.monotonic(), answer)
+            return answer
+
+    def info(self, max_age=None):
+        """The server's A2S_INFO as a dict, raises A2SError if it didn't answer."""
+        return self._cached("info", lambda: parse_info(self._request(A2S_INFO_REQUEST, INFO_RESPONSE)), max_age)
+
+    def players(self, max_age=None):
+        """The players online as [{"name", "score", "duration"}], raises A2SError if it didn't answer."""
+        return self._cached("players", lambda: parse_players(self._request(A2S_PLAYER_REQUEST, PLAYER_RESPONSE, NO_CHALLENGE)), max_age)
+
+    def player_count(self, max_age=None):
+        """Players online from A2S_INFO, None if the server didn't answer."""
+        try:
+            return self.info(max_age)["players"]
+        except (A2SError, ValueError, struct.error) as e:
+            self.last_error = str(e)
+            return None
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def shared_client(address):
+    """One client per address for the whole process, so everyone shares its cache."""
+    with _clients_lock:
+        if address not in _clients:
+            _clients[address] = A2SClient(address)
+        return _clients[address]
+
+
+if __name__ == "__main__":
+    host = sys.argv[1] if len(sys.argv) > 1 else "127.0.0.1"
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 27016
+    client = A2SClient((host, port))
+    try:
+        info = client.info()
+        print(f"{info['name']} ({info['map']}): {info['players']}/{info['max_players']} players")
+        for player in client.players():
+            print(f"  {player['name'] or '(connecting)'}  {player['duration'] / 60:.0f} min")
+    except A2SError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
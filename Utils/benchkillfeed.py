@@ -0,0 +1,80 @@
+import re
+import sys
+import time
+import random
+
+from killfeed import KillfeedClassifier, clean_message
+
+# The patterns as they were searched per line before the classifier existed
+legacy_patterns = [
+    re.compile(r'\[Killfeed\] (.*?) got mauled to death by a Brown Bear\.'),
+    re.compile(r'\[Killfeed\] \[(.*?)\] (.*?) got killed by an Infected\.'),
+    re.compile(r'\[Killfeed\] (.*?) bled out\.'),
+    re.compile(r'\[Killfeed\] (.*?) got beaten to a pulp by AI (.*?) with.*'),
+    re.compile(r'\[Killfeed\] AI (.*?) got beaten to a pulp by AI (.*?) with.*'),
+    re.compile(r'\[Killfeed\] (.*?) got killed by (.*?) with (.*?)(?: from a distance of (\d+\s?[mM]))?\.'),
+    re.compile(r'\[Killfeed\] (.*?) got killed by (.*?) with.*'),
+    re.compile(r'\[Killfeed\] (.*?) got killed\.'),
+    re.compile(r'\[Killfeed\] (.*?) fell to their death\.'),
+    re.compile(r'\[Killfeed\] (.*?) died from Chemical Poisoning\.'),
+]
+BOT_NAMES = ["Bot", "AI", "Mirek", "NPC"]
+
+SAMPLE_KILLFEED_LINES = [
+    '12:00:01 [Killfeed] Survivor got mauled to death by a Brown Bear.',
+    '12:00:02 [Killfeed] [Survivor] Jay got killed by an Infected.',
+    '12:00:03 [Killfeed] Survivor (2) bled out.',
+    '12:00:04 [Killfeed] Jay got beaten to a pulp by AI Mirek with Fists.',
+    '12:00:05 [Killfeed] Jay got killed by Survivor with M4-A1 from a distance of 142 m.',
+    '12:00:06 [Killfeed] Jay got killed by Survivor with KA-M.',
+    '12:00:07 [Killfeed] Jay got killed.',
+    '12:00:08 [Killfeed] Jay fell to their death.',
+    '12:00:09 [Killfeed] Jay died from Chemical Poisoning.',
+]
+SAMPLE_NOISE_LINES = [
+    '12:00:00 [Expansion Quests] Player "Survivor" (steamid=76561198000000000) quest updated',
+    '12:00:00 [AI] Mirek patrol moved to 4512.2, 0, 9831.7',
+    '12:00:00 [Market] Player "Jay" (id=abc= pos=<1200.1, 20.0, 3100.2>) sold item',
+    '12:00:00 [Vehicle] OffroadHatchback engine started',
+]
+
+
+def generate_lines(count, killfeed_ratio=0.02, seed=1):
+    """Returns a reproducible mix of killfeed and noise lines."""
+    rng = random.Random(seed)
+    return [
+        rng.choice(SAMPLE_KILLFEED_LINES) if rng.random() < killfeed_ratio else rng.choice(SAMPLE_NOISE_LINES)
+        for _ in range(count)
+    ]
+
+
+def legacy_classify(line):
+    """Runs every pattern against the line then walks the if/elif chain, like monitor_log_file used to."""
+    matches = [pattern.search(line) for pattern in legacy_patterns]
+    for index, match in enumerate(matches):
+        if match:
+            player_name = clean_message(match.group(1))
+            if index >= 5:
+                any(bot_name.lower() in player_name.lower() for bot_name in BOT_NAMES)
+            return index
+    return None
+
+
+def run_benchmark(label, classify, lines):
+    """Times classify over lines and returns lines per second."""
+    start = time.perf_counter()
+    for line in lines:
+        classify(line)
+    elapsed = time.perf_counter() - start
+    rate = len(lines) / elapsed if elapsed else float("inf")
+    print(f"{label:<12} {len(lines)} lines in {elapsed:.3f}s = {rate:,.0f} lines/sec")
+    return rate
+
+
+if __name__ == "__main__":
+    line_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    lines = generate_lines(line_count)
+    classifier = KillfeedClassifier(BOT_NAMES)
+    before = run_benchmark("before", legacy_classify, lines)
+    after = run_benchmark("after", classifier.classify, lines)
+    print(f"speedup      {after / before:.1f}x")
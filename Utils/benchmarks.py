@@ -0,0 +1,318 @@
+import io
+import os
+import re
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import contextlib
+import logsteamids
+from loggen import LogGenerator, write_log_files
+from killfeed import KillfeedClassifier
+from logtail import LogTailer
+from logevents import EventBus, LogParser, TOPIC_KILLFEED
+from logcheckpoint import LogCheckpoint
+from steamstore import SteamIdStore
+from steamindex import SteamIdIndex
+from webhook import WebhookDispatcher
+from fakewebhook import FakeWebhookServer
+
+# Benchmarks for the log side of things, on synthetic logs from loggen.py:
+#
+#   classify   parsing lines (player joins and killfeed) the way ingest.py does, lines/sec
+#   backfill   logsteamids rebuilding steam_ids.json from every log, then an incremental run
+#   tail       a line written to the live log -> its killfeed event on the EventBus, latency
+#   lookup     SteamIdIndex.find_steam_id with exact, suffixed, old and unknown names
+#   webhook    a killfeed line written to the live log -> the message arriving at a local fake
+#              webhook (fakewebhook.py), through the WebhookDispatcher
+#
+#   python Utils/benchmarks.py [--scale 1.0] [--only tail webhook] [--output Utils/bench_results.json] [--compare old.json]
+#
+# Results go to --output as JSON, with the machine and settings they were measured with,
+# so runs can be compared between hosts or before and after a change.
+
+BOT_NAMES = ["Bot", "AI", "Mirek", "NPC"]
+BENCHMARKS = ["classify", "backfill", "tail", "lookup", "webhook"]
+DEFAULT_OUTPUT = "Utils/bench_results.json"
+bench_victim_pattern = re.compile(r"\*\*(Bench\d+)\*\*")
+
+
+def summarise_latencies(samples):
+    """count, mean and percentiles of samples (seconds) in milliseconds."""
+    if not samples:
+        return {"count": 0}
+    samples = sorted(samples)
+
+    def percentile(fraction):
+        return round(samples[min(len(samples) - 1, int(fraction * len(samples)))] * 1000, 3)
+
+    return {
+        "count": len(samples),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": round(samples[-1] * 1000, 3),
+    }
+
+
+def bench_classify(generator, line_count):
+    lines = list(generator.lines(line_count, join_ratio=0.01, killfeed_ratio=0.05))
+    bus = EventBus()
+    found = []
+    bus.subscribe(TOPIC_KILLFEED, found.append)
+    parser = LogParser(bus, KillfeedClassifier(BOT_NAMES))
+    start = time.perf_counter()
+    for line in lines:
+        parser.parse(line)
+    elapsed = time.perf_counter() - start
+    return {"lines": len(lines), "killfeed_events": len(found), "seconds": round(elapsed, 3), "lines_per_sec": round(len(lines) / elapsed)}
+
+
+def bench_backfill(root, generator, files, lines_per_file, workers=None):
+    log_dir = os.path.join(root, "backfill_logs")
+    paths = write_log_files(log_dir, generator, files, lines_per_file)
+    size = sum(os.path.getsize(path) for path in paths)
+    line_count = files * lines_per_file + len(generator.roster)
+    logsteamids.LOG_DIR = log_dir
+    logsteamids.STEAM_ID_LOG_PATH = os.path.join(root, "steam_ids.json")
+    logsteamids.CHECKPOINT_PATH = os.path.join(root, "steam_ids_checkpoint.json")
+
+    start = time.perf_counter()
+    store, _ = logsteamids.rebuild_all_log_files(logsteamids.open_store(), LogCheckpoint(logsteamids.CHECKPOINT_PATH), workers)
+    rebuild = time.perf_counter() - start
+
+    start = time.perf_counter()
+    logsteamids.process_all_log_files()
+    unchanged = time.perf_counter() - start
+
+    append_count = max(1, lines_per_file // 10)
+    with open(paths[-1], "a", encoding="utf-8", newline="\n") as file:
+        for line in generator.lines(append_count):
+            file.write(line + "\n")
+    start = time.perf_counter()
+    logsteamids.process_all_log_files()
+    incremental = time.perf_counter() - start
+
+    return {
+        "files": files,
+        "lines": line_count,
+        "megabytes": round(size / 1024 / 1024, 2),
+        "players": len(store),
+        "rebuild_seconds": round(rebuild, 3),
+        "rebuild_lines_per_sec": round(line_count / rebuild),
+        "rebuild_mb_per_sec": round(size / 1024 / 1024 / rebuild, 2),
+        "unchanged_seconds": round(unchanged, 4),
+        "appended_lines": append_count,
+        "incremental_seconds": round(incremental, 4),
+        "incremental_lines_per_sec": round(append_count / incremental),
+    }
+
+
+def write_live_log(path, generator, events, rate, noise_per_event):
+    """Appends killfeed lines for victims Bench0..BenchN to path at rate events a second, returns {victim: write time}."""
+    written = {}
+    with open(path, "a", encoding="utf-8", newline="\n") as file:
+        for index in range(events):
+            victim = f"Bench{index}"
+            for _ in range(noise_per_event):
+                file.write(generator.noise_line() + "\n")
+            line = generator.killfeed_line("bled_out", victim) + "\n"
+            written[victim] = time.perf_counter()  # Before the write, the tailer can see the line before flush() returns
+            file.write(line)
+            file.flush()
+            time.sleep(1 / rate)
+    return written
+
+
+class LivePipeline:
+    """A LogTailer on a fresh live log feeding a LogParser on its own thread, like ingest.py."""
+
+    def __init__(self, log_dir):
+        os.makedirs(log_dir, exist_ok=True)
+        self.path = os.path.join(log_dir, "live.log")
+        open(self.path, "w").close()
+        self.bus = EventBus()
+        self.tailer = LogTailer(log_dir, "*.log")
+        self.running = True
+        self.thread = threading.Thread(target=LogParser(self.bus, KillfeedClassifier(BOT_NAMES)).pump, args=(self.tailer, lambda: self.running), daemon=True)
+
+    def start(self):
+        self.thread.start()
+        deadline = time.monotonic() + 5
+        while self.tailer.file is None and time.monotonic() < deadline:
+            time.sleep(0.01)  # Lines written before the tailer opens the log would be skipped
+        return self
+
+    def stop(self):
+        self.running = False
+        self.thread.join(5)
+
+
+def wait_for(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def bench_tail(root, generator, events, rate, noise_per_event):
+    pipeline = LivePipeline(os.path.join(root, "tail_logs"))
+    received = {}
+    pipeline.bus.subscribe(TOPIC_KILLFEED, lambda event: received.setdefault(event.victim, time.perf_counter()))
+    pipeline.start()
+    try:
+        written = write_live_log(pipeline.path, generator, events, rate, noise_per_event)
+        wait_for(lambda: len(received) >= events, 10)
+    finally:
+        pipeline.stop()
+    latencies = [received[victim] - written_at for victim, written_at in written.items() if victim in received]
+    return dict({"events": events, "received": len(received), "rate": rate, "noise_per_event": noise_per_event}, **summarise_latencies(latencies))
+
+
+def bench_lookup(root, generator, lookups, seed=1):
+    rng = random.Random(seed)
+    path = os.path.join(root, "lookup_steam_ids.json")
+    store = SteamIdStore(path)
+    old_names = []
+    for name, steam_id in generator.roster:
+        if rng.random() < 0.1:
+            old_name = f"{name}_old"  # Played under another name before, ends up in duplicateSteamIDs
+            store.record(old_name, steam_id, journal=False)
+            old_names.append(old_name)
+        store.record(name, steam_id, journal=False)
+    store.compact()
+
+    index = SteamIdIndex(path)
+    start = time.perf_counter()
+    index.refresh(force=True)
+    load = time.perf_counter() - start
+
+    names = [name for name, _ in generator.roster]
+    queries = []
+    for _ in range(lookups):
+        roll = rng.random()
+        if roll < 0.6:
+            queries.append(rng.choice(names))
+        elif roll < 0.8:
+            queries.append(f"{rng.choice(names)} ({rng.randint(2, 3)})")
+        elif roll < 0.9 and old_names:
+            queries.append(rng.choice(old_names))
+        else:
+            queries.append(f"Unknown{rng.randint(1, 10 ** 6)}")
+    start = time.perf_counter()
+    hits = sum(1 for query in queries if index.find_steam_id(query))
+    elapsed = time.perf_counter() - start
+    return {
+        "players": len(index),
+        "lookups": lookups,
+        "load_ms": round(load * 1000, 3),
+        "lookup_us": round(elapsed / lookups * 1e6, 3),
+        "lookups_per_sec": round(lookups / elapsed),
+        "hit_ratio": round(hits / lookups, 3),
+    }
+
+
+def bench_webhook(root, generator, events, rate, noise_per_event, batch_window):
+    fake = FakeWebhookServer().start()
+    dispatcher = WebhookDispatcher(fake.url(), batch_window=batch_window)
+    received = {}
+
+    def on_post(received_at, content):
+        for victim in bench_victim_pattern.findall(content):
+            received.setdefault(victim, received_at)
+
+    fake.on_post = on_post
+    pipeline = LivePipeline(os.path.join(root, "webhook_logs"))
+    pipeline.bus.subscribe(TOPIC_KILLFEED, lambda event: dispatcher.submit(event.message()))
+    dispatcher.start()
+    pipeline.start()
+    try:
+        written = write_live_log(pipeline.path, generator, events, rate, noise_per_event)
+        wait_for(lambda: len(received) >= events, 10 + batch_window * 2)
+    finally:
+        pipeline.stop()
+        dispatcher.stop()
+        fake.stop()
+    latencies = [received[victim] - written_at for victim, written_at in written.items() if victim in received]
+    result = {"events": events, "received": len(received), "rate": rate, "batch_window": batch_window, "posts": len(fake.received),
+              "events_per_post": round(len(received) / len(fake.received), 2) if fake.received else None}
+    return dict(result, **summarise_latencies(latencies))
+
+
+def run_benchmarks(names, scale=1.0, seed=1, workers=None, batch_window=1.0, verbose=False):
+    """Runs the named benchmarks, returns {name: result}."""
+    root = tempfile.mkdtemp(prefix="dayz_bench_")
+    results = {}
+    try:
+        for name in names:
+            generator = LogGenerator(players=max(10, int(2000 * scale)), seed=seed)
+            output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+            print(f"Running {name}...", file=sys.stderr)
+            with output:
+                if name == "classify":
+                    results[name] = bench_classify(generator, int(500000 * scale))
+                elif name == "backfill":
+                    results[name] = bench_backfill(root, generator, 4, int(250000 * scale), workers)
+                elif name == "tail":
+                    results[name] = bench_tail(root, generator, max(20, int(500 * scale)), 200, 20)
+                elif name == "lookup":
+                    results[name] = bench_lookup(root, generator, int(200000 * scale), seed)
+                elif name == "webhook":
+                    results[name] = bench_webhook(root, generator, max(20, int(200 * scale)), 100, 20, batch_window)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return results
+
+
+def compare(old, new):
+    """Lines describing how every number in new changed from old."""
+    lines = []
+    for name, result in new.items():
+        for key, value in result.items():
+            before = old.get(name, {}).get(key)
+            if isinstance(value, (int, float)) and isinstance(before, (int, float)) and before:
+                lines.append(f"  {name}.{key}: {before} -> {value} ({(value - before) / before * 100:+.1f}%)")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Log parsing, tailing, lookup and webhook benchmarks")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=BENCHMARKS)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies every benchmark's size")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, help="process pool size for the backfill, default all cores")
+    parser.add_argument("--batch-window", type=float, default=1.0, help="webhook batch window, config.json's webhook_batch_window")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--compare", help="an earlier results file to compare with")
+    parser.add_argument("--verbose", action="store_true", help="show what the scripts print while they run")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.only, args.scale, args.seed, args.workers, args.batch_window, args.verbose)
+    report = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "settings": {"scale": args.scale, "seed": args.seed, "workers": args.workers, "batch_window": args.batch_window},
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=4)
+    for name, result in results.items():
+        print(f"{name}: " + ", ".join(f"{key}={value}" for key, value in result.items()))
+    if args.compare:
+        with open(args.compare, "r") as file:
+            old = json.load(file).get("results", {})
+        print(f"Compared with {args.compare}:")
+        print("\n".join(compare(old, results)) or "  nothing in common")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import os
+import hmac
+import json
+import time
+import secrets
+import threading
+from datetime import datetime
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from manager import ServerManager, load_config
+
+RESET = "\033[0m"
+GREEN = "\033[92m"
+YELLOW = "\033[93m"
+RED = "\033[91m"
+CYAN = "\033[96m"
+TYPE_COLOURS = {"Success": GREEN, "Warning": YELLOW, "Error": RED, "Info": CYAN}
+
+# Runs the server manager without the Tk window (no tkinter or ttkbootstrap import), for
+# services and containers. It is controlled through a small HTTP API on localhost, see
+# managerctl.py for the command line client:
+#
+#   GET  /status                      server (and instance) status
+#   GET  /logs?since=N                log lines after sequence number N
+#   POST /start, /stop, /restart      the server, or every instance
+#   POST /genmods                     regenerate mods.txt and sync keys
+#   POST /instances/<name>/restart    one instance
+#
+# Every request needs the token in an X-Control-Token header. It's control_api_token if
+# that's set, otherwise a random one made on first run and kept in control_api_token_path,
+# where managerctl.py reads it from. A web page can't send that header without asking
+# first, so a browser on the same machine can't stop or restart the server.
+
+DEFAULT_PORT = 8765
+TOKEN_PATH = "Utils/control_api_token.txt"
+
+
+class ControlHandler(BaseHTTPRequestHandler):
+    manager = None
+    token = None
+
+    def log_message(self, format, *args):
+        pass  # The manager's log is enough
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _authorised(self):
+        given = self.headers.get("X-Control-Token") or ""
+        if self.token and not hmac.compare_digest(given.encode("utf-8"), self.token.encode("utf-8")):
+            self._send(401, {"error": "missing or wrong X-Control-Token"})
+            return False
+        return True
+
+    def do_GET(self):
+        if not self._authorised():
+            return
+        url = urlparse(self.path)
+        if url.path == "/status":
+            return self._send(200, self.manager.status())
+        if url.path == "/logs":
+            try:
+                since = int(parse_qs(url.query).get("since", ["0"])[0])
+            except ValueError:
+                return self._send(400, {"error": "since has to be a whole number"})
+            return self._send(200, {"lines": self.manager.recent_logs(since)})
+        self._send(404, {"error": f"unknown path {url.path}"})
+
+    def do_POST(self):
+        if not self._authorised():
+            return
+        path = urlparse(self.path).path.rstrip("/")
+        try:
+            if path == "/start":
+                started, errors = self.manager.start()
+                return self._send(200 if started else 409, {"ok": started, "errors": errors})
+            if path == "/stop":
+                self.manager.stop()
+                return self._send(200, {"ok": True})
+            if path == "/restart":
+                restarted = self.manager.restart()
+                return self._send(200 if restarted else 409, {"ok": restarted})
+            if path == "/genmods":
+                self.manager.generate_mods()
+                return self._send(200, {"ok": True})
+            parts = path.strip("/").split("/")
+            if len(parts) == 3 and parts[0] == "instances" and self.manager.instance_manager:
+                instance = self.manager.instance_manager.get(parts[1])
+                if instance is None:
+                    return self._send(404, {"error": f"no instance called {parts[1]}"})
+                actions = {"start": instance.start, "stop": lambda: instance.stop() or True, "restart": instance.restart}
+                if parts[2] in actions:
+                    ok = actions[parts[2]]()
+                    return self._send(200 if ok else 409, {"ok": ok})
+        except Exception as e:
+            self.manager.log("Error", f"Control API {path} failed: {e}")
+            return self._send(500, {"error": str(e)})
+        self._send(404, {"error": f"unknown path {path}"})
+
+
+def load_control_token(config):
+    """control_api_token, or the one saved in control_api_token_path, made and saved on first run."""
+    if config.get("control_api_token"):
+        return config["control_api_token"]
+    token_path = config.get("control_api_token_path", TOKEN_PATH)
+    try:
+        with open(token_path, "r", encoding="utf-8") as file:
+            token = file.read().strip()
+        if token:
+            return token
+    except OSError:
+        pass
+    token = secrets.token_urlsafe(24)
+    with open(os.open(token_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w", encoding="utf-8") as file:
+        file.write(token + "\n")
+    return token
+
+
+def create_control_server(manager, host="127.0.0.1", port=DEFAULT_PORT, token=None):
+    """Returns an HTTP server for the control API, call serve_forever() on it (or start_control_server)."""
+    handler = type("BoundControlHandler", (ControlHandler,), {"manager": manager, "token": token or None})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def start_control_server(manager, config):
+    """Serves the control API from a background thread, used by the GUI too."""
+    server = create_control_server(manager, config.get("control_api_host", "127.0.0.1"), config.get("control_api_port", DEFAULT_PORT), load_control_token(config))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def print_log(type, message):
+    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"{TYPE_COLOURS.get(type, '')}[{current_time}]: {message}{RESET}", flush=True)
+
+
+def main():
+    config = load_config()
+    manager = ServerManager(config)
+    manager.add_listener(print_log)
+    server = start_control_server(manager, config)
+    host, port = server.server_address[:2]
+    manager.log("Info", f"DayZ Server Manager daemon started, control API on http://{host}:{port}")
+    manager.start_helpers()
+    if manager.auto_start:
+        started, errors = manager.start()
+        for error in errors:
+            manager.log("Error", error)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        manager.log("Info", "Shutting down")
+    finally:
+        server.shutdown()
+        manager.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import re
+import time
+import random
+import threading
+
+# One client for the DZSA Launcher query API, shared by everything in a process that
+# asks it about the server: the launcher update after boot, the scheduler's player count
+# and the killfeed's player check. It keeps one pooled requests.Session, caches each
+# answer for a few seconds so callers polling the same server share one request, and
+# sorts answers into ok / invalid workshop mod / timeout / error.
+
+DZSA_QUERY_URL = "https://dayzsalauncher.com/api/v1/query/{host}/{port}"
+CACHE_TTL = 15  # Seconds an answer is reused for
+REQUEST_TIMEOUT = 10
+BACKOFF_BASE = 5  # First retry delay in seconds, doubled after every failure
+BACKOFF_MAX = 60
+
+invalid_workshop_mod_id = re.compile(r'"error":"steam workshop id not found - (\d+)"')
+
+OK = "ok"
+INVALID_WORKSHOP = "invalid_workshop"
+TIMEOUT = "timeout"
+ERROR = "error"
+
+
+def query_url(host, port):
+    return DZSA_QUERY_URL.format(host=host, port=port)
+
+
+class QueryResult:
+    """One DZSA answer. status is OK, INVALID_WORKSHOP, TIMEOUT or ERROR."""
+
+    def __init__(self, status, text="", data=None, workshop_id=None, error=None):
+        self.status = status
+        self.text = text
+        self.data = data or {}
+        self.workshop_id = workshop_id
+        self.error = error
+        self.fetched_at = time.monotonic()
+
+    @property
+    def ok(self):
+        return self.status == OK
+
+    @property
+    def players(self):
+        """Players online, None if the answer didn't say."""
+        return self.data.get("result", {}).get("players") if self.ok else None
+
+    def age(self):
+        return time.monotonic() - self.fetched_at
+
+
+def classify_response(text, data=None):
+    """Works out a QueryResult from a DZSA response body."""
+    invalid_workshop = invalid_workshop_mod_id.search(text)
+    if invalid_workshop:
+        return QueryResult(INVALID_WORKSHOP, text, data, workshop_id=invalid_workshop.group(1))
+    if '"error":"Timeout has occurred"' in text:
+        return QueryResult(TIMEOUT, text, data)
+    if data is None or data.get("error") or data.get("status", 0) != 0:
+        return QueryResult(ERROR, text, data, error=(data or {}).get("error") or "unexpected response")
+    return QueryResult(OK, text, data)
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Exponential backoff with jitter, so retries from several servers don't line up."""
+    delay = min(cap, base * 2 ** attempt)
+    return random.uniform(delay / 2, delay)
+
+
+class DzsaClient:
+    def __init__(self, ttl=CACHE_TTL, timeout=REQUEST_TIMEOUT, session=None):
+        self.ttl = ttl
+        self.timeout = timeout
+        self._session = session
+        self._cache = {}  # url -> QueryResult
+        self._locks = {}  # url -> lock, so concurrent callers for one server wait for one request
+        self._lock = threading.Lock()
+        self.requests_sent = 0
+
+    @property
+    def session(self):
+        if self._session is None:
+            import requests  # Not needed until the first query
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+            session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+            self._session = session
+        return self._session
+
+    def _url_lock(self, url):
+        with self._lock:
+            return self._locks.setdefault(url, threading.Lock())
+
+    def _fetch(self, url):
+        import requests
+        self.requests_sent += 1
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except requests.Timeout as e:
+            return QueryResult(TIMEOUT, error=str(e))
+        except requests.RequestException as e:
+            return QueryResult(ERROR, error=str(e))
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            data = None
+        if data is None and response.status_code != 200:
+            return QueryResult(ERROR, response.text, error=f"HTTP {response.status_code}")
+        return classify_response(response.text, data)
+
+    def query(self, url, max_age=None):
+        """Returns the answer for url, from the cache if it's younger than max_age (default the TTL)."""
+        max_age = self.ttl if max_age is None else max_age
+        with self._url_lock(url):
+            cached = self._cache.get(url)
+            if cached and cached.age() < max_age:
+                return cached
+            result = self._fetch(url)
+            # Only real answers are cached, a failed request shouldn't stop the next caller trying
+            if result.status in (OK, INVALID_WORKSHOP):
+                self._cache[url] = result
+            return result
+
+    def player_count(self, url, max_age=None):
+        """Players online, None if DZSA couldn't tell us."""
+        return self.query(url, max_age).players
+
+    def update_launcher(self, url, max_retries=15, log=None, sleep=time.sleep):
+        """Queries DZSA until it has a good answer for the server, which also updates the launcher.
+
+        Timeouts, invalid workshop answers and network errors are retried with jittered
+        exponential backoff. Returns the last QueryResult.
+        """
+        log = log or (lambda type, message: print(f"{type}: {message}"))
+        result = None
+        for attempt in range(max_retries + 1):
+            result = self.query(url, max_age=0)
+            if result.ok:
+                return result
+            if result.status == INVALID_WORKSHOP:
+                log("Error", f"There is an invalid steam workshop mod ({result.workshop_id}), please remove it or update it")
+            elif result.status == TIMEOUT:
+                log("Warning", "Retrying...")
+            else:
+                log("Error", f"Querying the server: {result.error}")
+            if attempt < max_retries:
+                sleep(backoff_delay(attempt))
+        log("Error", "Max retries reached. Server query failed.")
+        return result
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def shared_client():
+    """The process wide client, so every caller shares the connection pool and cache."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = DzsaClient()
+        return _shared_client
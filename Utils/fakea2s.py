@@ -0,0 +1,85 @@
+import sys
+import struct
+import socket
+import threading
+from a2s import HEADER, SPLIT_HEADER, A2S_INFO_REQUEST, A2S_PLAYER_REQUEST
+
+# A stand-in for a DayZ server's query port, for trying a2s.py (and anything that uses it)
+# without a server. Answers A2S_INFO and A2S_PLAYER, asking for a challenge first like a
+# real server does. split_size splits answers bigger than it over several packets.
+
+
+def info_packet(name, players, max_players, map_name="chernarusplus"):
+    return (HEADER + b"I" + b"\x11" + name.encode() + b"\x00" + map_name.encode() + b"\x00" + b"dayz\x00" + b"DayZ\x00"
+            + struct.pack("<HBBB", 0, players, max_players, 0) + b"dlw\x00\x01" + b"1.26\x00")
+
+
+def player_packet(names):
+    packet = HEADER + b"D" + struct.pack("<B", len(names))
+    for index, name in enumerate(names):
+        packet += struct.pack("<B", 0) + name.encode() + b"\x00" + struct.pack("<lf", 0, 60.0 * (index + 1))
+    return packet
+
+
+class FakeA2SServer:
+    def __init__(self, players=None, max_players=60, name="Fake server", host="127.0.0.1", port=0, challenge=b"\x0A\x0B\x0C\x0D", split_size=None):
+        self.players = list(players or [])
+        self.max_players = max_players
+        self.name = name
+        self.challenge = challenge  # None answers without asking for one, like older servers
+        self.split_size = split_size
+        self.requests = []
+        self.silent = False  # True to stop answering, like a server that's down
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.running = False
+
+    @property
+    def address(self):
+        return self.sock.getsockname()
+
+    def answer(self, request):
+        for prefix, build in ((A2S_INFO_REQUEST, lambda: info_packet(self.name, len(self.players), self.max_players)),
+                              (A2S_PLAYER_REQUEST, lambda: player_packet(self.players))):
+            if request.startswith(prefix):
+                given = request[len(prefix):]
+                if self.challenge and given != self.challenge:
+                    return HEADER + b"A" + self.challenge
+                return build()
+        return None
+
+    def send(self, packet, address):
+        if not self.split_size or len(packet) <= self.split_size:
+            self.sock.sendto(packet, address)
+            return
+        parts = [packet[index:index + self.split_size] for index in range(0, len(packet), self.split_size)]
+        for number, part in enumerate(parts):
+            self.sock.sendto(SPLIT_HEADER + struct.pack("<lBBH", 1, len(parts), number, self.split_size) + part, address)
+
+    def serve(self):
+        while self.running:
+            try:
+                request, address = self.sock.recvfrom(1400)
+            except OSError:
+                break
+            self.requests.append(request)
+            packet = self.answer(request)
+            if packet and not self.silent:
+                self.send(packet, address)
+
+    def start(self):
+        self.running = True
+        threading.Thread(target=self.serve, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.running = False
+        self.sock.close()
+
+
+if __name__ == "__main__":
+    # python Utils/fakea2s.py [port] [player names...]
+    fake = FakeA2SServer(sys.argv[2:], port=int(sys.argv[1]) if len(sys.argv) > 1 else 27016)
+    print(f"Fake query port on {fake.address[0]}:{fake.address[1]} with {len(fake.players)} players")
+    fake.running = True
+    fake.serve()
@@ -0,0 +1,69 @@
+import sys
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# A stand-in for the DZSA Launcher query API, for trying dzsaquery.py (and anything that
+# uses it) without hitting dayzsalauncher.com. Point the client at
+# http://127.0.0.1:<port>/api/v1/query/<host>/<port>.
+#
+# responses is a list of (HTTP status, body) played back in order, the last one repeats.
+# delay holds each answer back that many seconds.
+
+OK_RESPONSE = (200, {"status": 0, "result": {"name": "Fake server", "players": 3, "maxPlayers": 60}})
+TIMEOUT_RESPONSE = (200, {"status": 1, "error": "Timeout has occurred"})
+
+
+def invalid_workshop_response(workshop_id):
+    return 200, {"status": 1, "error": f"steam workshop id not found - {workshop_id}"}
+
+
+class FakeDzsaServer:
+    def __init__(self, responses=None, host="127.0.0.1", port=0, delay=0.0):
+        self.responses = list(responses or [OK_RESPONSE])
+        self.requests = []
+        self.delay = delay
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                with fake.lock:
+                    fake.requests.append(self.path)
+                    status, body = fake.responses.pop(0) if len(fake.responses) > 1 else fake.responses[0]
+                if fake.delay:
+                    time.sleep(fake.delay)
+                data = json.dumps(body, separators=(",", ":")).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def url(self, server_host="127.0.0.1", server_port=27016):
+        return f"http://127.0.0.1:{self.port}/api/v1/query/{server_host}/{server_port}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    # python Utils/fakedzsa.py [port]
+    fake = FakeDzsaServer(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8000)
+    print(f"Fake DZSA query API on {fake.url()}")
+    fake.server.serve_forever()
@@ -0,0 +1,77 @@
+import sys
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# A stand-in for a Discord webhook, for benchmarks.py and for trying the killfeed without
+# posting to a real channel. Point webhook_url at http://127.0.0.1:<port>/webhook.
+#
+# Every post is kept in received as (time.perf_counter(), content). rate_limit_every makes
+# every nth post get a 429 with retry_after, delay holds each answer back that many seconds.
+
+
+class FakeWebhookServer:
+    def __init__(self, host="127.0.0.1", port=0, delay=0.0, rate_limit_every=0, retry_after=0.5):
+        self.delay = delay
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.received = []
+        self.posts = 0
+        self.lock = threading.Lock()
+        self.on_post = None  # Called with (received time, content) for every accepted post
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                received_at = time.perf_counter()
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with fake.lock:
+                    fake.posts += 1
+                    limited = fake.rate_limit_every and fake.posts % fake.rate_limit_every == 0
+                if fake.delay:
+                    time.sleep(fake.delay)
+                if limited:
+                    data = json.dumps({"message": "You are being rate limited.", "retry_after": fake.retry_after}).encode("utf-8")
+                    self.send_response(429)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                    return
+                content = json.loads(body or b"{}").get("content", "")
+                with fake.lock:
+                    fake.received.append((received_at, content))
+                if fake.on_post:
+                    fake.on_post(received_at, content)
+                self.send_response(204)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def url(self):
+        return f"http://127.0.0.1:{self.port}/webhook"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    # python Utils/fakewebhook.py [port], prints every message it gets
+    fake = FakeWebhookServer(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8001)
+    fake.on_post = lambda received_at, content: print(content)
+    print(f"Fake webhook on {fake.url()}")
+    fake.server.serve_forever()
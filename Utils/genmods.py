@@ -1,29 +1,214 @@
 import os
 import json
+import shutil
+from jsonfile import write_json_atomic
 
-def find_folders_with_at_symbol(mods_dir, output_mods_txt_file_dir, ignore_txt_file_dir, priority_mods):
-    folders_with_at = []
-    ignored_folders = []
-    if os.path.exists(ignore_txt_file_dir):
-        with open(ignore_txt_file_dir, 'r') as f:
-            ignored_folders = [line.strip() for line in f.readlines()]
-    for _, dirs, _ in os.walk(mods_dir):
-        for dir_name in dirs:
-            if dir_name.startswith('@') and dir_name not in ignored_folders:
-                folders_with_at.append(dir_name)
-    folders_with_at = [mod for mod in folders_with_at if mod not in priority_mods]
-    sorted_mods = priority_mods + folders_with_at
-    with open(output_mods_txt_file_dir, 'w') as f:
-        for folder in sorted_mods:
-            f.write(folder + '\n')
+def read_ignored_folders(ignore_txt_file_dir):
+    if not os.path.exists(ignore_txt_file_dir):
+        return set()
+    with open(ignore_txt_file_dir, 'r') as f:
+        return {line.strip() for line in f if line.strip()}
+
+def get_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def load_mods_cache(cache_path):
+    try:
+        with open(cache_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_mods_cache(cache_path, cache):
+    write_json_atomic(cache_path, cache)
+
+def discover_mods(mods_dir, ignored_folders):
+    """Returns the top level @ folders in mods_dir, sorted the way Windows Explorer lists them."""
+    with os.scandir(mods_dir) as entries:
+        found = [entry.name for entry in entries if entry.name.startswith('@') and entry.name not in ignored_folders and entry.is_dir()]
+    return sorted(found, key=lambda name: (name.lower(), name))
+
+def find_folders_with_at_symbol(mods_dir, output_mods_txt_file_dir, ignore_txt_file_dir, priority_mods, cache_path=None):
+    """Writes mods.txt (priority mods first, then every other @ folder) and returns the list.
+
+    Only the top level of mods_dir is listed. If mods_dir, ignore.txt, the priority list
+    and mods.txt itself haven't changed since the last run nothing is listed or written.
+    """
+    cache_path = cache_path or os.path.join(os.path.dirname(output_mods_txt_file_dir), "mods_cache.json")
+    # A folder being added, removed or renamed changes the mtime of the directory it's in
+    signature = {
+        "mods_dir": os.path.abspath(mods_dir),
+        "mods_dir_mtime": get_mtime(mods_dir),
+        "ignore_mtime": get_mtime(ignore_txt_file_dir),
+        "priority_mods": list(priority_mods),
+    }
+    cache = load_mods_cache(cache_path)
+    if cache.get("signature") == signature and cache.get("output_mtime") == get_mtime(output_mods_txt_file_dir):
+        print(f"Mods unchanged, {len(cache['mods'])} mods in {output_mods_txt_file_dir}")
+        return cache["mods"]
+
+    ignored_folders = read_ignored_folders(ignore_txt_file_dir)
+    priority_set = set(priority_mods)
+    folders_with_at = [mod for mod in discover_mods(mods_dir, ignored_folders) if mod not in priority_set]
+    sorted_mods = list(priority_mods) + folders_with_at
+    contents = "".join(folder + '\n' for folder in sorted_mods)
+    existing = None
+    if os.path.exists(output_mods_txt_file_dir):
+        with open(output_mods_txt_file_dir, 'r') as f:
+            existing = f.read()
+    if contents != existing:
+        with open(output_mods_txt_file_dir, 'w') as f:
+            f.write(contents)
+    save_mods_cache(cache_path, {
+        "signature": signature,
+        "output_mtime": get_mtime(output_mods_txt_file_dir),
+        "mods": sorted_mods,
+    })
     print(f"Found {len(folders_with_at)} folders starting with '@' (excluding ignored ones).")
+    return sorted_mods
 
-if __name__ == '__main__':
-    config_file = 'Utils/config.json'
-    with open(config_file, 'r') as f:
-        config = json.load(f)
+def find_keys_dir(mod_path):
+    """Mods ship their keys in keys, Keys or key."""
+    try:
+        with os.scandir(mod_path) as entries:
+            for entry in entries:
+                if entry.name.lower() in ("keys", "key") and entry.is_dir():
+                    return entry.path
+    except OSError:
+        pass
+    return None
+
+def list_keys(keys_dir):
+    """{key file name: [size, mtime]} for the .bikey files in keys_dir, None if it's gone."""
+    try:
+        with os.scandir(keys_dir) as entries:
+            keys = {}
+            for entry in entries:
+                if entry.name.lower().endswith(".bikey") and entry.is_file():
+                    stat = entry.stat()
+                    keys[entry.name] = [stat.st_size, stat.st_mtime_ns]
+            return keys
+    except OSError:
+        return None
+
+def key_signature(mods_dir, mod_list, server_keys_dir, mode, known_mods=None):
+    """Changes whenever a mod key is added, removed or overwritten, or the server keys folder changes.
+
+    known_mods is the "mods" of the last signature. A mod's keys folder found last time is
+    listed straight away instead of looking for it again, and a mod that had no keys
+    folder is only looked at again if its own folder changed.
+    """
+    known_mods = known_mods or {}
+    mods = {}
+    for mod in mod_list:
+        mod_path = os.path.join(mods_dir, mod)
+        previous = known_mods.get(mod)
+        if not isinstance(previous, dict):
+            previous = {}  # Not seen before, or a state file from before the key listing
+        keys_dir = previous.get("keys_dir")
+        keys = list_keys(keys_dir) if keys_dir else None
+        if keys is None:
+            if "keys_dir" in previous and previous["keys_dir"] is None and previous.get("mod_mtime") == get_mtime(mod_path):
+                mods[mod] = previous
+                continue
+            keys_dir = find_keys_dir(mod_path)
+            keys = list_keys(keys_dir) if keys_dir else None
+        if keys is None:
+            mods[mod] = {"keys_dir": None, "mod_mtime": get_mtime(mod_path)}
+        else:
+            mods[mod] = {"keys_dir": keys_dir, "keys": keys}
+    return {"mode": mode, "mods": mods, "server_keys_mtime": get_mtime(server_keys_dir)}
+
+def place_key(source, destination, mode):
+    if os.path.lexists(destination):
+        os.remove(destination)
+    if mode == "hardlink":
+        try:
+            os.link(source, destination)
+            return
+        except OSError:
+            pass  # Different drive, or the filesystem can't hardlink, so copy instead
+    shutil.copy2(source, destination)
+
+def is_same_key(source, destination):
+    try:
+        source_stat = os.stat(source)
+        destination_stat = os.stat(destination)
+    except OSError:
+        return False
+    if os.path.samestat(source_stat, destination_stat):
+        return True
+    return source_stat.st_size == destination_stat.st_size and source_stat.st_mtime_ns == destination_stat.st_mtime_ns
+
+def sync_keys(mods_dir, mod_list, server_keys_dir, state_path, mode="copy"):
+    """Puts every mod's .bikey files in the server keys folder.
+
+    Only new or changed keys are copied (or hardlinked), and keys we placed for mods that
+    are no longer in mod_list are removed. Keys that were already there (dayz.bikey) are
+    never touched. Each mod's keys folder is remembered in the state file, so a run where
+    nothing changed lists only those folders and the server keys folder's mtime.
+    """
+    state = load_mods_cache(state_path)
+    placed = state.get("keys", {})  # key file name -> mod it came from
+    signature = key_signature(mods_dir, mod_list, server_keys_dir, mode, state.get("signature", {}).get("mods"))
+    if state.get("signature") == signature:
+        print(f"Keys unchanged, {len(placed)} mod keys in {server_keys_dir}")
+        return {"copied": 0, "removed": 0, "keys": len(placed)}
+
+    os.makedirs(server_keys_dir, exist_ok=True)
+    wanted = {}
+    for mod in mod_list:
+        keys_dir = signature["mods"][mod]["keys_dir"]
+        if not keys_dir:
+            continue
+        for key_name in signature["mods"][mod]["keys"]:
+            # The first mod in load order wins if two mods ship a key with the same name
+            if key_name not in wanted:
+                wanted[key_name] = (mod, os.path.join(keys_dir, key_name))
+
+    copied = 0
+    for key_name, (mod, source) in wanted.items():
+        destination = os.path.join(server_keys_dir, key_name)
+        if key_name not in placed and os.path.exists(destination):
+            continue  # The server's own key, or one somebody put there by hand
+        if not is_same_key(source, destination):
+            place_key(source, destination, mode)
+            copied += 1
+        placed[key_name] = mod
+
+    removed = 0
+    for key_name in [key_name for key_name in placed if key_name not in wanted]:
+        try:
+            os.remove(os.path.join(server_keys_dir, key_name))
+        except FileNotFoundError:
+            pass
+        del placed[key_name]
+        removed += 1
+
+    # Copying changed the server keys folder, so sign the state with its new mtime
+    signature["server_keys_mtime"] = get_mtime(server_keys_dir)
+    save_mods_cache(state_path, {"signature": signature, "keys": placed})
+    print(f"Synced keys: {copied} copied, {removed} removed, {len(placed)} mod keys in {server_keys_dir}")
+    return {"copied": copied, "removed": removed, "keys": len(placed)}
+
+def generate_mods(config):
+    """Writes mods.txt and syncs the mod keys, in the calling process. Returns the mod list."""
     mods_dir = config['mods_dir']
     output_mods_txt_file_dir = os.path.join(mods_dir, config['output_mods_txt_file_dir'])
     ignore_txt_file_dir = os.path.join(mods_dir, config['ignore_txt_file_dir'])
     priority_mods = config['priority_mods']
-    find_folders_with_at_symbol(mods_dir, output_mods_txt_file_dir, ignore_txt_file_dir, priority_mods)
\ No newline at end of file
+    mod_list = find_folders_with_at_symbol(mods_dir, output_mods_txt_file_dir, ignore_txt_file_dir, priority_mods)
+    if config.get('server_keys_dir'):
+        server_keys_dir = os.path.join(mods_dir, config['server_keys_dir'])
+        key_state_path = os.path.join(os.path.dirname(output_mods_txt_file_dir), "keys_state.json")
+        sync_keys(mods_dir, mod_list, server_keys_dir, key_state_path, config.get('key_sync_mode', 'copy'))
+    return mod_list
+
+if __name__ == '__main__':
+    config_file = 'Utils/config.json'
+    with open(config_file, 'r') as f:
+        config = json.load(f)
+    generate_mods(config)
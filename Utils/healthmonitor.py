@@ -0,0 +1,196 @@
+import os
+import re
+import time
+import threading
+from collections import deque
+import metrics
+from logtail import LogTailer
+
+# Watches the running server's RPT log for the periodic server FPS lines and the freeze
+# lines -freezecheck writes, and raises an alert when the FPS stays low or the log stops
+# moving altogether, usually well before the process actually dies.
+#
+#   python Utils/healthmonitor.py [rpt dir]      prints the FPS and freezes from the newest RPT
+#
+# The patterns are regular expressions (health_fps_pattern, health_freeze_pattern in
+# config.json), the first group of the FPS one is the FPS. If the freeze one has a group
+# it's taken as how many seconds the server was frozen for.
+
+FPS_PATTERN = r"Average server FPS:\s*(\d+(?:\.\d+)?)"
+FREEZE_PATTERN = r"(?i)\bfr(?:eeze|ozen)\b\D*(\d+(?:\.\d+)?)?"
+HISTORY = 720  # FPS readings kept, half a day of the once a minute lines
+
+server_fps = metrics.gauge("server_fps", "Server FPS from the last performance line in the RPT")
+freezes = metrics.counter("server_freezes_total", "Freeze lines written to the RPT")
+alerts = metrics.counter("health_alerts_total", "Health alerts by reason: low_fps or stalled", ["reason"])
+
+
+class HealthMonitor:
+    """Tails the newest RPT in rpt_dir while is_running() and keeps an eye on the server.
+
+    Low FPS is every reading below fps_threshold for low_fps_seconds. Stalled is no new
+    line at all for stall_seconds (0 turns that check off). Each is alerted once until it
+    clears: log(type, message) always, alert(message) too (Discord, say) and
+    on_unhealthy(reason, message) to do something about it.
+    """
+
+    def __init__(self, rpt_dir, is_running, fps_threshold=10, low_fps_seconds=180, stall_seconds=300,
+                 fps_pattern=FPS_PATTERN, freeze_pattern=FREEZE_PATTERN, history=HISTORY,
+                 log=None, alert=None, on_unhealthy=None):
+        self.rpt_dir = rpt_dir
+        self.is_running = is_running
+        self.fps_threshold = fps_threshold
+        self.low_fps_seconds = low_fps_seconds
+        self.stall_seconds = stall_seconds
+        self.fps_pattern = re.compile(fps_pattern)
+        self.freeze_pattern = re.compile(freeze_pattern)
+        self.log = log or (lambda type, message: print(f"{type}: {message}"))
+        self.alert = alert
+        self.on_unhealthy = on_unhealthy
+        self.fps = deque(maxlen=history)  # (time.time(), fps)
+        self.freezes = deque(maxlen=history)  # (time.time(), seconds frozen or None)
+        self.low_fps_since = None  # monotonic time of the first reading in the current low run
+        self.last_line = None  # monotonic time of the last line, None while the server is down
+        self.unhealthy = set()  # Reasons alerted on and not cleared yet
+        self._stopping = threading.Event()
+        self._thread = None
+        self._tailer = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._loop, args=(self._stopping,), name="HealthMonitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        self._thread = None
+
+    def latest_fps(self):
+        return self.fps[-1][1] if self.fps else None
+
+    def status(self):
+        return {
+            "fps": self.latest_fps(),
+            "low_fps_seconds": round(time.monotonic() - self.low_fps_since) if self.low_fps_since else 0,
+            "seconds_since_last_line": round(time.monotonic() - self.last_line) if self.last_line else None,
+            "freezes": len(self.freezes),
+            "unhealthy": sorted(self.unhealthy),
+        }
+
+    def _loop(self, stopping):
+        self._tailer = None
+        try:
+            while not stopping.is_set():
+                try:
+                    self._watch_once(stopping)
+                except Exception as e:
+                    self.log("Warning", f"Health monitoring failed: {e}")
+                    self._close_tailer()  # Start over on the newest RPT next time round
+                    stopping.wait(2.0)
+        finally:
+            self._close_tailer()
+
+    def _watch_once(self, stopping):
+        if not self.is_running() or not os.path.isdir(self.rpt_dir):
+            self._close_tailer()
+            self._reset()
+            stopping.wait(2.0)
+            return
+        if self._tailer is None:
+            self._tailer = LogTailer(self.rpt_dir, "*.RPT")
+            self.last_line = time.monotonic()
+        self.feed(self._tailer.read_lines(timeout=1.0))
+        self.check()
+
+    def _close_tailer(self):
+        if self._tailer:
+            self._tailer.close()
+            self._tailer = None
+
+    def _reset(self):
+        self.last_line = None
+        self.low_fps_since = None
+        self.unhealthy.clear()
+
+    def feed(self, lines, now=None):
+        """Parses RPT lines into the FPS and freeze series."""
+        if not lines:
+            return
+        now = time.monotonic() if now is None else now
+        self.last_line = now
+        for line in lines:
+            match = self.fps_pattern.search(line)
+            if match:
+                try:
+                    fps = float(match.group(1))
+                except (IndexError, TypeError, ValueError):
+                    continue  # A pattern from config.json that matched something that isn't a number
+                self._add_fps(fps, now)
+                continue
+            match = self.freeze_pattern.search(line)
+            if match:
+                try:
+                    seconds = float(match.group(1)) if match.re.groups and match.group(1) else None
+                except ValueError:
+                    seconds = None
+                self.freezes.append((time.time(), seconds))
+                freezes.inc()
+                self.log("Warning", f"Server freeze: {line.strip()}")
+
+    def _add_fps(self, fps, now):
+        self.fps.append((time.time(), fps))
+        server_fps.set(fps)
+        if fps < self.fps_threshold:
+            if self.low_fps_since is None:
+                self.low_fps_since = now
+        else:
+            self.low_fps_since = None
+            self._clear("low_fps", f"Server FPS is back up to {fps:.0f}")
+
+    def check(self, now=None):
+        """Raises or clears the alerts, call it after feeding lines or when nothing came in."""
+        now = time.monotonic() if now is None else now
+        if self.low_fps_since is not None and now - self.low_fps_since >= self.low_fps_seconds:
+            self._raise("low_fps", f"Server FPS has been below {self.fps_threshold} for {now - self.low_fps_since:.0f}s (last {self.latest_fps():.1f})")
+        if self.stall_seconds and self.last_line is not None:
+            if now - self.last_line >= self.stall_seconds:
+                self._raise("stalled", f"Nothing written to the server log for {now - self.last_line:.0f}s, the server may be hung")
+            else:
+                self._clear("stalled", "Server log is moving again")
+
+    def _raise(self, reason, message):
+        if reason in self.unhealthy:
+            return
+        self.unhealthy.add(reason)
+        alerts.labels(reason).inc()
+        self.log("Error", message)
+        if self.alert:
+            try:
+                self.alert(message)
+            except Exception as e:
+                self.log("Warning", f"Could not send the health alert: {e}")
+        if self.on_unhealthy:
+            self.on_unhealthy(reason, message)
+
+    def _clear(self, reason, message):
+        if reason in self.unhealthy:
+            self.unhealthy.discard(reason)
+            self.log("Success", message)
+
+
+if __name__ == "__main__":
+    import sys
+    monitor = HealthMonitor(sys.argv[1] if len(sys.argv) > 1 else "Profiles", lambda: True, stall_seconds=0)
+    tailer = LogTailer(monitor.rpt_dir, "*.RPT", start_offset=lambda path, file: 0)
+    try:
+        while True:
+            monitor.fps.clear()
+            monitor.feed(tailer.read_lines(timeout=1.0))
+            for at, fps in monitor.fps:
+                print(f"{time.strftime('%H:%M:%S', time.localtime(at))} FPS {fps}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        tailer.close()
@@ -0,0 +1,106 @@
+import os
+import time
+import threading
+import logsteamids
+import monitordeaths
+import metrics
+from logtail import LogTailer
+from logevents import EventBus, LogParser
+from killstats import KillStats, KillStatsConsumer
+
+RESET = "\033[0m"
+YELLOW = "\033[93m"
+CYAN = "\033[96m"
+
+# Reads the DayZ logs once and publishes parsed events on an EventBus. The killfeed and the
+# Steam ID registry subscribe to it, so a log that both of them need is only tailed and parsed once.
+
+config = monitordeaths.config
+log_steam_ids_active = config.get("log_steam_ids_active", False)
+killfeed_script_active = config.get("killfeed_script_active", False)
+
+running = True
+stores = []  # Steam ID stores that need a final compaction on exit
+kill_stats = []  # Kill stats databases to close on exit
+
+def is_running():
+    return running
+
+def enable_killfeed():
+    monitordeaths.monitoring = True
+
+def disable_killfeed():
+    monitordeaths.monitoring = False
+
+def log_dir_key(log_dir):
+    """Two paths to the same directory should share one tailer."""
+    return os.path.normcase(os.path.abspath(log_dir))
+
+def build_pipeline(bus, steam_ids_active=True, killfeed_active=True):
+    """Subscribes the active consumers and returns the tailers that need pumping."""
+    tailers = {}
+    if steam_ids_active:
+        store, checkpoint = logsteamids.process_all_log_files()
+        steam_tailer = logsteamids.create_tailer(checkpoint)
+        tailers[log_dir_key(logsteamids.LOG_DIR)] = steam_tailer
+        logsteamids.SteamIdConsumer(store, checkpoint, steam_tailer).subscribe(bus)
+        store.start_compactor()
+        stores.append(store)
+        metrics.gauge("steam_ids_registered", "Steam IDs in the registry").set_function(lambda: len(store))
+        print(f"{CYAN}Steam ID logging enabled{RESET}")
+    if killfeed_active:
+        key = log_dir_key(monitordeaths.log_dir_path)
+        if key not in tailers:
+            tailers[key] = LogTailer(monitordeaths.log_dir_path, "*.log")
+        monitordeaths.subscribe_killfeed(bus)
+        metrics.gauge("steam_index_players", "Players in the killfeed's name -> Steam ID index").set_function(lambda: len(monitordeaths.steam_index))
+        metrics.gauge("webhook_queue_depth", "Webhook messages waiting to be posted").set_function(monitordeaths.webhook_dispatcher.queue_depth)
+        print(f"{CYAN}Discord killfeed enabled{RESET}")
+        if config.get("kill_stats_active", False):
+            stats = KillStats(config.get("kill_stats_db_path", "Utils/killstats.db"))
+            KillStatsConsumer(stats, monitordeaths.steam_index.find_steam_id, monitordeaths.is_bot_player).subscribe(bus)
+            kill_stats.append(stats)
+            print(f"{CYAN}Kill stats enabled{RESET}")
+    return list(tailers.values())
+
+def main():
+    global running
+    if not (log_steam_ids_active or killfeed_script_active):
+        print("Neither log_steam_ids_active nor killfeed_script_active is enabled in config.json, nothing to do.")
+        return
+    if config.get("metrics_active", False):
+        # The manager serves its own metrics on metrics_port, this process has its own port
+        port = config.get("ingest_metrics_port", metrics.DEFAULT_INGEST_PORT)
+        try:
+            metrics.start_metrics_server(config.get("metrics_host", "127.0.0.1"), port)
+            print(f"{CYAN}Metrics on port {port}{RESET}")
+        except OSError as e:
+            print(f"{YELLOW}Could not serve metrics on port {port}: {e}{RESET}")
+    bus = EventBus()
+    tailers = build_pipeline(bus, log_steam_ids_active, killfeed_script_active)
+    parser = LogParser(bus, monitordeaths.killfeed_classifier if killfeed_script_active else None)
+    if killfeed_script_active:
+        monitordeaths.webhook_dispatcher.start()
+        threading.Thread(target=monitordeaths.check_player_count, args=(enable_killfeed, disable_killfeed), daemon=True).start()
+    threads = [threading.Thread(target=parser.pump, args=(tailer, is_running), daemon=True) for tailer in tailers]
+    for thread in threads:
+        thread.start()
+    print(f"{CYAN}Log ingestion started, tailing {len(tailers)} log director{'y' if len(tailers) == 1 else 'ies'}{RESET}")
+    try:
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(f"{YELLOW}Exiting...{RESET}")
+    finally:
+        running = False
+        for thread in threads:
+            thread.join(5)
+        for store in stores:
+            store.close()
+        for stats in kill_stats:
+            stats.close()
+        if killfeed_script_active:
+            monitordeaths.webhook_dispatcher.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+import os
+import sys
+import time
+import threading
+import subprocess
+from launchplan import prepare_launch, DEFAULT_MAX_MEM
+from procsampler import resolve_max_mem
+from readiness import ReadinessProbe, record_boot_time
+from supervisor import ServerSupervisor
+from dzsaquery import query_url
+
+# Runs several DayZ servers from one manager. Each entry in the config's "instances" list
+# overrides the top level settings for one server (name, ports, config, profiles, mods) and
+# gets its own set of CPU cores, so the servers don't fight over the same ones.
+#
+#   "instances": [
+#       {"name": "chernarus", "server_port": 2302, "dzsa_query_port": 27016, "cpu_cores": 8,
+#        "server_config_dir": "serverDZ_chernarus.cfg", "profiles_dir": "Profiles_chernarus"},
+#       {"name": "livonia", "server_port": 2402, "dzsa_query_port": 27116, "cpu_cores": 8,
+#        "server_config_dir": "serverDZ_livonia.cfg", "profiles_dir": "Profiles_livonia",
+#        "mods_txt_dir": "Utils/mods_livonia.txt", "cpu_affinity": [16, 17, 18, 19, 20, 21, 22, 23]}
+#   ]
+
+
+def available_cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def allocate_affinity(requests, cpus=None):
+    """Gives every instance its own cores, returns {name: [cpu]}.
+
+    requests is [(name, core count, explicit cpu list or None)]. Explicit lists are
+    kept as they are (and must not overlap), the rest are handed out in order from
+    whatever is left. Raises ValueError if there aren't enough cores to go round.
+    """
+    cpus = available_cpus() if cpus is None else list(cpus)
+    allocation = {}
+    taken = set()
+    for name, _, explicit in requests:
+        if explicit:
+            overlap = taken.intersection(explicit)
+            if overlap:
+                raise ValueError(f"Instance {name} shares CPUs {sorted(overlap)} with another instance")
+            unknown = set(explicit) - set(cpus)
+            if unknown:
+                raise ValueError(f"Instance {name} asks for CPUs {sorted(unknown)} that this machine doesn't have")
+            allocation[name] = sorted(explicit)
+            taken.update(explicit)
+    free = [cpu for cpu in cpus if cpu not in taken]
+    for name, core_count, explicit in requests:
+        if explicit:
+            continue
+        if core_count > len(free):
+            raise ValueError(f"Not enough CPUs for instance {name}: it needs {core_count}, {len(free)} left")
+        allocation[name], free = free[:core_count], free[core_count:]
+    return allocation
+
+
+def set_process_affinity(pid, cpus):
+    """Pins a process to cpus, returns False if this platform can't do it."""
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(pid, cpus)
+        return True
+    if sys.platform == "win32":
+        import ctypes
+        PROCESS_SET_INFORMATION = 0x0200
+        PROCESS_QUERY_INFORMATION = 0x0400
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.OpenProcess.restype = ctypes.c_void_p
+        handle = kernel32.OpenProcess(PROCESS_SET_INFORMATION | PROCESS_QUERY_INFORMATION, False, pid)
+        if not handle:
+            raise ctypes.WinError(ctypes.get_last_error())
+        try:
+            mask = sum(1 << cpu for cpu in cpus)
+            if not kernel32.SetProcessAffinityMask(ctypes.c_void_p(handle), ctypes.c_size_t(mask)):
+                raise ctypes.WinError(ctypes.get_last_error())
+        finally:
+            kernel32.CloseHandle(ctypes.c_void_p(handle))
+        return True
+    return False
+
+
+def read_mod_list(mods_txt):
+    with open(mods_txt, "r") as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+class ServerInstance:
+    """One DayZ server with its own ports, profiles, mod list, CPU cores and supervisor."""
+
+    def __init__(self, settings, cpus, log=None, on_ready=None):
+        self.settings = settings
+        self.name = settings["name"]
+        self.cpus = cpus
+        self.on_ready = on_ready
+        self._log = log
+        self.server_dir = settings["server_dir"]
+        self.profiles_dir = settings.get("profiles_dir", f"Profiles_{self.name}")
+        self.process = None
+        self.started_at = None
+        self.mod_list = []
+        self.lock = threading.Lock()
+        self.supervisor = ServerSupervisor(
+            self._restart_crashed_process,
+            wait_ready=self.wait_ready,
+            on_ready=lambda: self.on_ready(self) if self.on_ready else None,
+            log=self.log,
+            history_path=settings.get("run_history_path", instance_path(PER_INSTANCE_PATHS["run_history_path"], self.name)),
+            backoff=settings.get("restart_backoff"),
+            stable_uptime=settings.get("restart_stable_seconds", 600),
+            max_crashes=settings.get("crash_loop_max_crashes", 5),
+            window_minutes=settings.get("crash_loop_window_minutes", 10),
+            name=self.name,
+        )
+
+    def log(self, type, message):
+        message = f"[{self.name}] {message}"
+        if self._log:
+            self._log(type, message)
+        else:
+            print(f"{type}: {message}")
+
+    def query_endpoint(self):
+        return query_url(self.settings.get('server_endpoint', ''), self.settings['dzsa_query_port'])
+
+    def prepare(self):
+        """Builds this instance's LaunchPlan, safe to call while it's running."""
+        mod_list = read_mod_list(os.path.join(self.server_dir, self.settings["mods_txt_dir"]))
+        max_mem = resolve_max_mem(self.settings.get("max_mem", DEFAULT_MAX_MEM), self.settings.get("memory_history_path", instance_path(PER_INSTANCE_PATHS["memory_history_path"], self.name)), self.log)
+        plan = prepare_launch(self.server_dir, mod_list, self.settings.get("mods_dir", self.server_dir), self.settings["server_config_dir"],
+                              self.settings["server_port"], len(self.cpus), max_mem, profiles=self.profiles_dir)
+        for warning in plan.warnings:
+            self.log("Warning", warning)
+        for error in plan.errors:
+            self.log("Error", error)
+        return plan
+
+    def _start_process(self, plan=None):
+        plan = plan or self.prepare()
+        self.mod_list = plan.mod_list
+        self.started_at = time.time()
+        process = subprocess.Popen(plan.command, cwd=self.server_dir)
+        try:
+            if not set_process_affinity(process.pid, self.cpus):
+                self.log("Warning", "CPU affinity isn't supported on this platform, the instance can use every core")
+        except OSError as e:
+            self.log("Warning", f"Could not pin the server to CPUs {self.cpus}: {e}")
+        self.process = process
+        return process
+
+    def wait_ready(self):
+        process = self.process
+        query_address = (self.settings.get("server_endpoint") or "127.0.0.1", self.settings["dzsa_query_port"])
+        probe = ReadinessProbe(os.path.join(self.server_dir, self.profiles_dir), self.started_at, query_address, self.settings.get("ready_markers"))
+        ready_timeout = self.settings.get("ready_timeout", 300)
+        ready = probe.wait(ready_timeout, is_alive=lambda: process is not None and process.poll() is None)
+        try:
+            record_boot_time(self.settings.get("boot_times_path", instance_path(PER_INSTANCE_PATHS["boot_times_path"], self.name)), self.started_at,
+                             probe.elapsed() if ready else None, probe.method, self.mod_list)
+        except OSError as e:
+            self.log("Warning", f"Could not record the boot time: {e}")
+        if ready:
+            self.log("Success", f"Server ready after {probe.elapsed():.0f}s")
+        elif probe.method == "exited":
+            self.log("Error", "Server exited before it finished booting")
+        else:
+            self.log("Warning", f"Server not ready after {ready_timeout}s")
+        return ready
+
+    def _after_start(self):
+        if self.wait_ready() and self.on_ready:
+            self.on_ready(self)
+
+    def _restart_crashed_process(self, stopping):
+        with self.lock:
+            if stopping.is_set():
+                return None  # stop() or restart() got the lock first, the supervisor isn't wanted any more
+            return self._start_process()
+
+    def start(self, plan=None):
+        with self.lock:
+            if self.is_running():
+                return True
+            plan = plan or self.prepare()
+            if not plan.is_valid():
+                return False
+            self._start_process(plan)
+            self.supervisor.watch(self.process)
+        self.log("Success", f"Server booting up on CPUs {self.cpus}")
+        threading.Thread(target=self._after_start, daemon=True).start()
+        return True
+
+    def _stop_process(self):
+        if self.process:
+            self.process.terminate()
+            self.process.wait()
+            self.process = None
+
+    def stop(self):
+        with self.lock:
+            self.supervisor.stop()
+            self._stop_process()
+        self.log("Info", "Server stopped")
+
+    def restart(self, plan=None):
+        plan = plan or self.prepare()  # Prepared while the old server is still up
+        if not plan.is_valid():
+            self.log("Error", "Restart cancelled, the server would not start with the current setup")
+            return False
+        with self.lock:
+            self.supervisor.stop()
+            self._stop_process()
+            self._start_process(plan)
+            self.supervisor.watch(self.process)
+        self.log("Success", "Server restarted")
+        threading.Thread(target=self._after_start, daemon=True).start()
+        return True
+
+    def is_running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def status(self):
+        return {
+            "name": self.name,
+            "running": self.is_running(),
+            "pid": self.process.pid if self.is_running() else None,
+            "cpus": self.cpus,
+            "port": self.settings["server_port"],
+            "uptime": round(time.time() - self.started_at, 1) if self.is_running() else None,
+            "restarts": self.supervisor.restarts,
+        }
+
+
+# History files every instance keeps its own copy of, the instance's name is added to the
+# top level path unless the instance entry sets one itself
+PER_INSTANCE_PATHS = {
+    "run_history_path": "Utils/run_history.jsonl",
+    "boot_times_path": "Utils/boot_times.jsonl",
+    "memory_history_path": "Utils/memory_history.jsonl",
+}
+
+
+def instance_path(path, name):
+    """Utils/run_history.jsonl -> Utils/run_history_<name>.jsonl"""
+    root, extension = os.path.splitext(path)
+    return f"{root}_{name}{extension}"
+
+
+def instance_settings(config, instance):
+    """The top level config with one instance's overrides on top."""
+    settings = {key: value for key, value in config.items() if key != "instances"}
+    for key, default in PER_INSTANCE_PATHS.items():
+        settings[key] = instance_path(config.get(key, default), instance["name"])
+    settings.update(instance)
+    return settings
+
+
+class InstanceManager:
+    """All the instances from config["instances"], each with its own disjoint CPU set."""
+
+    def __init__(self, config, log=None, on_ready=None, cpus=None):
+        settings = [instance_settings(config, instance) for instance in config.get("instances", [])]
+        names = [entry["name"] for entry in settings]
+        if len(set(names)) != len(names):
+            raise ValueError("Every instance needs a unique name")
+        ports = [port for entry in settings for port in (entry["server_port"], entry["dzsa_query_port"])]
+        if len(set(ports)) != len(ports):
+            raise ValueError("Instances can't share a server_port or dzsa_query_port")
+        affinity = allocate_affinity([(entry["name"], entry.get("cpu_cores", 2), entry.get("cpu_affinity")) for entry in settings], cpus)
+        self.instances = {entry["name"]: ServerInstance(entry, affinity[entry["name"]], log, on_ready) for entry in settings}
+
+    def __iter__(self):
+        return iter(self.instances.values())
+
+    def get(self, name):
+        return self.instances.get(name)
+
+    def start_all(self):
+        return all([instance.start() for instance in self])
+
+    def stop_all(self):
+        for instance in self:
+            instance.stop()
+
+    def restart_all(self):
+        return all([instance.restart() for instance in self])
+
+    def status(self):
+        return [instance.status() for instance in self]
@@ -0,0 +1,15 @@
+import os
+import json
+
+# Writing the manager's state files (mod manifest, mods cache, log checkpoint, Steam ID
+# snapshot) so that a crash or power cut never leaves one empty or half written.
+
+
+def write_json_atomic(path, data, indent=4):
+    """Writes JSON to a temporary file, syncs it to disk and swaps it in, readers only ever see a complete file."""
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, indent=indent)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
@@ -0,0 +1,119 @@
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+KILLFEED_MARKER = "[Killfeed] "
+
+# Ordered rule table: (kind, pattern body, victim group, killer group, weapon group, distance group, check steam id)
+# The order matches the old if/elif chain in monitordeaths.py, the first rule that matches wins
+KILLFEED_RULES = [
+    ("bear", r'(.*?) got mauled to death by a Brown Bear\.', 1, None, None, None, False),
+    ("infected", r'\[(.*?)\] (.*?) got killed by an Infected\.', 1, None, None, None, False),
+    ("bled_out", r'(.*?) bled out\.', 1, None, None, None, False),
+    ("beaten_by_ai", r'(.*?) got beaten to a pulp by AI (.*?) with.*', 1, 2, None, None, False),
+    ("ai_beaten_by_ai", r'AI (.*?) got beaten to a pulp by AI (.*?) with.*', 1, 2, None, None, False),
+    ("killed_with_weapon", r'(.*?) got killed by (.*?) with (.*?)(?: from a distance of (\d+\s?[mM]))?\.', 1, 2, 3, 4, True),
+    ("killed_by", r'(.*?) got killed by (.*?) with.*', 1, 2, None, None, True),
+    ("died", r'(.*?) got killed\.', 1, None, None, None, True),
+    ("fell", r'(.*?) fell to their death\.', 1, None, None, None, True),
+    ("chemical", r'(.*?) died from Chemical Poisoning\.', 1, None, None, None, True),
+]
+
+# Discord message templates for each event kind
+MESSAGE_TEMPLATES = {
+    "bear": "**{victim}** was mauled to death by a Brown Bear!",
+    "infected": "**{victim}** got killed by an Infected!",
+    "bled_out": "**{victim}** has bled out!",
+    "beaten_by_ai": "**{victim}** has been beaten to a pulp by **AI {killer}**!",
+    "ai_beaten_by_ai": "**AI {victim}** has been beaten to a pulp by **AI {killer}**!",
+    "killed_with_weapon": "**{victim}** was killed by **{killer}** with a **{weapon}**!",
+    "killed_by": "**{victim}** was killed by **{killer}**!",
+    "died": "**{victim}** died!",
+    "fell": "**{victim}** fell to their death!",
+    "chemical": "**{victim}** died from Chemical Poisoning!",
+}
+
+_tag_pattern = re.compile(r'\[.*?\] ')
+
+
+def clean_message(message):
+    return _tag_pattern.sub('', message).strip()
+
+
+@dataclass(frozen=True)
+class KillfeedEvent:
+    """A single parsed [Killfeed] line."""
+    kind: str
+    victim: str
+    killer: Optional[str] = None
+    weapon: Optional[str] = None
+    distance: Optional[str] = None
+    check_steam_id: bool = False
+    victim_is_bot: bool = False
+
+    def message(self):
+        """Returns the Discord message for this event."""
+        return MESSAGE_TEMPLATES[self.kind].format(victim=self.victim, killer=self.killer, weapon=self.weapon)
+
+
+class KillfeedClassifier:
+    """Classifies log lines into KillfeedEvents with at most one regex match per line.
+
+    Lines without the [Killfeed] marker are rejected with a substring check, everything
+    else is matched once against a single alternation built from KILLFEED_RULES.
+    """
+
+    def __init__(self, bot_names=(), rules=KILLFEED_RULES):
+        self.bot_names = tuple(name.lower() for name in bot_names if name)
+        self._bot_cache = {}
+        self._rules = []
+        alternatives = []
+        group_index = 0
+        for index, (kind, body, victim, killer, weapon, distance, check_steam_id) in enumerate(rules):
+            # Every rule is wrapped in a named group so lastgroup tells us which rule matched,
+            # the rule's own groups follow directly after it
+            alternatives.append(f"(?P<r{index}>{body})")
+            offset = group_index + 1
+            group_index += 1 + re.compile(body).groups
+            self._rules.append((
+                kind,
+                offset + victim,
+                offset + killer if killer else None,
+                offset + weapon if weapon else None,
+                offset + distance if distance else None,
+                check_steam_id,
+            ))
+        self._pattern = re.compile("|".join(alternatives))
+
+    def is_bot_player(self, player_name):
+        """Check if the player name is in the custom bot names list or is 'AI Survivor (Raiders)'."""
+        if player_name is None:
+            return False
+        result = self._bot_cache.get(player_name)
+        if result is None:
+            lowered = player_name.lower()
+            result = player_name == "AI Survivor (Raiders)" or any(bot_name in lowered for bot_name in self.bot_names)
+            if len(self._bot_cache) > 50000:
+                self._bot_cache.clear()
+            self._bot_cache[player_name] = result
+        return result
+
+    def classify(self, line):
+        """Returns a KillfeedEvent for a [Killfeed] line or None for anything else."""
+        start = line.find(KILLFEED_MARKER)
+        if start < 0:
+            return None
+        match = self._pattern.match(line, start + len(KILLFEED_MARKER))
+        if match is None:
+            return None
+        kind, victim, killer, weapon, distance, check_steam_id = self._rules[int(match.lastgroup[1:])]
+        victim_name = clean_message(match.group(victim))
+        return KillfeedEvent(
+            kind=kind,
+            victim=victim_name,
+            killer=clean_message(match.group(killer)) if killer else None,
+            weapon=clean_message(match.group(weapon)) if weapon else None,
+            distance=match.group(distance) if distance else None,
+            check_steam_id=check_steam_id,
+            victim_is_bot=self.is_bot_player(victim_name) if check_steam_id else False,
+        )
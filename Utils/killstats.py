@@ -0,0 +1,233 @@
+import re
+import sys
+import json
+import time
+import sqlite3
+import threading
+from logevents import TOPIC_KILLFEED, TOPIC_BATCH
+
+# Which killfeed event kinds count as a kill for the killer, and what cause each death is filed under
+KILL_KINDS = {"killed_with_weapon", "killed_by", "beaten_by_ai", "ai_beaten_by_ai"}
+DEATH_CAUSES = {
+    "bear": "bear",
+    "infected": "infected",
+    "bled_out": "bleed_out",
+    "beaten_by_ai": "ai",
+    "ai_beaten_by_ai": "ai",
+    "killed_with_weapon": "player",
+    "killed_by": "player",
+    "died": "unknown",
+    "fell": "fall",
+    "chemical": "chemical",
+}
+
+AI_KILLER_KINDS = {"beaten_by_ai", "ai_beaten_by_ai"}
+AI_VICTIM_KINDS = {"ai_beaten_by_ai"}
+
+distance_pattern = re.compile(r'(\d+)')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    kind TEXT NOT NULL,
+    cause TEXT NOT NULL,
+    victim TEXT NOT NULL,
+    victim_key TEXT NOT NULL,
+    killer TEXT,
+    killer_key TEXT,
+    weapon TEXT,
+    distance INTEGER
+);
+CREATE INDEX IF NOT EXISTS events_ts ON events(ts);
+CREATE INDEX IF NOT EXISTS events_victim ON events(victim_key, ts);
+CREATE INDEX IF NOT EXISTS events_killer ON events(killer_key, ts);
+CREATE INDEX IF NOT EXISTS events_distance ON events(distance DESC) WHERE distance IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS player_stats (
+    player_key TEXT PRIMARY KEY,
+    steam_id TEXT,
+    name TEXT NOT NULL,
+    is_bot INTEGER NOT NULL DEFAULT 0,
+    kills INTEGER NOT NULL DEFAULT 0,
+    deaths INTEGER NOT NULL DEFAULT 0,
+    longest_kill INTEGER
+);
+CREATE INDEX IF NOT EXISTS player_stats_kills ON player_stats(is_bot, kills DESC);
+
+CREATE TABLE IF NOT EXISTS weapon_stats (
+    weapon TEXT PRIMARY KEY,
+    kills INTEGER NOT NULL DEFAULT 0,
+    longest_kill INTEGER
+);
+CREATE INDEX IF NOT EXISTS weapon_stats_kills ON weapon_stats(kills DESC);
+
+CREATE TABLE IF NOT EXISTS cause_stats (
+    cause TEXT PRIMARY KEY,
+    deaths INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def parse_distance(distance):
+    """'142 m' -> 142"""
+    if not distance:
+        return None
+    match = distance_pattern.search(distance)
+    return int(match.group(1)) if match else None
+
+
+def player_key(player_name, steam_id):
+    """Players are tracked by Steam ID, or by name if we don't know it (AI, unreported players)."""
+    return steam_id if steam_id else f"name:{player_name}"
+
+
+class KillStats:
+    """SQLite store of every killfeed event, with aggregates kept up to date as events come in.
+
+    The per-player, per-weapon and per-cause tables are updated in the same transaction
+    as the event insert, so leaderboard queries never have to scan the events table.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(SCHEMA)
+            self._connection.commit()
+
+    def close(self):
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+    def commit(self):
+        with self._lock:
+            self._connection.commit()
+
+    def _bump_player(self, key, steam_id, name, is_bot, kills=0, deaths=0, distance=None):
+        self._connection.execute(
+            """INSERT INTO player_stats (player_key, steam_id, name, is_bot, kills, deaths, longest_kill)
+               VALUES (?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(player_key) DO UPDATE SET
+                   name = excluded.name,
+                   kills = kills + excluded.kills,
+                   deaths = deaths + excluded.deaths,
+                   longest_kill = MAX(COALESCE(longest_kill, 0), COALESCE(excluded.longest_kill, 0))""",
+            (key, steam_id, name, int(is_bot), kills, deaths, distance),
+        )
+
+    def record(self, event, victim_steam_id=None, killer_steam_id=None, victim_is_bot=False, killer_is_bot=False, timestamp=None):
+        """Stores a killfeed.KillfeedEvent and updates the aggregates, the caller decides when to commit()."""
+        timestamp = timestamp or time.time()
+        cause = DEATH_CAUSES.get(event.kind, "unknown")
+        distance = parse_distance(event.distance)
+        victim_key = player_key(event.victim, victim_steam_id)
+        killer_key = player_key(event.killer, killer_steam_id) if event.killer else None
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO events (ts, kind, cause, victim, victim_key, killer, killer_key, weapon, distance) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (timestamp, event.kind, cause, event.victim, victim_key, event.killer, killer_key, event.weapon, distance),
+            )
+            self._bump_player(victim_key, victim_steam_id, event.victim, victim_is_bot, deaths=1)
+            if killer_key and event.kind in KILL_KINDS:
+                self._bump_player(killer_key, killer_steam_id, event.killer, killer_is_bot, kills=1, distance=distance)
+                if event.weapon:
+                    self._connection.execute(
+                        """INSERT INTO weapon_stats (weapon, kills, longest_kill) VALUES (?, 1, ?)
+                           ON CONFLICT(weapon) DO UPDATE SET
+                               kills = kills + 1,
+                               longest_kill = MAX(COALESCE(longest_kill, 0), COALESCE(excluded.longest_kill, 0))""",
+                        (event.weapon, distance),
+                    )
+            self._connection.execute(
+                "INSERT INTO cause_stats (cause, deaths) VALUES (?, 1) ON CONFLICT(cause) DO UPDATE SET deaths = deaths + 1",
+                (cause,),
+            )
+
+    def _query(self, sql, parameters=()):
+        with self._lock:
+            return [dict(row) for row in self._connection.execute(sql, parameters)]
+
+    def leaderboard(self, limit=10, order="kills", include_bots=False):
+        """Top players by kills or K/D (kills / deaths, deaths counted as at least 1)."""
+        order_by = "kills * 1.0 / MAX(deaths, 1) DESC, kills DESC" if order == "kd" else "kills DESC"
+        return self._query(
+            f"""SELECT player_key, steam_id, name, kills, deaths, ROUND(kills * 1.0 / MAX(deaths, 1), 2) AS kd, longest_kill
+                FROM player_stats WHERE kills > 0 AND (? OR is_bot = 0) ORDER BY {order_by} LIMIT ?""",
+            (int(include_bots), limit),
+        )
+
+    def player(self, steam_id_or_name):
+        rows = self._query(
+            "SELECT * FROM player_stats WHERE player_key = ? OR player_key = ?",
+            (steam_id_or_name, f"name:{steam_id_or_name}"),
+        )
+        return rows[0] if rows else None
+
+    def longest_kills(self, limit=10):
+        return self._query(
+            "SELECT ts, killer, killer_key, victim, weapon, distance FROM events WHERE distance IS NOT NULL ORDER BY distance DESC LIMIT ?",
+            (limit,),
+        )
+
+    def top_weapons(self, limit=10):
+        return self._query("SELECT weapon, kills, longest_kill FROM weapon_stats ORDER BY kills DESC LIMIT ?", (limit,))
+
+    def deaths_by_cause(self):
+        return self._query("SELECT cause, deaths FROM cause_stats ORDER BY deaths DESC")
+
+
+class KillStatsConsumer:
+    """Records every killfeed event from a logevents.EventBus, committing once per batch of log lines."""
+
+    def __init__(self, stats, find_steam_id=None, is_bot_player=None):
+        self.stats = stats
+        self.find_steam_id = find_steam_id or (lambda player_name: None)
+        self.is_bot_player = is_bot_player or (lambda player_name: False)
+        self._uncommitted = 0
+
+    def subscribe(self, bus):
+        bus.subscribe(TOPIC_KILLFEED, self.on_killfeed)
+        bus.subscribe(TOPIC_BATCH, self.on_batch)
+
+    def on_killfeed(self, event):
+        victim_is_bot = event.kind in AI_VICTIM_KINDS or self.is_bot_player(event.victim)
+        killer_is_bot = event.kind in AI_KILLER_KINDS or (bool(event.killer) and self.is_bot_player(event.killer))
+        victim_steam_id = None if victim_is_bot else self.find_steam_id(event.victim)
+        killer_steam_id = self.find_steam_id(event.killer) if event.killer and not killer_is_bot else None
+        self.stats.record(event, victim_steam_id, killer_steam_id, victim_is_bot, killer_is_bot)
+        self._uncommitted += 1
+
+    def on_batch(self, batch):
+        if self._uncommitted:
+            self.stats.commit()
+            self._uncommitted = 0
+
+
+def print_rows(rows):
+    for row in rows:
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    # python Utils/killstats.py [leaderboard|kd|weapons|longest|causes] [db path]
+    query = sys.argv[1] if len(sys.argv) > 1 else "leaderboard"
+    db_path = sys.argv[2] if len(sys.argv) > 2 else "Utils/killstats.db"
+    stats = KillStats(db_path)
+    queries = {
+        "leaderboard": lambda: stats.leaderboard(),
+        "kd": lambda: stats.leaderboard(order="kd"),
+        "weapons": stats.top_weapons,
+        "longest": stats.longest_kills,
+        "causes": stats.deaths_by_cause,
+    }
+    if query not in queries:
+        print(f"Unknown query {query}, use one of: {', '.join(queries)}")
+    else:
+        print_rows(queries[query]())
+    stats.close()
@@ -0,0 +1,74 @@
+import os
+import time
+
+SERVER_EXECUTABLE = "DayZServer_x64"
+PROFILES_DIR = "Profiles"
+DEFAULT_MAX_MEM = 2048  # MB, what -maxMem always used to be
+
+# Everything needed to start the server, worked out ahead of time. Building and checking the
+# plan (mod list, command line, config files) can happen while the old server is still
+# running, so a restart only has to stop one process and exec the next.
+
+
+class LaunchPlan:
+    def __init__(self, command, mod_list, errors=None, warnings=None):
+        self.command = command
+        self.mod_list = mod_list
+        self.errors = errors or []
+        self.warnings = warnings or []
+        self.prepared_at = time.time()
+
+    def is_valid(self):
+        return not self.errors
+
+    def age(self):
+        return time.time() - self.prepared_at
+
+
+def build_server_command(mod_list, server_config, port, cpu_count, max_mem=DEFAULT_MAX_MEM, profiles=PROFILES_DIR):
+    return [
+        f"./{SERVER_EXECUTABLE}",
+        f"-profiles={profiles}",
+        f"-maxMem={max_mem}",
+        f"-mod={';'.join(mod_list)}",
+        f"-config={server_config}",
+        f"-port={port}",
+        f"-cpuCount={cpu_count}",
+        "-dologs",
+        "-adminlog",
+        "-netlog",
+        "-freezecheck"
+    ]
+
+
+def validate_launch(server_dir, server_config, mod_list, mods_dir, port):
+    """Returns (errors, warnings) for anything that would stop the server from starting properly."""
+    errors = []
+    warnings = []
+    if not any(os.path.isfile(os.path.join(server_dir, SERVER_EXECUTABLE + extension)) for extension in (".exe", "")):
+        errors.append(f"{SERVER_EXECUTABLE} not found in {server_dir}")
+    config_path = os.path.join(server_dir, server_config)
+    try:
+        with open(config_path, 'r', encoding='utf-8', errors='replace') as file:
+            server_config_text = file.read()
+        if "template" not in server_config_text:
+            warnings.append(f"{server_config} has no mission template set")
+        if server_config_text.count("{") != server_config_text.count("}"):
+            errors.append(f"{server_config} has unbalanced braces")
+    except OSError as e:
+        errors.append(f"Cannot read {config_path}: {e}")
+    if not isinstance(port, int) or not 0 < port < 65536:
+        errors.append(f"Invalid server_port {port}")
+    if not mod_list:
+        warnings.append("The mod list is empty")
+    missing = [mod for mod in mod_list if not os.path.isdir(os.path.join(mods_dir, mod))]
+    if missing:
+        errors.append(f"Mod folders not found: {', '.join(missing)}")
+    return errors, warnings
+
+
+def prepare_launch(server_dir, mod_list, mods_dir, server_config, port, cpu_count, max_mem=DEFAULT_MAX_MEM, profiles=PROFILES_DIR):
+    """Builds and checks a LaunchPlan for mod_list."""
+    command = build_server_command(mod_list, server_config, port, cpu_count, max_mem, profiles)
+    errors, warnings = validate_launch(server_dir, server_config, mod_list, mods_dir, port)
+    return LaunchPlan(command, list(mod_list), errors, warnings)
@@ -0,0 +1,94 @@
+import os
+import json
+import hashlib
+from jsonfile import write_json_atomic
+
+HEAD_BYTES = 256  # How much of the start of a log we fingerprint to notice it being replaced
+
+
+def read_head_hash(file, length=HEAD_BYTES):
+    """Returns a hash of the first bytes of an open binary file."""
+    file.seek(0)
+    return hashlib.sha1(file.read(length)).hexdigest()
+
+
+class LogCheckpoint:
+    """Remembers how far into each log file we've already parsed.
+
+    Stored per file: size, mtime, byte offset of the end of the last complete line
+    and a hash of the first bytes. Anything after the offset (including a partially
+    written last line) gets parsed on the next run.
+    """
+
+    def __init__(self, checkpoint_path):
+        self.checkpoint_path = checkpoint_path
+        self.files = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                self.files = json.load(f).get("files", {})
+        except (OSError, ValueError):
+            self.files = {}
+
+    def save(self):
+        """Writes the checkpoint so it's never half written, see jsonfile.py"""
+        write_json_atomic(self.checkpoint_path, {"files": self.files})
+
+    def reset(self):
+        self.files = {}
+
+    def start_offset(self, log_file, file):
+        """Returns where parsing should resume for an open binary log file.
+
+        Starts again from zero when the file shrank (truncated) or its first bytes
+        don't match any more (rotated/replaced under the same name).
+        """
+        entry = self.files.get(os.path.abspath(log_file))
+        if not entry:
+            return 0
+        stat = os.fstat(file.fileno())
+        if stat.st_size < entry["offset"]:
+            print(f"{log_file} was truncated, parsing it again")
+            return 0
+        if read_head_hash(file, entry["head_length"]) != entry["head"]:
+            print(f"{log_file} was replaced, parsing it again")
+            return 0
+        return entry["offset"]
+
+    def is_unchanged(self, log_file):
+        """True if the file's size and mtime match the checkpoint and it was fully parsed.
+
+        A file that ends in a line without a newline isn't fully parsed, that line is read
+        once the file is finished with (see logsteamids.process_new_lines).
+        """
+        entry = self.files.get(os.path.abspath(log_file))
+        if not entry:
+            return False
+        try:
+            stat = os.stat(log_file)
+        except OSError:
+            return False
+        return stat.st_size == entry["size"] == entry["offset"] and stat.st_mtime_ns == entry["mtime_ns"]
+
+    def update(self, log_file, file, offset):
+        """Records that everything before offset in the open binary file has been parsed."""
+        position = file.tell()
+        stat = os.fstat(file.fileno())
+        head_length = min(HEAD_BYTES, offset)
+        self.files[os.path.abspath(log_file)] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "offset": offset,
+            "head_length": head_length,
+            "head": read_head_hash(file, head_length),
+        }
+        file.seek(position)
+
+    def prune(self, log_files):
+        """Forgets files that no longer exist."""
+        keep = {os.path.abspath(log_file) for log_file in log_files}
+        for path in list(self.files):
+            if path not in keep:
+                del self.files[path]
@@ -0,0 +1,68 @@
+import queue
+import tkinter as tk
+from datetime import datetime
+
+# DayZPrint types and the text tag each one is drawn with
+LEVEL_TAGS = {
+    "Info": "info",
+    "Success": "success",
+    "Warning": "warning",
+    "Error": "error",
+}
+DEFAULT_TAG = "default"
+
+
+class LogConsole:
+    """Log output for a Tk text widget that any thread can write to.
+
+    write() only puts the line on a queue. The Tk loop drains the queue every
+    interval_ms via after() and inserts the lines in batches. Only the last max_lines
+    lines are kept, and levels are hidden/shown by eliding their tag, so filtering
+    never re-renders the text.
+    """
+
+    def __init__(self, widget, max_lines=5000, batch_size=500, interval_ms=100):
+        self.widget = widget
+        self.max_lines = max_lines
+        self.batch_size = batch_size
+        self.interval_ms = interval_ms
+        self._queue = queue.SimpleQueue()
+        for tag in list(LEVEL_TAGS.values()) + [DEFAULT_TAG]:
+            widget.tag_configure(tag, elide=False)
+        widget.after(interval_ms, self._drain)
+
+    def write(self, type, message):
+        """Queues a log line, safe to call from any thread."""
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._queue.put((f"[{current_time}]: {message}\n", LEVEL_TAGS.get(type, DEFAULT_TAG)))
+
+    def set_level_visible(self, type, visible):
+        """Shows or hides every line of one DayZPrint type."""
+        self.widget.tag_configure(LEVEL_TAGS.get(type, DEFAULT_TAG), elide=not visible)
+
+    def _drain(self):
+        try:
+            items = []
+            while len(items) < self.batch_size * 2:
+                try:
+                    text, tag = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                items.extend((text, tag))
+            if items:
+                at_bottom = self.widget.yview()[1] >= 1.0
+                # One insert call for the whole batch, Tk takes alternating text, tag arguments
+                self.widget.insert(tk.END, *items)
+                self._trim()
+                if at_bottom:
+                    self.widget.see(tk.END)
+        except tk.TclError:
+            return  # The window is being destroyed
+        # Come back straight away if there's still a backlog
+        self.widget.after(1 if not self._queue.empty() else self.interval_ms, self._drain)
+
+    def _trim(self):
+        line_count = int(self.widget.index("end-1c").split(".")[0])
+        excess = line_count - self.max_lines
+        if excess > 0:
+            self.widget.delete("1.0", f"{excess + 1}.0")
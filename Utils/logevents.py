@@ -0,0 +1,103 @@
+import re
+import time
+import threading
+import metrics
+from dataclasses import dataclass
+
+# Topics published on the EventBus
+TOPIC_PLAYER = "player"  # PlayerSeen
+TOPIC_KILLFEED = "killfeed"  # killfeed.KillfeedEvent
+TOPIC_BATCH = "batch"  # LogBatch, after every batch of lines read from a log
+
+player_pattern = re.compile(r'Player "(.*?)" \(steamid=(\d+)\)')
+
+# Lines are counted once per batch in pump(), parse() only counts the lines that matched something
+lines_parsed = metrics.counter("log_lines_parsed_total", "Log lines parsed")
+player_lines = metrics.counter("log_player_lines_total", "Player \"...\" (steamid=...) lines seen")
+killfeed_events = metrics.counter("killfeed_events_total", "Killfeed lines matched, by rule", ["kind"])
+batch_seconds = metrics.histogram("log_batch_parse_seconds", "Time to parse and publish one batch of lines")
+
+
+@dataclass(frozen=True)
+class PlayerSeen:
+    """A Player "..." (steamid=...) line."""
+    player_name: str
+    steam_id: str
+
+
+@dataclass(frozen=True)
+class LogBatch:
+    """Published after a batch of lines from one tailer has been parsed, tailer.offset is past all of them."""
+    tailer: object
+    line_count: int
+
+
+class EventBus:
+    """In-process publish/subscribe for parsed log events.
+
+    Callbacks run on the publishing thread, one publish at a time, so consumers don't
+    need their own locking. An exception in one consumer is printed and doesn't stop
+    the others from getting the event.
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.RLock()
+
+    def subscribe(self, topic, callback):
+        with self._lock:
+            self._subscribers.setdefault(topic, []).append(callback)
+
+    def unsubscribe(self, topic, callback):
+        with self._lock:
+            callbacks = self._subscribers.get(topic, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def publish(self, topic, event):
+        with self._lock:
+            for callback in self._subscribers.get(topic, ()):
+                try:
+                    callback(event)
+                except Exception as e:
+                    print(f"Error in {topic} consumer {getattr(callback, '__qualname__', callback)}: {e}")
+
+
+class LogParser:
+    """Parses every log line once and publishes what it finds on the bus."""
+
+    def __init__(self, bus, killfeed_classifier=None):
+        self.bus = bus
+        self.killfeed_classifier = killfeed_classifier
+
+    def parse(self, line):
+        if "(steamid=" in line:
+            match = player_pattern.search(line)
+            if match:
+                player_lines.inc()
+                self.bus.publish(TOPIC_PLAYER, PlayerSeen(*match.groups()))
+        if self.killfeed_classifier is not None:
+            event = self.killfeed_classifier.classify(line)
+            if event is not None:
+                killfeed_events.labels(event.kind).inc()
+                self.bus.publish(TOPIC_KILLFEED, event)
+
+    def pump(self, tailer, is_running):
+        """Feeds lines from a logtail.LogTailer through the parser until is_running() returns False."""
+        try:
+            while is_running():
+                try:
+                    lines = tailer.read_lines()
+                    if not lines:
+                        continue
+                    started = time.perf_counter()
+                    for line in lines:
+                        self.parse(line)
+                    self.bus.publish(TOPIC_BATCH, LogBatch(tailer, len(lines)))
+                    lines_parsed.inc(len(lines))
+                    batch_seconds.observe(time.perf_counter() - started)
+                except Exception as e:
+                    print(f"Error reading log file {tailer.path}: {e}")
+                    time.sleep(1)
+        finally:
+            tailer.close()
@@ -0,0 +1,153 @@
+import os
+import random
+import argparse
+
+# Synthetic DayZ logs for benchmarks.py, and for trying the log scripts without a server.
+#
+#   python Utils/loggen.py <output dir> [--files 3] [--lines 100000] [--players 500] [--seed 1]
+#
+# The lines look like the real thing: Player "..." (steamid=...) joins, every [Killfeed]
+# line killfeed.py knows (with and without a distance, clan tags, AI and bot names), noise
+# from the other mods, players that share a name and the " (2)" suffix DayZ gives the second
+# one online. The same seed always gives the same logs.
+
+FIRST_NAMES = ["Survivor", "Jay", "Alex", "Sam", "Chris", "Max", "Nova", "Ghost", "Viper", "Bandit", "Medic", "Hunter",
+               "Wolf", "Raven", "Echo", "Frost", "Blaze", "Shadow", "Zed", "Rook"]
+CLAN_TAGS = ["NWAF", "TDL", "BRG", "Raiders"]
+BOT_NAMES = ["AI Mirek", "AI Survivor (Raiders)", "NPC Trader", "Bot Patrol"]
+WEAPONS = ["M4-A1", "KA-M", "Mosin 91/30", "SVD", "Blaze", "Sporter 22", "FX-45", "Longhorn", "Combat Knife", "Fists"]
+
+# One template per killfeed.KILLFEED_RULES entry, {victim}/{killer}/{weapon}/{distance}/{ai}/{tag} filled in per line
+KILLFEED_TEMPLATES = {
+    "bear": "[Killfeed] {victim} got mauled to death by a Brown Bear.",
+    "infected": "[Killfeed] [{tag}] {victim} got killed by an Infected.",
+    "bled_out": "[Killfeed] {victim} bled out.",
+    "beaten_by_ai": "[Killfeed] {victim} got beaten to a pulp by {ai} with Fists.",
+    "ai_beaten_by_ai": "[Killfeed] {ai} got beaten to a pulp by {ai} with Fists.",
+    "killed_with_weapon": "[Killfeed] {victim} got killed by {killer} with {weapon} from a distance of {distance} m.",
+    "killed_with_weapon_close": "[Killfeed] {victim} got killed by {killer} with {weapon}.",
+    "killed_by": "[Killfeed] {victim} got killed by {killer} with {weapon}",
+    "died": "[Killfeed] {victim} got killed.",
+    "fell": "[Killfeed] {victim} fell to their death.",
+    "chemical": "[Killfeed] {victim} died from Chemical Poisoning.",
+}
+NOISE_TEMPLATES = [
+    '[Expansion Quests] Player "{victim}" (id={uid}=) quest {number} updated',
+    "[AI] Mirek patrol moved to {x}, 0, {z}",
+    '[Market] Player "{victim}" (id={uid}= pos=<{x}, 20.0, {z}>) sold {weapon} for {number}',
+    "[Vehicle] OffroadHatchback engine started at <{x}, 20.0, {z}>",
+    "[Territory] Flag at <{x}, 120.5, {z}> refreshed",
+    "[BaseBuilding] Player \"{victim}\" built Wall at <{x}, 40.2, {z}>",
+    "[CE] Loot respawn: {number} items",
+]
+
+
+class LogGenerator:
+    """Makes up a roster of players and writes log lines about them."""
+
+    def __init__(self, players=200, seed=1, collision_ratio=0.1):
+        self.rng = random.Random(seed)
+        self.roster = []  # (name, steam_id), some names more than once
+        for index in range(players):
+            steam_id = str(76561198000000000 + index * 7919)
+            if self.roster and self.rng.random() < collision_ratio:
+                name = self.rng.choice(self.roster)[0]  # Someone else already plays as this
+            elif index < len(FIRST_NAMES):
+                name = FIRST_NAMES[index]
+            else:
+                name = f"{self.rng.choice(FIRST_NAMES)}{self.rng.randint(1, 9999)}"
+            self.roster.append((name, steam_id))
+        self.name_counts = {}
+        for name, _ in self.roster:
+            self.name_counts[name] = self.name_counts.get(name, 0) + 1
+        self.clock = 0  # Seconds since midnight of the made up day
+
+    def player(self):
+        return self.rng.choice(self.roster)
+
+    def online_name(self, name):
+        """The name as the server shows it, the second player online with a taken name gets " (2)"."""
+        if self.name_counts[name] > 1 and self.rng.random() < 0.5:
+            return f"{name} ({self.rng.randint(2, self.name_counts[name])})"
+        return name
+
+    def timestamp(self):
+        self.clock = (self.clock + self.rng.choice((0, 0, 0, 1))) % 86400
+        return f"{self.clock // 3600:02d}:{self.clock // 60 % 60:02d}:{self.clock % 60:02d}.{self.rng.randint(0, 999):03d}"
+
+    def join_line(self, player=None):
+        name, steam_id = player or self.player()
+        return f'{self.timestamp()} [Login] Player "{self.online_name(name)}" (steamid={steam_id}) connected'
+
+    def killfeed_line(self, kind=None, victim=None):
+        kind = kind or self.rng.choice(list(KILLFEED_TEMPLATES))
+        if victim is None:
+            victim = self.online_name(self.player()[0])
+            if self.rng.random() < 0.05:
+                victim = self.rng.choice(BOT_NAMES)
+            elif self.rng.random() < 0.1:
+                victim = f"[{self.rng.choice(CLAN_TAGS)}] {victim}"
+        return f"{self.timestamp()} " + KILLFEED_TEMPLATES[kind].format(
+            victim=victim,
+            killer=self.online_name(self.player()[0]),
+            weapon=self.rng.choice(WEAPONS),
+            distance=self.rng.randint(1, 900),
+            ai=self.rng.choice(BOT_NAMES[:2]),
+            tag=self.rng.choice(CLAN_TAGS),
+        )
+
+    def noise_line(self):
+        return f"{self.timestamp()} " + self.rng.choice(NOISE_TEMPLATES).format(
+            victim=self.player()[0],
+            uid="".join(self.rng.choice("abcdefABCDEF0123456789") for _ in range(12)),
+            weapon=self.rng.choice(WEAPONS),
+            number=self.rng.randint(1, 5000),
+            x=f"{self.rng.uniform(0, 15360):.1f}",
+            z=f"{self.rng.uniform(0, 15360):.1f}",
+        )
+
+    def line(self, join_ratio=0.01, killfeed_ratio=0.02):
+        roll = self.rng.random()
+        if roll < join_ratio:
+            return self.join_line()
+        if roll < join_ratio + killfeed_ratio:
+            return self.killfeed_line()
+        return self.noise_line()
+
+    def lines(self, count, join_ratio=0.01, killfeed_ratio=0.02):
+        for _ in range(count):
+            yield self.line(join_ratio, killfeed_ratio)
+
+    def all_joins(self):
+        """Every player on the roster joining once, so every Steam ID is in the logs at least once."""
+        return [self.join_line(player) for player in self.roster]
+
+
+def write_log_files(log_dir, generator, files=1, lines_per_file=10000, join_ratio=0.01, killfeed_ratio=0.02):
+    """Writes files logs of lines_per_file lines each into log_dir, oldest first, returns their paths."""
+    os.makedirs(log_dir, exist_ok=True)
+    paths = []
+    for index in range(files):
+        path = os.path.join(log_dir, f"ExpansionMod_{index:03d}.log")
+        with open(path, "w", encoding="utf-8", newline="\n") as file:
+            if index == 0:
+                file.write("\n".join(generator.all_joins()) + "\n")
+            for line in generator.lines(lines_per_file, join_ratio, killfeed_ratio):
+                file.write(line + "\n")
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic DayZ logs")
+    parser.add_argument("output_dir")
+    parser.add_argument("--files", type=int, default=3)
+    parser.add_argument("--lines", type=int, default=100000, help="lines per file")
+    parser.add_argument("--players", type=int, default=500)
+    parser.add_argument("--join-ratio", type=float, default=0.01)
+    parser.add_argument("--killfeed-ratio", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    paths = write_log_files(args.output_dir, LogGenerator(args.players, args.seed), args.files, args.lines, args.join_ratio, args.killfeed_ratio)
+    size = sum(os.path.getsize(path) for path in paths)
+    print(f"Wrote {len(paths)} log files, {size / 1024 / 1024:.1f} MB, to {args.output_dir}")
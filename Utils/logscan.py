@@ -0,0 +1,83 @@
+import os
+import re
+import mmap
+from concurrent.futures import ProcessPoolExecutor
+
+# Same pattern as logsteamids.extract_player_info, but run over raw bytes
+player_pattern = re.compile(rb'Player "(.*?)" \(steamid=(\d+)\)')
+
+CHUNK_SIZE = 64 * 1024 * 1024  # Big files get split into chunks of about this size
+PARALLEL_THRESHOLD = 32 * 1024 * 1024  # Below this much data a process pool costs more than it saves
+
+
+def split_chunks(log_file, chunk_size=CHUNK_SIZE):
+    """Splits a log file into (path, start, end) chunks that begin and end on line boundaries.
+
+    The last chunk stops after the last complete line, so a line that's still being
+    written is left alone.
+    """
+    size = os.path.getsize(log_file)
+    if size == 0:
+        return []
+    chunks = []
+    with open(log_file, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        end_of_lines = data.rfind(b"\n") + 1
+        start = 0
+        while start < end_of_lines:
+            end = min(start + chunk_size, end_of_lines)
+            if end < end_of_lines:
+                end = data.find(b"\n", end - 1) + 1
+            chunks.append((log_file, start, end))
+            start = end
+    return chunks
+
+
+def scan_chunk(chunk):
+    """Scans one chunk for player joins and returns a summary of them.
+
+    The summary is {steam_id: [latest name, names in order seen, times seen]} in the
+    order the Steam IDs first appear, which is all a merge needs to give the same
+    result as recording every line one by one.
+    """
+    log_file, start, end = chunk
+    summary = {}
+    with open(log_file, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        position = start
+        while position < end:
+            match = player_pattern.search(data, position, end)
+            if not match:
+                break
+            player_name = match.group(1).decode('utf-8', errors='replace')
+            steam_id = match.group(2).decode('ascii')
+            entry = summary.get(steam_id)
+            if entry is None:
+                summary[steam_id] = [player_name, [player_name], 1]
+            else:
+                entry[0] = player_name
+                if player_name not in entry[1]:
+                    entry[1].append(player_name)
+                entry[2] += 1
+            # Only the first player on a line counts, same as re.search per line
+            next_line = data.find(b"\n", match.end(), end)
+            if next_line < 0:
+                break
+            position = next_line + 1
+    return chunk, summary
+
+
+def scan_log_files(log_files, workers=None, chunk_size=CHUNK_SIZE):
+    """Scans log files, in parallel if there's enough data, and yields (chunk, summary) in file order."""
+    chunks = []
+    for log_file in log_files:
+        try:
+            chunks.extend(split_chunks(log_file, chunk_size))
+        except OSError as e:
+            print(f"Error reading {log_file}: {e}")
+    total_size = sum(end - start for _, start, end in chunks)
+    if total_size < PARALLEL_THRESHOLD or workers == 1 or len(chunks) < 2:
+        for chunk in chunks:
+            yield scan_chunk(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        # map hands results back in submission order, which keeps the merge deterministic
+        yield from executor.map(scan_chunk, chunks)
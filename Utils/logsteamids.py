@@ -1,8 +1,13 @@
 import re
 import time
 import os
-import json
+import sys
 from glob import glob
+from logcheckpoint import LogCheckpoint
+from steamstore import SteamIdStore
+from logscan import scan_log_files
+from logtail import LogTailer, CHUNK_SIZE, creation_time
+from logevents import EventBus, LogParser, TOPIC_PLAYER, TOPIC_BATCH
 RESET = "\033[0m"
 GREEN = "\033[92m"
 YELLOW = "\033[93m"
@@ -10,108 +15,173 @@ CYAN = "\033[96m"
 
 LOG_DIR = r"C:\DayZServer\resources\Profiles"  # Directory containing log files
 STEAM_ID_LOG_PATH = r"C:\DayZServer\resources\Utils\steam_ids.json"  # Path to your Steam ID JSON file
-
-def get_latest_log_file():
-    """Returns the latest log file from the specified directory."""
-    log_files = glob(os.path.join(LOG_DIR, '*.log'))  # Adjust the file extension if necessary
-    return max(log_files, key=os.path.getctime) if log_files else None
+CHECKPOINT_PATH = r"C:\DayZServer\resources\Utils\steam_ids_checkpoint.json"  # How far into each log file we've parsed
+COMPACT_INTERVAL = 60  # Seconds between folding the journal back into steam_ids.json
 
 def extract_player_info(log_line):
     """Extracts the player name and Steam ID from a log line."""
     match = re.search(r'Player "(.*?)" \(steamid=(\d+)\)', log_line)
     return match.groups() if match else None
 
-def update_steam_ids(steam_ids, duplicate_ids):
-    """Updates the Steam IDs JSON file."""
-    with open(STEAM_ID_LOG_PATH, 'w', encoding='utf-8') as file:
-        json.dump({"steam_ids": steam_ids, "duplicateSteamIDs": {k: list(v) for k, v in duplicate_ids.items()}}, file, indent=4)
+def open_store():
+    """Returns the Steam ID registry (steam_ids.json plus its journal), see steamstore.py."""
+    return SteamIdStore(STEAM_ID_LOG_PATH, compact_interval=COMPACT_INTERVAL)
+
+def merge_scan_summary(store, summary):
+    """Merges a logscan.scan_chunk summary, same result as recording every line in the chunk one by one."""
+    names, duplicates = store.names, store.duplicates
+    for steam_id, (player_name, player_names, times_seen) in summary.items():
+        if steam_id in names or times_seen > 1:
+            seen = duplicates.setdefault(steam_id, set())
+            if steam_id in names:
+                seen.add(names[steam_id])
+            seen.update(player_names)
+        names[steam_id] = player_name
+
+def record_players(data, store):
+    found = 0
+    for line in data.decode('utf-8', errors='replace').splitlines():
+        player_info = extract_player_info(line)
+        if player_info:
+            player_name, steam_id = player_info
+            store.record(player_name, steam_id, journal=False)
+            found += 1
+    return found
+
+def process_new_lines(file, offset, store, final=False, chunk_size=CHUNK_SIZE):
+    """Parses the complete lines after offset in an open binary file, chunk_size bytes at a time.
+
+    A partially written last line is left for next time, unless final says the file won't
+    be written any more (an older log, say after a crash). Returns the offset after the
+    last line parsed and how many players were found.
+    """
+    file.seek(offset)
+    end = offset
+    found = 0
+    buffer = b""
+    while True:
+        data = file.read(chunk_size)
+        if not data:
+            break
+        buffer += data
+        complete = buffer.rfind(b"\n") + 1
+        if complete:
+            found += record_players(buffer[:complete], store)
+            end += complete
+            buffer = buffer[complete:]
+    if final and buffer:
+        found += record_players(buffer, store)
+        end += len(buffer)
+    return end, found
+
+def rebuild_all_log_files(store, checkpoint, workers=None):
+    """Parses every log file from scratch, spread over a process pool, and rewrites the Steam IDs JSON file."""
+    store.clear()
+    log_files = sorted(glob(os.path.join(LOG_DIR, '*.log')))
+    file_ends = {}
+    start_time = time.perf_counter()
+    for (log_file, _, end), summary in scan_log_files(log_files, workers):
+        merge_scan_summary(store, summary)
+        file_ends[log_file] = end
+
+    checkpoint.reset()
+    for log_file in log_files:
+        try:
+            with open(log_file, 'rb') as file:
+                checkpoint.update(log_file, file, file_ends.get(log_file, 0))
+        except OSError as e:
+            print(f"Error reading {log_file}: {e}")
+    store.compact()
+    checkpoint.save()
+    print(f"Rebuilt Steam IDs from {len(log_files)} log files in {time.perf_counter() - start_time:.1f}s: {len(store)} players")
+    return store, checkpoint
 
 def process_all_log_files():
-    """Processes all log files to extract and update Steam IDs."""
-    steam_ids = {}  # To store player names and Steam IDs
-    duplicate_ids = {}  # To store duplicate Steam IDs and their player names
-    log_files = glob(os.path.join(LOG_DIR, '*.log'))  # Get all log files
+    """Processes new data in all log files to extract and update Steam IDs.
+
+    Only bytes that weren't parsed by a previous run are read, see logcheckpoint.py.
+    Returns the Steam ID store and checkpoint so monitoring can carry on from them.
+    """
+    store = open_store()
+    checkpoint = LogCheckpoint(CHECKPOINT_PATH)
+    if not checkpoint.files:
+        return rebuild_all_log_files(store, checkpoint)
+    try:
+        store.load()
+    except (OSError, ValueError, KeyError):
+        # Without the previous results the checkpoint is useless, start over
+        print(f"{YELLOW}Could not load {STEAM_ID_LOG_PATH}, parsing all log files again{RESET}")
+        return rebuild_all_log_files(store, checkpoint)
+    log_files = sorted(glob(os.path.join(LOG_DIR, '*.log')))  # Get all log files
+    newest = max(log_files, key=creation_time) if log_files else None  # The only one the server may still be writing
 
     for log_file in log_files:
+        if checkpoint.is_unchanged(log_file):
+            continue
         try:
-            with open(log_file, 'r', encoding='utf-8', errors='replace') as file:
-                for line in file:
-                    player_info = extract_player_info(line)
-                    if player_info:
-                        player_name, steam_id = player_info
-                        if steam_id in steam_ids:
-                            # Store the old entry in duplicate_ids using a set to avoid duplicates
-                            if steam_id not in duplicate_ids:
-                                duplicate_ids[steam_id] = set()
-                            duplicate_ids[steam_id].add(steam_ids[steam_id]["player_name"])  # Store the old player name
-                            duplicate_ids[steam_id].add(player_name)  # Add the new player name
-
-                            # Update with the latest entry
-                            steam_ids[steam_id] = {
-                                "player_name": player_name,
-                                "comment": "This player has a suffix" if "(2)" in player_name or "(3)" in player_name else ""
-                            }
-                        else:
-                            steam_ids[steam_id] = {
-                                "player_name": player_name,
-                                "comment": "This player has a suffix" if "(2)" in player_name or "(3)" in player_name else ""
-                            }
+            with open(log_file, 'rb') as file:
+                offset = checkpoint.start_offset(log_file, file)
+                end, _ = process_new_lines(file, offset, store, final=log_file != newest)
+                checkpoint.update(log_file, file, end)
         except Exception as e:
             print(f"Error reading {log_file}: {e}")
 
-    update_steam_ids(steam_ids, duplicate_ids)  # Update the JSON file with all found Steam IDs
-
-def monitor_log_file(log_file_path):
-    """Monitors the specified log file for new entries and updates Steam IDs."""
-    steam_ids = {}  # To store player names and Steam IDs
-    duplicate_ids = {}  # To store duplicate Steam IDs and their player names
-
+    checkpoint.prune(log_files)
+    store.compact()  # Only writes if something changed (or there's no steam_ids.json yet)
+    checkpoint.save()
+    return store, checkpoint
+
+class SteamIdConsumer:
+    """Keeps the Steam ID store and the checkpoint up to date from PlayerSeen events on a logevents.EventBus.
+
+    Joins go to the store's journal, the store compacts them into steam_ids.json in the background.
+    """
+
+    def __init__(self, store, checkpoint, tailer=None):
+        self.store = store
+        self.checkpoint = checkpoint
+        self.tailer = tailer  # The tailer whose position the checkpoint follows
+        self.found = 0
+
+    def subscribe(self, bus):
+        bus.subscribe(TOPIC_PLAYER, self.on_player)
+        bus.subscribe(TOPIC_BATCH, self.on_batch)
+
+    def on_player(self, event):
+        self.store.record(event.player_name, event.steam_id)
+        self.found += 1
+
+    def on_batch(self, batch):
+        if self.found:
+            self.store.flush()  # The journal has to be on disk before the checkpoint moves past these lines
+            print(f"Updated Steam IDs: {self.found} player(s) seen, {len(self.store)} total")
+            self.found = 0
+        if batch.tailer is self.tailer:
+            self.checkpoint.update(self.tailer.path, self.tailer.file, self.tailer.offset)
+            self.checkpoint.save()
+
+def create_tailer(checkpoint):
+    """Returns a tailer on the newest log that carries on from wherever the checkpoint got to."""
+    return LogTailer(LOG_DIR, '*.log', start_offset=checkpoint.start_offset, on_switch=checkpoint.update)
+
+def monitor_log_file(store, checkpoint):
+    """Monitors the newest log file for new entries and updates Steam IDs, following it across server restarts."""
+    bus = EventBus()
+    tailer = create_tailer(checkpoint)
+    SteamIdConsumer(store, checkpoint, tailer).subscribe(bus)
+    store.start_compactor()
     try:
-        with open(log_file_path, 'r', encoding='utf-8', errors='replace') as file:
-            # Move to the end of the file
-            file.seek(0, 2)
-
-            while True:
-                line = file.readline()
-                if not line:  # If no new line, wait a moment
-                    time.sleep(0.5)
-                    continue
-
-                player_info = extract_player_info(line)
-                if player_info:
-                    player_name, steam_id = player_info
-                    if steam_id in steam_ids:
-                        # Store the old entry in duplicate_ids using a set to avoid duplicates
-                        if steam_id not in duplicate_ids:
-                            duplicate_ids[steam_id] = set()
-                        duplicate_ids[steam_id].add(steam_ids[steam_id]["player_name"])  # Store the old player name
-                        duplicate_ids[steam_id].add(player_name)  # Add the new player name
-
-                        # Update with the latest entry
-                        steam_ids[steam_id] = {
-                            "player_name": player_name,
-                            "comment": "This player has a suffix" if "(2)" in player_name or "(3)" in player_name else ""
-                        }
-                    else:
-                        steam_ids[steam_id] = {
-                            "player_name": player_name,
-                            "comment": "This player has a suffix" if "(2)" in player_name or "(3)" in player_name else ""
-                        }
-                    
-                    update_steam_ids(steam_ids, duplicate_ids)  # Update the JSON file with current state
-                    print(f"Updated Steam ID: {player_name} -> {steam_id}")
-
-    except Exception as e:
-        print(f"Error monitoring {log_file_path}: {e}")
+        LogParser(bus).pump(tailer, lambda: True)
+    finally:
+        store.close()
 
 if __name__ == "__main__":
-    # Process all existing log files at startup
-    process_all_log_files()
-
-    latest_log_file = get_latest_log_file()
-    if latest_log_file:
-        print(f"{CYAN}Log Steam IDs Script Started{RESET}")
-        print(f"Monitoring log file: {latest_log_file}")
-        monitor_log_file(latest_log_file)
+    if "--rebuild" in sys.argv:
+        # Throw away the checkpoint and rebuild steam_ids.json from every log file
+        store, checkpoint = rebuild_all_log_files(open_store(), LogCheckpoint(CHECKPOINT_PATH))
     else:
-        print("No log files found.")
+        # Process any new data in the log files at startup
+        store, checkpoint = process_all_log_files()
+
+    print(f"{CYAN}Log Steam IDs Script Started{RESET}")
+    monitor_log_file(store, checkpoint)
@@ -0,0 +1,249 @@
+import os
+import sys
+import time
+import glob
+import struct
+import select
+import metrics
+
+CHUNK_SIZE = 256 * 1024  # How much we read from the log in one go
+ROTATION_CHECK_INTERVAL = 2.0  # How often we look for a newer log file even without a create event
+
+bytes_read = metrics.counter("log_bytes_read_total", "Bytes read from log files by the tailers")
+file_switches = metrics.counter("log_file_switches_total", "Times a tailer moved on to a newer log file")
+
+
+class PollWatcher:
+    """Fallback for when inotify isn't available, just sleeps."""
+
+    def wait(self, timeout):
+        """Returns None, polling can't tell whether a new file was created."""
+        time.sleep(timeout)
+        return None
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Wakes up as soon as something in a directory is written to or created (Linux only)."""
+
+    IN_MODIFY = 0x00000002
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_NONBLOCK = 0x00000800
+    IN_CLOEXEC = 0x00080000
+
+    def __init__(self, directory):
+        import ctypes
+        import ctypes.util
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_MODIFY | self.IN_CREATE | self.IN_MOVED_TO
+        if self._libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout):
+        """Waits for directory activity, returns True if a file was created or moved in."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        created = False
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        position = 0
+        while position + 16 <= len(data):
+            _, mask, _, name_length = struct.unpack_from("iIII", data, position)
+            if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                created = True
+            position += 16 + name_length
+        return created
+
+    def close(self):
+        os.close(self.fd)
+
+
+def creation_time(path):
+    """When path was created, as well as we can tell.
+
+    Birth time where the platform has it (st_ctime is the creation time on Windows), the
+    last write anywhere else. Never st_ctime on Linux, that changes with every write.
+    """
+    stat = os.stat(path)
+    birth = getattr(stat, "st_birthtime", None)
+    if birth:
+        return birth
+    return stat.st_ctime if os.name == "nt" else stat.st_mtime
+
+
+def create_watcher(directory):
+    """Returns an inotify watcher on Linux, or a polling one anywhere else (or if inotify fails)."""
+    if sys.platform.startswith("linux") and os.path.isdir(directory):
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError) as e:
+            print(f"inotify not available, polling {directory} instead: {e}")
+    return PollWatcher()
+
+
+class LogTailer:
+    """Follows the newest log file in a directory.
+
+    Reads in large chunks and splits lines itself. When DayZ starts a new log after a
+    restart, the rest of the old file is read first and then the tailer moves over to
+    the new one from its beginning. A file that gets truncated is read again from the start.
+
+    Only a file that shows up after the current one counts as newer, so two logs being
+    written at the same time don't make it flip between them, and it never goes back to
+    a file it has left.
+
+    start_offset(path, binary_file) picks where to start reading a file. By default files
+    that were already there when the tailer was made are read from their end and files
+    created after that from the beginning. on_switch(path, binary_file, offset) is called
+    with the final position in the old file just before moving on.
+    """
+
+    def __init__(self, log_dir, pattern="*.log", start_offset=None, on_switch=None, poll_interval=0.25, chunk_size=CHUNK_SIZE):
+        self.log_dir = log_dir
+        self.pattern = pattern
+        self.poll_interval = poll_interval
+        self.chunk_size = chunk_size
+        self._start_offset = start_offset
+        self._on_switch = on_switch
+        self._existing = set(self._log_files())  # Already there when we started, read from their end
+        self._known = set(self._existing)
+        self._left = set()  # Files we've moved on from, never to go back to
+        self._watcher = create_watcher(log_dir)
+        self._last_rotation_check = 0.0
+        self._buffer = b""
+        self.path = None
+        self.file = None
+        self.offset = 0  # Byte offset just after the last complete line handed out
+
+    def _log_files(self):
+        return glob.glob(os.path.join(self.log_dir, self.pattern))
+
+    def _newest(self, paths):
+        newest, newest_time = None, None
+        for path in paths:
+            try:
+                created = creation_time(path)
+            except OSError:
+                continue  # Deleted since the glob
+            if newest is None or created > newest_time:
+                newest, newest_time = path, created
+        return newest
+
+    def newest_log_file(self):
+        """The file to follow: the current one unless a file has been created since, the newest of those if so."""
+        log_files = [path for path in self._log_files() if path not in self._left]
+        new_files = [path for path in log_files if path not in self._known]
+        self._known.update(log_files)
+        if self.path is None:
+            return self._newest(log_files)
+        return self._newest(new_files) or self.path
+
+    def _open(self, path):
+        self._close_file()
+        try:
+            self.file = open(path, 'rb')
+        except OSError as e:
+            print(f"Error opening {path}: {e}")
+            return
+        self.path = path
+        if self._start_offset:
+            self.offset = self._start_offset(path, self.file)
+        elif path in self._existing:
+            self.offset = os.fstat(self.file.fileno()).st_size
+        else:
+            self.offset = 0
+        self.file.seek(self.offset)
+        self._buffer = b""
+        print(f"Tailing log file: {path}")
+
+    def _close_file(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def close(self):
+        self._close_file()
+        self._watcher.close()
+
+    def _split(self, data, final=False):
+        """Adds data to the buffer and returns the complete lines in it."""
+        self._buffer += data
+        end = self._buffer.rfind(b"\n") + 1
+        if final:
+            end = len(self._buffer)
+        if not end:
+            return []
+        complete, self._buffer = self._buffer[:end], self._buffer[end:]
+        self.offset += end
+        return complete.decode('utf-8', errors='replace').splitlines()
+
+    def _read_available(self, final=False):
+        lines = []
+        while True:
+            data = self.file.read(self.chunk_size)
+            if not data:
+                break
+            bytes_read.inc(len(data))
+            lines.extend(self._split(data))
+        if final and self._buffer:
+            # The old log won't be written any more so its unterminated last line is complete
+            lines.extend(self._split(b"", final=True))
+        return lines
+
+    def _check_rotation(self):
+        """Switches to a newer log file, returning whatever was left unread in the old one."""
+        self._last_rotation_check = time.monotonic()
+        newest = self.newest_log_file()
+        if newest is None or newest == self.path:
+            return []
+        lines = []
+        if self.file:
+            lines = self._read_available(final=True)
+            if self._on_switch:
+                self._on_switch(self.path, self.file, self.offset)
+            file_switches.inc()
+            self._left.add(self.path)
+        self._open(newest)
+        return lines
+
+    def read_lines(self, timeout=1.0):
+        """Returns new complete lines, waiting up to timeout for some to show up."""
+        if self.file is None:
+            lines = self._check_rotation()
+            if self.file is None:
+                self._watcher.wait(timeout)
+                return lines
+        deadline = time.monotonic() + timeout
+        while True:
+            lines = self._read_available()
+            if os.fstat(self.file.fileno()).st_size < self.offset + len(self._buffer):
+                print(f"{self.path} was truncated, reading it from the start")
+                self.file.seek(0)
+                self.offset = 0
+                self._buffer = b""
+                lines.extend(self._read_available())
+            if time.monotonic() - self._last_rotation_check >= ROTATION_CHECK_INTERVAL:
+                lines.extend(self._check_rotation())
+            if lines:
+                return lines
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return lines
+            if isinstance(self._watcher, PollWatcher):
+                remaining = min(remaining, self.poll_interval)
+            created = self._watcher.wait(remaining)
+            if created:
+                lines = self._check_rotation()
+                if lines:
+                    return lines
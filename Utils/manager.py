@@ -0,0 +1,500 @@
+import os
+import sys
+import json
+import time
+import threading
+import subprocess
+import metrics
+from collections import deque
+from modmanifest import ModManifest, describe_changes
+from readiness import ReadinessProbe, record_boot_time
+from supervisor import ServerSupervisor
+from launchplan import prepare_launch, DEFAULT_MAX_MEM
+from healthmonitor import HealthMonitor, FPS_PATTERN, FREEZE_PATTERN
+from procsampler import ProcessSampler, check_for_leak, available_memory, resolve_max_mem, MB
+from scheduler import RestartScheduler
+from genmods import generate_mods
+from instances import InstanceManager, set_process_affinity
+from dzsaquery import shared_client, query_url
+from a2s import shared_client as a2s_client
+
+# The server manager without any GUI: config, mod generation, start/stop/restart, crash
+# supervision, scheduled restarts and the DZSA Launcher update. start.py (the Tk window)
+# and daemon.py (headless, with a local control API) are both just front ends for it.
+# rcon is imported where it's used, and dzsaquery.py only imports requests on the first
+# query; neither is needed to get the server started.
+
+CONFIG_PATH = 'Utils/config.json'
+LOG_HISTORY = 2000  # Log lines kept for clients that ask for recent output
+
+
+def load_config(config_path=CONFIG_PATH):
+    """Reads config.json, raises OSError or json.JSONDecodeError if it can't."""
+    with open(config_path, 'r') as config_file:
+        return json.load(config_file)
+
+
+class ServerManager:
+    """Everything that runs the DayZ server(s), driven by the GUI, the daemon or a script.
+
+    log(type, message) goes to every listener added with add_listener (the GUI's log box,
+    the daemon's console) and is kept for recent_logs(). Methods are safe to call from any
+    thread, start/stop/restart are serialised by a lock.
+    """
+
+    def __init__(self, config, config_path=CONFIG_PATH):
+        self.config = config
+        self.config_path = config_path
+        self.server_name = config["server_name"]
+        self.server_endpoint = config["server_endpoint"]
+        self.server_port = config["server_port"]
+        self.dzsa_query_port = config["dzsa_query_port"]
+        self.prefix_directory = config["prefix_directory"]
+        self.server_dir = config["server_dir"]
+        self.server_config_dir = config["server_config_dir"]
+        self.mods_txt_dir = config["mods_txt_dir"]
+        self.cpu_cores = config["cpu_cores"]
+        self.auto_start = config["auto_start"]
+        self.log_steam_ids_active = config.get("log_steam_ids_active", False)
+        self.killfeed_script_active = config.get("killfeed_script_active", False)
+        self.ingest_script_dir = config.get("ingest_script_dir", "Utils/ingest.py")
+        self.mods_dir = config.get("mods_dir", ".")
+        self.mod_manifest_path = config.get("mod_manifest_path", "Utils/mod_manifest.json")
+        self.mod_hash_workers = config.get("mod_hash_workers")
+        self.rpt_dir = config.get("rpt_dir", "Profiles")
+        self.ready_markers = config.get("ready_markers")
+        self.ready_timeout = config.get("ready_timeout", 300)
+        self.ready_probe_query_port = config.get("ready_probe_query_port", True)
+        self.boot_times_path = config.get("boot_times_path", "Utils/boot_times.jsonl")
+        self.rcon_host = config.get("rcon_host", "")
+        self.rcon_port = config.get("rcon_port", 0)
+        self.rcon_password = config.get("rcon_password", "")
+        self.cpu_affinity = config.get("cpu_affinity", [])
+        self.dzsa_query_endpoint = query_url(self.server_endpoint, self.dzsa_query_port)
+        self.player_count_source = config.get("player_count_source", "a2s")
+        self.a2s_address = (config.get("a2s_query_host") or self.server_endpoint or "127.0.0.1", self.dzsa_query_port)
+        self.metrics_active = config.get("metrics_active", False)
+        self.metrics_host = config.get("metrics_host", "127.0.0.1")
+        self.metrics_port = config.get("metrics_port", metrics.DEFAULT_PORT)
+        self.metrics_server = None
+        self.launch_max_mem = DEFAULT_MAX_MEM
+        self.max_mem = config.get("max_mem", DEFAULT_MAX_MEM)  # MB, or "auto" to go by the memory history
+        self.memory_history_path = config.get("memory_history_path", "Utils/memory_history.jsonl")
+        self.resource_sampling_active = config.get("resource_sampling_active", True)
+        self.leak_window_minutes = config.get("leak_window_minutes", 30)
+        self.leak_growth_mb_per_hour = config.get("leak_growth_mb_per_hour", 300)
+        self.leak_restart_active = config.get("leak_restart_active", False)
+        self.leak_restart_lead_minutes = config.get("leak_restart_lead_minutes", 30)
+        self.health_monitor_active = config.get("health_monitor_active", True)
+        self.health_discord_alerts = config.get("health_discord_alerts", False)
+        self.health_restart_active = config.get("health_restart_active", False)
+        self.health_restart_minutes = config.get("health_restart_minutes", 5)
+        self.webhook_url = config.get("webhook_url", "")
+        self.alert_dispatcher = None
+
+        self.server_process = None
+        self.server_started_at = None
+        self.mod_list = []
+        self.processes = []  # Helper processes (log ingest) to close with the server
+        self.last_plan = None
+        self._listeners = []
+        self._log_lines = deque(maxlen=LOG_HISTORY)
+        self._log_sequence = 0
+        self._log_lock = threading.Lock()
+        self._lock = threading.RLock()
+        self._leak_warned = None  # pid of the run we've already warned about
+        self._leak_restarting = None
+
+        # Restarts the server as soon as it exits unless it was stopped on purpose, see supervisor.py
+        self.supervisor = ServerSupervisor(
+            self._restart_crashed_server,
+            wait_ready=self.wait_for_server_ready,
+            on_ready=self.update_dzsa_launcher,
+            log=self.log,
+            history_path=config.get("run_history_path", "Utils/run_history.jsonl"),
+            backoff=config.get("restart_backoff", [0, 5, 15, 30, 60]),
+            stable_uptime=config.get("restart_stable_seconds", 600),
+            max_crashes=config.get("crash_loop_max_crashes", 5),
+            window_minutes=config.get("crash_loop_window_minutes", 10),
+        )
+        # The servers from the instances list, if there is one, see instances.py
+        self.instance_manager = None
+        if config.get("instances"):
+            self.instance_manager = InstanceManager(config, self.log, on_ready=lambda instance: self.update_dzsa_launcher(instance.query_endpoint()))
+        # Scheduled restarts, see scheduler.py
+        self.restart_scheduler = RestartScheduler(
+            config.get("restart_schedule", []),
+            self.restart,
+            prepare=self.prepare_server_launch,
+            get_player_count=self.get_player_count,
+            announce=self.announce_in_game,
+            log=self.log,
+            warning_minutes=config.get("restart_warning_minutes", [15, 5, 1]),
+            wait_for_players=config.get("restart_wait_for_players", False),
+            player_threshold=config.get("restart_player_threshold", 0),
+            max_delay_minutes=config.get("restart_max_delay_minutes", 60),
+        )
+        # CPU, memory, threads and handles of the server process, see procsampler.py
+        self.sampler = ProcessSampler(
+            self._sampled_pid,
+            interval=config.get("resource_sample_interval", 5),
+            history=config.get("resource_history_samples", 720),
+            history_path=self.memory_history_path,
+            on_sample=self._check_memory,
+            log=self.log,
+        )
+        # Server FPS, freezes and a stalled RPT log, see healthmonitor.py
+        self.health_monitor = HealthMonitor(
+            self.rpt_dir,
+            self.is_running,
+            fps_threshold=config.get("health_fps_threshold", 10),
+            low_fps_seconds=config.get("health_low_fps_seconds", 180),
+            stall_seconds=config.get("health_stall_seconds", 300),
+            fps_pattern=config.get("health_fps_pattern", FPS_PATTERN),
+            freeze_pattern=config.get("health_freeze_pattern", FREEZE_PATTERN),
+            log=self.log,
+            alert=self.send_discord_alert if self.health_discord_alerts else None,
+            on_unhealthy=self._server_unhealthy,
+        )
+
+    # Logging
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def log(self, type, message):
+        with self._log_lock:
+            self._log_sequence += 1
+            self._log_lines.append({"seq": self._log_sequence, "time": time.time(), "type": type, "message": message})
+        for listener in list(self._listeners):
+            try:
+                listener(type, message)
+            except Exception as e:
+                print(f"Log listener failed: {e}")
+        if not self._listeners:
+            print(f"{type}: {message}")
+
+    def recent_logs(self, since=0):
+        """Log lines with a sequence number above since."""
+        with self._log_lock:
+            return [line for line in self._log_lines if line["seq"] > since]
+
+    # Mods
+
+    def init(self):
+        os.chdir(self.server_dir)
+
+    def read_mods(self):
+        with open(self.mods_txt_dir, "r") as value:
+            self.mod_list = [line.strip() for line in value if line.strip()]
+        return self.mod_list
+
+    def run_genmods(self):
+        """Writes mods.txt and syncs keys in this process, see genmods.py"""
+        # genmods.py used to run with the server directory as its working directory
+        return generate_mods(dict(self.config, mods_dir=os.path.join(self.server_dir, self.mods_dir)))
+
+    def generate_mods(self):
+        self.log("Info", "Generating mods...")
+        self.run_genmods()
+        self.log("Success", "Mods generated successfully.")
+
+    def check_mods(self):
+        """Fingerprints the mods and reports anything added, removed or updated since the last boot, see modmanifest.py"""
+        changes = ModManifest(self.mod_manifest_path, self.mods_dir, self.mod_hash_workers).scan(self.mod_list)
+        for type, message in describe_changes(changes):
+            self.log(type, message)
+
+    def prepare_server_launch(self):
+        """Generates the mods and builds the launch command ahead of time, safe while the server is still up, see launchplan.py"""
+        self.run_genmods()
+        self.read_mods()
+        try:
+            self.check_mods()
+        except Exception as e:
+            self.log("Warning", f"Could not check the mods for changes: {e}")
+        plan = prepare_launch(self.server_dir, self.mod_list, self.mods_dir, self.server_config_dir, self.server_port, self.cpu_cores, self.resolve_max_mem())
+        for warning in plan.warnings:
+            self.log("Warning", warning)
+        for error in plan.errors:
+            self.log("Error", error)
+        self.last_plan = plan
+        return plan
+
+    # Helper processes
+
+    def run_log_ingest(self):
+        """One process tails the logs for both the killfeed and the Steam ID logging, see ingest.py"""
+        if os.name == "nt":
+            process = subprocess.Popen("start cmd /k python " + self.ingest_script_dir, cwd=self.server_dir, shell=True)
+        else:
+            process = subprocess.Popen([sys.executable, self.ingest_script_dir], cwd=self.server_dir)
+        self.processes.append(process)
+
+    def start_helpers(self):
+        if self.killfeed_script_active or self.log_steam_ids_active:
+            self.run_log_ingest()
+        if self.metrics_active:
+            self.start_metrics()
+        if self.resource_sampling_active:
+            self.sampler.start()
+        if self.health_monitor_active and not self.instance_manager:
+            self.health_monitor.start()
+
+    def start_metrics(self):
+        """Serves the manager's metrics for Prometheus on metrics_port, see metrics.py"""
+        if self.metrics_server:
+            return
+        metrics.gauge("server_up", "1 while the server (or any instance) is running").set_function(lambda: int(self.is_running()))
+        metrics.gauge("server_uptime_seconds", "Seconds since the server was started, 0 while it's down").set_function(self.uptime)
+        metrics.gauge("server_mods", "Mods the server was started with").set_function(lambda: len(self.mod_list))
+        metrics.gauge("server_rss_bytes", "Resident memory of the server process").set_function(lambda: self.sampler.latest().rss)
+        metrics.gauge("server_cpu_percent", "CPU use of the server process, 100 per core").set_function(lambda: self.sampler.latest().cpu)
+        metrics.gauge("server_threads", "Threads in the server process").set_function(lambda: self.sampler.latest().threads)
+        metrics.gauge("server_handles", "Open handles (file descriptors) of the server process").set_function(lambda: self.sampler.latest().handles)
+        if self.instance_manager:
+            metrics.gauge("instances_running", "Instances that are running").set_function(
+                lambda: sum(1 for instance in self.instance_manager if instance.is_running()))
+        try:
+            self.metrics_server = metrics.start_metrics_server(self.metrics_host, self.metrics_port)
+        except OSError as e:
+            self.log("Warning", f"Could not serve metrics on {self.metrics_host}:{self.metrics_port}: {e}")
+            return
+        self.log("Info", f"Metrics on http://{self.metrics_host}:{self.metrics_port}/metrics")
+
+    # Resource sampling
+
+    def resolve_max_mem(self):
+        """The -maxMem for the next launch, kept in launch_max_mem for the leak check."""
+        self.launch_max_mem = resolve_max_mem(self.max_mem, self.memory_history_path, self.log)
+        return self.launch_max_mem
+
+    def _sampled_pid(self):
+        process = self.server_process
+        return process.pid if process is not None and process.poll() is None else None
+
+    def _check_memory(self, sample):
+        """Warns once a run when RSS keeps climbing, and restarts ahead of running out if leak_restart_active."""
+        pid = self.sampler.pid
+        limit = self.launch_max_mem * MB
+        available = available_memory()
+        if available is not None:
+            limit = min(limit, sample.rss + available)
+        check = check_for_leak(self.sampler.samples(), self.leak_window_minutes * 60, self.leak_growth_mb_per_hour, limit)
+        if check is None or not check.growing:
+            return
+        if self._leak_warned != pid:
+            self._leak_warned = pid
+            self.log("Warning", f"Server memory is climbing {check.mb_per_hour:.0f} MB/hour, about {check.minutes_to_limit:.0f} minutes until it runs out")
+        if self.leak_restart_active and self._leak_restarting != pid and check.minutes_to_limit <= self.leak_restart_lead_minutes:
+            self._leak_restarting = pid
+            minutes = min(5, max(1, int(check.minutes_to_limit // 2)))
+            self.restart_scheduler.restart_soon(minutes, f"memory is running out ({sample.rss / MB:.0f} MB and climbing)")
+
+    # Server health
+
+    def send_discord_alert(self, message):
+        """Posts message to the Discord webhook from webhook_url, see webhook.py"""
+        if self.alert_dispatcher is None:
+            from webhook import WebhookDispatcher  # Only needed once there's something to send
+            self.alert_dispatcher = WebhookDispatcher(self.webhook_url)
+            self.alert_dispatcher.start()
+        self.alert_dispatcher.submit(f"**{self.server_name}**: {message}")
+
+    def _server_unhealthy(self, reason, message):
+        if self.health_restart_active:
+            self.restart_scheduler.restart_soon(self.health_restart_minutes, message)
+
+    def close_all_processes(self):
+        for proc in self.processes:
+            if proc.poll() is None:  # Check if the process is still running
+                proc.terminate()  # Gracefully terminate the process
+                proc.wait()  # Wait for the process to terminate
+
+    # DZSA Launcher
+
+    def wait_for_server_ready(self):
+        """Waits until the server has finished booting (ready marker in the RPT or an answer on the query port), see readiness.py"""
+        process = self.server_process
+        started_at = self.server_started_at
+        query_address = self.a2s_address if self.ready_probe_query_port else None
+        probe = ReadinessProbe(self.rpt_dir, started_at, query_address, self.ready_markers)
+        ready = probe.wait(self.ready_timeout, is_alive=lambda: process is not None and process.poll() is None)
+        try:
+            record_boot_time(self.boot_times_path, started_at, probe.elapsed() if ready else None, probe.method, self.mod_list)
+        except OSError as e:
+            self.log("Warning", f"Could not record the boot time: {e}")
+        if ready:
+            self.log("Success", f"Server ready after {probe.elapsed():.0f}s")
+        elif probe.method == "exited":
+            self.log("Error", "Server exited before it finished booting")
+        else:
+            self.log("Warning", f"Server not ready after {self.ready_timeout}s, updating DZSA Launcher anyway")
+        return ready or probe.method == "timeout"
+
+    def query_server(self):
+        """Waits until the server is ready then queries DZSA launcher so that it updates to the launcher and all clients"""
+        if not self.wait_for_server_ready():
+            return ""
+        return self.update_dzsa_launcher()
+
+    def update_dzsa_launcher(self, query_endpoint=None):
+        """Queries DZSA until it knows about the server, which updates it in the launcher for all clients, see dzsaquery.py"""
+        self.log("Info", "Updating DZSA Launcher")
+        result = shared_client().update_launcher(query_endpoint or self.dzsa_query_endpoint, log=self.log)
+        if not result.ok:
+            return ""
+        self.log("Info", "DZSA Launcher Update Successful")
+        return result.text
+
+    def get_player_count(self):
+        """Players online from the server's query port (A2S), or the DZSA Launcher if that doesn't answer. None if neither knows."""
+        if self.player_count_source == "a2s":
+            player_count = a2s_client(self.a2s_address).player_count()
+            if player_count is not None:
+                return player_count
+        return shared_client().player_count(self.dzsa_query_endpoint)
+
+    def announce_in_game(self, message):
+        """In-game message to every player over BattlEye RCon, if it's configured."""
+        if self.rcon_port and self.rcon_password:
+            from rcon import say_all
+            say_all(self.rcon_host or "127.0.0.1", self.rcon_port, self.rcon_password, message)
+
+    # Server process
+
+    def start_server(self, plan=None):
+        """Starts the server process, from a prepared plan or from the current mods.txt."""
+        if plan is None:
+            self.read_mods()
+            plan = prepare_launch(self.server_dir, self.mod_list, self.mods_dir, self.server_config_dir, self.server_port, self.cpu_cores, self.resolve_max_mem())
+        self.mod_list = plan.mod_list
+        self.server_started_at = time.time()
+        process = subprocess.Popen(plan.command, cwd=self.server_dir)
+        if self.cpu_affinity:
+            try:
+                set_process_affinity(process.pid, self.cpu_affinity)
+            except OSError as e:
+                self.log("Warning", f"Could not pin the server to CPUs {self.cpu_affinity}: {e}")
+        self.server_process = process
+        return process
+
+    def _restart_crashed_server(self, stopping):
+        with self._lock:
+            if stopping.is_set():
+                return None  # stop() or restart() got the lock first, the supervisor isn't wanted any more
+            return self.start_server()
+
+    def stop_server_process(self):
+        if self.server_process:
+            self.server_process.terminate()
+            self.server_process.wait()
+            self.server_process = None
+
+    def is_running(self):
+        if self.instance_manager:
+            return any(instance.is_running() for instance in self.instance_manager)
+        return self.server_process is not None and self.server_process.poll() is None
+
+    def start(self):
+        """Prepares and starts the server (or every instance), returns (started, errors)."""
+        with self._lock:
+            if self.is_running():
+                return True, []
+            self.init()
+            if self.instance_manager:
+                self.run_genmods()
+                failed = [instance.name for instance in self.instance_manager if not instance.start()]
+                return not failed, [f"Cannot start instance {name}, see the log for details" for name in failed]
+            plan = self.prepare_server_launch()
+            if not plan.is_valid():
+                return False, plan.errors
+            self.start_server(plan)
+            self.log("Success", "Server Booting Up")
+            threading.Thread(target=self.query_server, daemon=True).start()
+            self.supervisor.watch(self.server_process)  # Restart the server if it crashes
+            self.restart_scheduler.start()
+            return True, []
+
+    def stop(self):
+        with self._lock:
+            self.supervisor.stop()
+            self.restart_scheduler.stop()
+            self.close_all_processes()
+            self.stop_server_process()
+            if self.instance_manager:
+                self.instance_manager.stop_all()
+            self.log("Info", "Server Stopped")
+
+    def restart(self, plan=None):
+        """Restarts with everything prepared before the old server is stopped, returns whether it restarted."""
+        with self._lock:
+            if self.instance_manager:
+                self.run_genmods()
+                return self.instance_manager.restart_all()
+            self.log("Info", "Restarting server...")
+            if plan is None:
+                plan = self.prepare_server_launch()
+            if not plan.is_valid():
+                self.log("Error", "Restart cancelled, the server would not start with the current setup")
+                return False
+            self.supervisor.stop()
+            self.stop_server_process()
+            self.start_server(plan)  # Start the server again
+            self.supervisor.watch(self.server_process)
+            self.log("Success", "Server Restarted")
+        threading.Thread(target=self.query_server, daemon=True).start()
+        return True
+
+    def restart_instance(self, name):
+        instance = self.instance_manager.get(name) if self.instance_manager else None
+        return instance.restart() if instance else False
+
+    def set_auto_start(self, auto_start):
+        """Saves auto_start to config.json."""
+        self.auto_start = auto_start
+        try:
+            # Read the existing config.json file
+            with open(f'{self.prefix_directory}config.json', 'r') as file:
+                config = json.load(file)
+        except FileNotFoundError:
+            return self.log("Error", "Check your config.json for any errors")
+        config['auto_start'] = auto_start
+        with open(f'{self.prefix_directory}config.json', 'w') as file:
+            json.dump(config, file, indent=4)
+
+    def uptime(self):
+        running = self.server_process is not None and self.server_process.poll() is None
+        return round(time.time() - self.server_started_at, 1) if running else 0
+
+    def status(self):
+        running = self.server_process is not None and self.server_process.poll() is None
+        status = {
+            "server_name": self.server_name,
+            "running": running,
+            "pid": self.server_process.pid if running else None,
+            "uptime": round(time.time() - self.server_started_at, 1) if running else None,
+            "restarts": self.supervisor.restarts,
+            "mods": len(self.mod_list),
+            "next_restart": self.restart_scheduler.next_restart.isoformat() if self.restart_scheduler.next_restart else None,
+            "auto_start": self.auto_start,
+            "max_mem": self.max_mem,
+        }
+        latest = self.sampler.latest()
+        if running and latest:
+            status["resources"] = latest.to_dict()
+        if running and self.health_monitor_active:
+            status["health"] = self.health_monitor.status()
+        if self.instance_manager:
+            status["instances"] = self.instance_manager.status()
+        return status
+
+    def shutdown(self):
+        self.stop()
+        self.sampler.stop()
+        self.health_monitor.stop()
+        if self.alert_dispatcher:
+            self.alert_dispatcher.stop()
+        if self.metrics_server:
+            self.metrics_server.shutdown()
+            self.metrics_server = None
@@ -0,0 +1,97 @@
+import sys
+import json
+import time
+import urllib.request
+import urllib.error
+from datetime import datetime
+
+# Command line client for the control API of daemon.py (or a GUI with control_api_active).
+#
+#   python Utils/managerctl.py status
+#   python Utils/managerctl.py start|stop|restart|genmods
+#   python Utils/managerctl.py logs [--follow]
+#   python Utils/managerctl.py instance <name> start|stop|restart
+
+USAGE = "usage: managerctl.py status | start | stop | restart | genmods | logs [--follow] | instance <name> start|stop|restart"
+
+
+def load_settings(config_path='Utils/config.json'):
+    try:
+        with open(config_path, 'r') as config_file:
+            config = json.load(config_file)
+    except (OSError, ValueError):
+        config = {}
+    url = f"http://{config.get('control_api_host', '127.0.0.1')}:{config.get('control_api_port', 8765)}"
+    token = config.get("control_api_token")
+    if not token:
+        # The one daemon.py made on its first run
+        try:
+            with open(config.get("control_api_token_path", "Utils/control_api_token.txt"), 'r') as token_file:
+                token = token_file.read().strip()
+        except OSError:
+            token = None
+    return url, token
+
+
+def request(url, method="GET", token=None, timeout=900):
+    """Returns (HTTP status, decoded JSON body)."""
+    headers = {"X-Control-Token": token} if token else {}
+    http_request = urllib.request.Request(url, data=b"" if method == "POST" else None, method=method, headers=headers)
+    try:
+        with urllib.request.urlopen(http_request, timeout=timeout) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+
+
+def print_lines(lines):
+    for line in lines:
+        current_time = datetime.fromtimestamp(line["time"]).strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{current_time}] {line['type']}: {line['message']}")
+
+
+def follow_logs(base_url, token):
+    since = 0
+    while True:
+        _, body = request(f"{base_url}/logs?since={since}", token=token)
+        lines = body.get("lines", [])
+        print_lines(lines)
+        if lines:
+            since = lines[-1]["seq"]
+        time.sleep(1)
+
+
+def main(arguments):
+    if not arguments:
+        print(USAGE)
+        return 2
+    base_url, token = load_settings()
+    command = arguments[0]
+    try:
+        if command == "status":
+            status, body = request(f"{base_url}/status", token=token)
+            print(json.dumps(body, indent=4))
+        elif command in ("start", "stop", "restart", "genmods"):
+            status, body = request(f"{base_url}/{command}", "POST", token)
+            print(json.dumps(body, indent=4))
+        elif command == "logs":
+            if "--follow" in arguments:
+                follow_logs(base_url, token)
+            status, body = request(f"{base_url}/logs", token=token)
+            print_lines(body.get("lines", []))
+        elif command == "instance" and len(arguments) == 3:
+            status, body = request(f"{base_url}/instances/{arguments[1]}/{arguments[2]}", "POST", token)
+            print(json.dumps(body, indent=4))
+        else:
+            print(USAGE)
+            return 2
+    except urllib.error.URLError as e:
+        print(f"Cannot reach the server manager at {base_url}: {e.reason}")
+        return 1
+    except KeyboardInterrupt:
+        return 0
+    return 0 if status < 400 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
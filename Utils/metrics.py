@@ -0,0 +1,216 @@
+import time
+import bisect
+import threading
+
+# Counters, gauges and histograms for the manager and the log scripts, served in the
+# Prometheus text format on http://<metrics_host>:<port>/metrics when metrics_active is on.
+# The manager (start.py / daemon.py) serves on metrics_port and ingest.py, which runs as
+# its own process, on ingest_metrics_port.
+#
+# Everything registers itself on the module level REGISTRY when it's created, so the
+# modules that count things don't need to know whether anything is serving them. Counting
+# is a lock and an add, the per-line code only counts once per batch of lines.
+
+DEFAULT_PORT = 9108
+DEFAULT_INGEST_PORT = 9109
+PREFIX = "dayz_"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BOOT_BUCKETS = (15, 30, 45, 60, 90, 120, 180, 240, 300, 450, 600)
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Metric:
+    """Base for the metric types, labels(*values) returns the child for one set of label values."""
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = PREFIX + name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+        self._function = None
+
+    def labels(self, *values):
+        values = tuple(str(value) for value in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def set_function(self, function):
+        """Reads the value from function() whenever the metrics are scraped, for things that already keep count."""
+        self._function = function
+        return self
+
+    def samples(self):
+        """[(name suffix, label names, label values, extra labels, value)]"""
+        if self._function is not None:
+            try:
+                return [("", (), (), (), self._function())]
+            except Exception:
+                return []  # Whatever it reads from has gone away, leave it out of this scrape
+        children = self._children if self.labelnames else {(): self}
+        return [sample for values, child in list(children.items()) for sample in child._child_samples(self.labelnames, values)]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for suffix, names, values, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{format_labels(names, values, extra)} {format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self.value = 0
+
+    def _new_child(self):
+        return Counter("", "")
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def _child_samples(self, names, values):
+        return [("", names, values, (), self.value)]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def _new_child(self):
+        return Gauge("", "")
+
+    def set(self, value):
+        self.value = value
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # The last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def _new_child(self):
+        return Histogram("", "", buckets=self.buckets)
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        """with histogram.time(): observes how long the block took."""
+        return _Timer(self)
+
+    def _child_samples(self, names, values):
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        samples = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            samples.append(("_bucket", names, values, (("le", format_value(float(bound))),), cumulative))
+        samples.append(("_sum", names, values, (), total))
+        samples.append(("_count", names, values, (), count))
+        return samples
+
+
+class _Timer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labelnames, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"Metric {name} is already registered as a {metric.type}")
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._get(Counter, name, help, labelnames)
+
+    def gauge(self, name, help, labelnames=()):
+        return self._get(Gauge, name, help, labelnames)
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._get(Histogram, name, help, labelnames, buckets=buckets)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+
+def start_metrics_server(host="127.0.0.1", port=DEFAULT_PORT, registry=REGISTRY):
+    """Serves registry on /metrics from a background thread, returns the server."""
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler  # Only needed by whoever serves them
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_response(404)
+                self.end_headers()
+                return
+            data = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,185 @@
+import os
+import sys
+import json
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from jsonfile import write_json_atomic
+
+HASH_CHUNK_SIZE = 1024 * 1024
+MANIFEST_VERSION = 1
+
+# Fingerprints every @mod folder so we can tell which mods were added, removed or updated
+# (or half copied) since the last boot. Each file is stored with its size, mtime and a
+# blake2b hash, and only files whose size or mtime changed are hashed again.
+
+
+def hash_file(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as file:
+        while True:
+            chunk = file.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def list_mod_files(mod_path):
+    """Returns {relative path: (size, mtime_ns)} for every file under a mod folder."""
+    files = {}
+    pending = [""]
+    while pending:
+        relative_dir = pending.pop()
+        with os.scandir(os.path.join(mod_path, relative_dir)) as entries:
+            for entry in entries:
+                relative_path = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(relative_path)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    files[relative_path] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+def mod_digest(files):
+    """One hash for the whole mod, from every file's path and hash."""
+    digest = hashlib.blake2b(digest_size=16)
+    for relative_path in sorted(files):
+        digest.update(f"{relative_path}\0{files[relative_path]['hash']}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def find_problems(files):
+    """Signs of a partially copied or broken mod."""
+    problems = []
+    pbos = [path for path in files if path.lower().endswith(".pbo")]
+    if not pbos:
+        problems.append("no .pbo files")
+    empty = [path for path in pbos if files[path]["size"] == 0]
+    if empty:
+        problems.append(f"{len(empty)} empty .pbo file(s)")
+    return problems
+
+
+class ModChanges:
+    """What changed between two scans, mods are listed by folder name."""
+
+    def __init__(self):
+        self.added = []
+        self.removed = []
+        self.changed = {}  # mod -> number of files added, removed or modified
+        self.missing = []  # In the mod list but not on disk
+        self.problems = {}  # mod -> [problem]
+        self.hashed_files = 0
+        self.hashed_bytes = 0
+        self.elapsed = 0.0
+
+    def has_changes(self):
+        return bool(self.added or self.removed or self.changed)
+
+
+class ModManifest:
+    """The fingerprints of every mod as of the last scan, kept in a JSON file."""
+
+    def __init__(self, manifest_path, mods_dir, workers=None):
+        self.manifest_path = manifest_path
+        self.mods_dir = mods_dir
+        self.workers = workers or min(8, (os.cpu_count() or 1) + 2)
+        self.mods = {}  # mod -> {"digest": str, "files": {relative path: {"size", "mtime_ns", "hash"}}}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == MANIFEST_VERSION:
+            self.mods = data.get("mods", {})
+
+    def save(self):
+        write_json_atomic(self.manifest_path, {"version": MANIFEST_VERSION, "mods": self.mods}, indent=None)
+
+    def scan(self, mod_list):
+        """Fingerprints the mods in mod_list, saves the manifest and returns a ModChanges."""
+        start_time = time.perf_counter()
+        changes = ModChanges()
+        listings = {}
+        for mod in mod_list:
+            mod_path = os.path.join(self.mods_dir, mod)
+            try:
+                listings[mod] = list_mod_files(mod_path)
+            except OSError:
+                changes.missing.append(mod)
+
+        # Only files that are new or whose size or mtime moved get hashed
+        to_hash = []
+        for mod, listing in listings.items():
+            known_files = self.mods.get(mod, {}).get("files", {})
+            for relative_path, (size, mtime_ns) in listing.items():
+                known = known_files.get(relative_path)
+                if not known or known["size"] != size or known["mtime_ns"] != mtime_ns:
+                    to_hash.append((mod, relative_path, size))
+        hashes = {}
+        if to_hash:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                paths = [os.path.join(self.mods_dir, mod, relative_path) for mod, relative_path, _ in to_hash]
+                for (mod, relative_path, size), file_hash in zip(to_hash, executor.map(hash_file, paths)):
+                    hashes[(mod, relative_path)] = file_hash
+                    changes.hashed_bytes += size
+        changes.hashed_files = len(to_hash)
+
+        mods = {}
+        for mod, listing in listings.items():
+            previous = self.mods.get(mod)
+            known_files = previous["files"] if previous else {}
+            files = {}
+            for relative_path, (size, mtime_ns) in listing.items():
+                file_hash = hashes.get((mod, relative_path)) or known_files[relative_path]["hash"]
+                files[relative_path] = {"size": size, "mtime_ns": mtime_ns, "hash": file_hash}
+            mods[mod] = {"digest": mod_digest(files), "files": files}
+            if previous is None:
+                changes.added.append(mod)
+            elif previous["digest"] != mods[mod]["digest"]:
+                changed_files = set(files) ^ set(known_files)
+                changed_files.update(path for path in files.keys() & known_files.keys() if files[path]["hash"] != known_files[path]["hash"])
+                changes.changed[mod] = len(changed_files)
+            problems = find_problems(files)
+            if problems:
+                changes.problems[mod] = problems
+        changes.removed = sorted(set(self.mods) - set(listings))
+        self.mods = mods
+        self.save()
+        changes.elapsed = time.perf_counter() - start_time
+        return changes
+
+
+def describe_changes(changes):
+    """Returns [(DayZPrint type, message)] for a ModChanges."""
+    messages = []
+    for mod in changes.added:
+        messages.append(("Info", f"New mod: {mod}"))
+    for mod, file_count in changes.changed.items():
+        messages.append(("Info", f"Updated mod: {mod} ({file_count} file(s) changed)"))
+    for mod in changes.removed:
+        messages.append(("Info", f"Removed mod: {mod}"))
+    for mod in changes.missing:
+        messages.append(("Error", f"Mod folder not found: {mod}"))
+    for mod, problems in changes.problems.items():
+        messages.append(("Warning", f"{mod} may be incomplete: {', '.join(problems)}"))
+    summary = "Mods changed since last boot" if changes.has_changes() else "No mod changes since last boot"
+    messages.append(("Info", f"{summary} (checked in {changes.elapsed:.1f}s, hashed {changes.hashed_files} file(s), {changes.hashed_bytes / 1024 / 1024:.0f} MB)"))
+    return messages
+
+
+if __name__ == "__main__":
+    # python Utils/modmanifest.py [mods.txt]
+    with open('Utils/config.json', 'r') as config_file:
+        config = json.load(config_file)
+    mods_txt = sys.argv[1] if len(sys.argv) > 1 else config["mods_txt_dir"]
+    with open(mods_txt, 'r') as file:
+        mod_list = [line.strip() for line in file if line.strip()]
+    manifest = ModManifest(config.get("mod_manifest_path", "Utils/mod_manifest.json"), config.get("mods_dir", "."), config.get("mod_hash_workers"))
+    for type, message in describe_changes(manifest.scan(mod_list)):
+        print(f"{type}: {message}")
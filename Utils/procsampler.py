@@ -0,0 +1,296 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from launchplan import DEFAULT_MAX_MEM
+
+# Samples the DayZ server process (CPU, RSS, threads and handles) at a fixed interval into
+# a fixed-size ring, for the window's chart, the metrics and memory leak detection.
+#
+#   python Utils/procsampler.py <pid> [interval]      prints samples until the process exits
+#   python Utils/procsampler.py --recommend           the -maxMem the memory history suggests
+#
+# On Linux everything comes from /proc/<pid>, anywhere else psutil is used if it's installed
+# and sampling is off if it isn't. Every run's peak RSS is appended to the memory history,
+# which recommend_max_mem() turns into a -maxMem with some headroom.
+
+SAMPLE_INTERVAL = 5  # Seconds
+HISTORY_SAMPLES = 720  # An hour of samples at the default interval
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") and "SC_CLK_TCK" in os.sysconf_names else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") and "SC_PAGE_SIZE" in os.sysconf_names else 4096
+MB = 1024 * 1024
+
+
+class Sample:
+    """One reading. cpu is percent of one core (so 250 is two and a half cores), rss is bytes."""
+    __slots__ = ("time", "cpu", "rss", "threads", "handles")
+
+    def __init__(self, time, cpu, rss, threads, handles):
+        self.time = time
+        self.cpu = cpu
+        self.rss = rss
+        self.threads = threads
+        self.handles = handles
+
+    def to_dict(self):
+        return {"time": round(self.time, 1), "cpu": round(self.cpu, 1), "rss_mb": round(self.rss / MB, 1), "threads": self.threads, "handles": self.handles}
+
+
+def read_proc(pid):
+    """(cpu seconds used so far, rss bytes, threads, open fds) from /proc, raises OSError if the process is gone."""
+    with open(f"/proc/{pid}/stat", "r") as file:
+        fields = file.read().rsplit(")", 1)[1].split()  # The name in brackets can contain spaces
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS  # utime + stime
+    threads = int(fields[17])
+    rss = int(fields[21]) * PAGE_SIZE
+    try:
+        handles = len(os.listdir(f"/proc/{pid}/fd"))
+    except PermissionError:
+        handles = None
+    return cpu_seconds, rss, threads, handles
+
+
+def read_psutil(pid):
+    import psutil  # Optional, only used where there's no /proc
+    try:
+        process = psutil.Process(pid)
+        with process.oneshot():
+            cpu_times = process.cpu_times()
+            handles = process.num_handles() if hasattr(process, "num_handles") else process.num_fds()
+            return cpu_times.user + cpu_times.system, process.memory_info().rss, process.num_threads(), handles
+    except psutil.Error as e:
+        raise OSError(str(e))
+
+
+def find_reader():
+    """The function to read a process with on this platform, None if there isn't one."""
+    if os.path.isdir("/proc/self"):
+        return read_proc
+    try:
+        import psutil  # noqa: F401
+        return read_psutil
+    except ImportError:
+        return None
+
+
+def available_memory():
+    """Bytes of memory the system can still hand out without swapping, None if we can't tell."""
+    try:
+        with open("/proc/meminfo", "r") as file:
+            for line in file:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.virtual_memory().available
+    except ImportError:
+        return None
+
+
+def rss_trend(samples):
+    """Least squares fit of RSS over time: (slope in bytes/second, r squared). None with fewer than 3 samples."""
+    if len(samples) < 3:
+        return None
+    start = samples[0].time
+    xs = [sample.time - start for sample in samples]
+    ys = [sample.rss for sample in samples]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    syy = sum((y - mean_y) ** 2 for y in ys)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    if sxx == 0:
+        return None
+    slope = sxy / sxx
+    r_squared = sxy * sxy / (sxx * syy) if syy else 0.0
+    return slope, r_squared
+
+
+class LeakCheck:
+    """The result of checking the samples for memory creep."""
+
+    def __init__(self, growing, mb_per_hour, r_squared, minutes_to_limit):
+        self.growing = growing
+        self.mb_per_hour = mb_per_hour
+        self.r_squared = r_squared
+        self.minutes_to_limit = minutes_to_limit  # None if it isn't growing or there's no limit we know of
+
+
+def check_for_leak(samples, window_seconds, min_mb_per_hour, limit_bytes=None, min_r_squared=0.8):
+    """Sustained RSS growth over the last window_seconds of samples.
+
+    Growing means at least min_mb_per_hour and a steady climb (r squared of the fit at
+    least min_r_squared), not the usual up and down while players move around the map.
+    minutes_to_limit is how long until RSS reaches limit_bytes at that rate.
+    """
+    if not samples or samples[-1].time - samples[0].time < window_seconds * 0.9:
+        return None  # Not enough history yet to call it sustained
+    window = [sample for sample in samples if sample.time >= samples[-1].time - window_seconds]
+    trend = rss_trend(window)
+    if trend is None:
+        return None
+    slope, r_squared = trend
+    mb_per_hour = slope * 3600 / MB
+    growing = mb_per_hour >= min_mb_per_hour and r_squared >= min_r_squared
+    minutes_to_limit = None
+    if growing and limit_bytes:
+        minutes_to_limit = max(0.0, (limit_bytes - window[-1].rss) / slope / 60)
+    return LeakCheck(growing, round(mb_per_hour, 1), round(r_squared, 3), minutes_to_limit)
+
+
+def record_run(history_path, run):
+    """Appends one run's summary to the memory history JSON lines file."""
+    with open(history_path, "a", encoding="utf-8") as file:
+        file.write(json.dumps(run) + "\n")
+
+
+def read_runs(history_path):
+    try:
+        with open(history_path, "r", encoding="utf-8") as file:
+            return [json.loads(line) for line in file if line.strip()]
+    except OSError:
+        return []
+
+
+def recommend_max_mem(runs, headroom=1.25, minimum=DEFAULT_MAX_MEM, recent=20, min_runs=3):
+    """A -maxMem (MB) from the peak RSS of the last recent runs, None with fewer than min_runs.
+
+    Takes the second highest peak (one freak run shouldn't set it) plus headroom, rounded
+    up to 256 MB and never below minimum.
+    """
+    peaks = sorted(run["peak_rss_mb"] for run in runs[-recent:] if run.get("peak_rss_mb"))
+    if len(peaks) < min_runs:
+        return None
+    peak = peaks[-2]
+    return max(minimum, int(-(-peak * headroom // 256) * 256))
+
+
+def resolve_max_mem(setting, history_path, log=None):
+    """The -maxMem to start with for config's max_mem: a number of MB, or "auto" for recommend_max_mem()."""
+    if setting != "auto":
+        return int(setting)
+    recommendation = recommend_max_mem(read_runs(history_path))
+    if recommendation is None:
+        return DEFAULT_MAX_MEM
+    if log:
+        log("Info", f"Using -maxMem={recommendation} from the memory history")
+    return recommendation
+
+
+class ProcessSampler:
+    """Samples whichever process get_pid() returns every interval seconds.
+
+    samples() is the ring of recent readings for the current run, it starts over when the
+    pid changes. When a run ends its summary (peak RSS and so on) is appended to
+    history_path. on_sample(sample) is called after every reading.
+    """
+
+    def __init__(self, get_pid, interval=SAMPLE_INTERVAL, history=HISTORY_SAMPLES, history_path=None, on_sample=None, log=None):
+        self.get_pid = get_pid
+        self.interval = interval
+        self._samples = deque(maxlen=history)
+        self.history_path = history_path
+        self.on_sample = on_sample
+        self.log = log or (lambda type, message: print(f"{type}: {message}"))
+        self.reader = find_reader()
+        self.pid = None
+        self.run = None  # Summary of the current run
+        self._last_cpu = None  # (monotonic time, cpu seconds) of the last reading
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.reader is None:
+            self.log("Warning", "Can't sample the server process here (no /proc and psutil isn't installed)")
+            return False
+        if self._thread and self._thread.is_alive():
+            return True
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._loop, args=(self._stopping,), daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stopping.set()
+        self._thread = None
+        self._end_run()
+
+    def samples(self):
+        return list(self._samples)
+
+    def latest(self):
+        return self._samples[-1] if self._samples else None
+
+    def _loop(self, stopping):
+        while not stopping.is_set():
+            try:
+                self.sample_once()
+            except Exception as e:
+                self.log("Warning", f"Process sampling failed: {e}")
+            stopping.wait(self.interval)
+
+    def _end_run(self):
+        run, self.run = self.run, None
+        self.pid = None
+        self._last_cpu = None
+        if run and self.history_path and run["samples"] > 1:
+            try:
+                record_run(self.history_path, run)
+            except OSError as e:
+                self.log("Warning", f"Could not write the memory history: {e}")
+
+    def sample_once(self):
+        """Takes one reading, returns the Sample or None if there's no process to read."""
+        pid = self.get_pid()
+        if pid != self.pid:
+            self._end_run()
+            self._samples.clear()
+            self.pid = pid
+            if pid is not None:
+                self.run = {"pid": pid, "started": round(time.time(), 3), "ended": None, "samples": 0,
+                            "peak_rss_mb": 0.0, "peak_threads": 0, "peak_handles": 0, "mean_cpu": 0.0}
+        if pid is None:
+            return None
+        try:
+            cpu_seconds, rss, threads, handles = self.reader(pid)
+        except OSError:
+            self._end_run()  # Gone between get_pid() and reading it
+            return None
+        now = time.monotonic()
+        cpu = 0.0
+        if self._last_cpu:
+            elapsed = now - self._last_cpu[0]
+            cpu = (cpu_seconds - self._last_cpu[1]) / elapsed * 100 if elapsed > 0 else 0.0
+        self._last_cpu = (now, cpu_seconds)
+        sample = Sample(time.time(), cpu, rss, threads, handles)
+        self._samples.append(sample)
+        run = self.run
+        run["samples"] += 1
+        run["ended"] = round(sample.time, 3)
+        run["peak_rss_mb"] = max(run["peak_rss_mb"], round(rss / MB, 1))
+        run["peak_threads"] = max(run["peak_threads"], threads)
+        run["peak_handles"] = max(run["peak_handles"], handles or 0)
+        run["mean_cpu"] = round(run["mean_cpu"] + (cpu - run["mean_cpu"]) / run["samples"], 1)
+        if self.on_sample:
+            self.on_sample(sample)
+        return sample
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "--recommend":
+        runs = read_runs(sys.argv[2] if len(sys.argv) > 2 else "Utils/memory_history.jsonl")
+        recommendation = recommend_max_mem(runs)
+        print(f"{len(runs)} runs in the history, recommended -maxMem: {recommendation if recommendation else 'not enough runs yet'}")
+        sys.exit(0)
+    target = int(sys.argv[1])
+    sampler = ProcessSampler(lambda: target, float(sys.argv[2]) if len(sys.argv) > 2 else 1.0)
+    while True:
+        sample = sampler.sample_once()
+        if sample is None:
+            break
+        print(json.dumps(sample.to_dict()))
+        time.sleep(sampler.interval)
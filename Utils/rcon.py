@@ -0,0 +1,128 @@
+import sys
+import time
+import json
+import socket
+import zlib
+
+# A minimal BattlEye RCon client, just enough to log in and send commands like "say -1 ...".
+# Every packet is "BE", the CRC32 of the rest of the packet, then 0xFF, the packet type and
+# the payload. The RCon port and password are the ones in the server's BEServer_x64.cfg.
+
+LOGIN = 0x00
+COMMAND = 0x01
+SERVER_MESSAGE = 0x02
+
+
+class RconError(Exception):
+    pass
+
+
+def build_packet(packet_type, payload=b""):
+    body = bytes([0xFF, packet_type]) + payload
+    return b"BE" + zlib.crc32(body).to_bytes(4, "little") + body
+
+
+def parse_packet(data):
+    """Returns (packet type, payload), or None if it isn't a valid BattlEye packet."""
+    if len(data) < 8 or data[:2] != b"BE" or data[6] != 0xFF:
+        return None
+    if zlib.crc32(data[6:]).to_bytes(4, "little") != data[2:6]:
+        return None
+    return data[7], data[8:]
+
+
+class RconClient:
+    """One RCon session, use it as a context manager so the socket gets closed."""
+
+    def __init__(self, host, port, password, timeout=3.0, retries=3):
+        self.address = (host, port)
+        self.password = password
+        self.timeout = timeout
+        self.retries = retries
+        self._sequence = 0
+        self._socket = None
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def connect(self):
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.settimeout(self.timeout)
+        self._socket.connect(self.address)
+        for _ in range(self.retries):
+            self._socket.send(build_packet(LOGIN, self.password.encode("utf-8")))
+            packet = self._receive(LOGIN)
+            if packet is None:
+                continue
+            if packet[:1] == b"\x01":
+                return
+            raise RconError("RCon login failed, check rcon_password")
+        raise RconError(f"No answer from RCon on {self.address[0]}:{self.address[1]}")
+
+    def close(self):
+        if self._socket:
+            self._socket.close()
+            self._socket = None
+
+    def _receive(self, wanted_type, sequence=None):
+        """Waits for a packet of wanted_type, acknowledging any server messages on the way."""
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            try:
+                data = self._socket.recv(4096)
+            except socket.timeout:
+                return None
+            packet = parse_packet(data)
+            if packet is None:
+                continue
+            packet_type, payload = packet
+            if packet_type == SERVER_MESSAGE and payload:
+                self._socket.send(build_packet(SERVER_MESSAGE, payload[:1]))
+                continue
+            if packet_type == wanted_type and (sequence is None or payload[:1] == bytes([sequence])):
+                return payload[1:] if sequence is not None else payload
+        return None
+
+    def command(self, command):
+        """Sends a command and returns the server's response text."""
+        sequence = self._sequence
+        self._sequence = (self._sequence + 1) % 256
+        packet = build_packet(COMMAND, bytes([sequence]) + command.encode("utf-8"))
+        for _ in range(self.retries):
+            self._socket.send(packet)
+            response = self._receive(COMMAND, sequence)
+            if response is None:
+                continue
+            if response[:1] == b"\x00" and len(response) >= 3:
+                return self._receive_parts(sequence, response)
+            return response.decode("utf-8", errors="replace")
+        raise RconError(f"No answer to RCon command: {command}")
+
+    def _receive_parts(self, sequence, first):
+        """Long responses come in several packets: 0x00, part count, part index, data."""
+        part_count = first[1]
+        parts = {first[2]: first[3:]}
+        while len(parts) < part_count:
+            response = self._receive(COMMAND, sequence)
+            if response is None:
+                break
+            parts[response[2]] = response[3:]
+        return b"".join(parts[index] for index in sorted(parts)).decode("utf-8", errors="replace")
+
+
+def say_all(host, port, password, message):
+    """Sends a message to every player in game."""
+    with RconClient(host, port, password) as client:
+        client.command(f"say -1 {message}")
+
+
+if __name__ == "__main__":
+    # python Utils/rcon.py "command" (uses rcon_port and rcon_password from config.json)
+    with open('Utils/config.json', 'r') as config_file:
+        config = json.load(config_file)
+    with RconClient(config.get("rcon_host") or "127.0.0.1", config["rcon_port"], config["rcon_password"]) as client:
+        print(client.command(sys.argv[1] if len(sys.argv) > 1 else "players"))
@@ -0,0 +1,124 @@
+import os
+import json
+import time
+import socket
+import hashlib
+import metrics
+from logtail import LogTailer, creation_time
+from a2s import A2S_INFO_REQUEST
+
+READY_MARKERS = ["Init sequence finished"]  # Written to the RPT by the Central Economy once the mission is loaded
+PROBE_INTERVAL = 2.0  # Seconds between query port probes
+
+boots = metrics.counter("server_boots_total", "Server boots by how they ended: rpt, query (ready), exited or timeout", ["method"])
+ready_seconds = metrics.histogram("server_ready_seconds", "Time from starting the server to it being ready", ["method"], metrics.BOOT_BUCKETS)
+
+# Works out when a freshly started server is actually up, instead of guessing with a sleep.
+# Two signals are watched at the same time: the ready marker showing up in the new RPT log,
+# and the server answering a Steam query (A2S_INFO) on its query port. Whichever comes first wins.
+
+
+def probe_query_port(address, timeout=1.0):
+    """Sends an A2S_INFO request, returns True if the server answered at all (info or challenge)."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        try:
+            sock.sendto(A2S_INFO_REQUEST, address)
+            data, _ = sock.recvfrom(4096)
+        except OSError:
+            return False
+    return data[:4] == b"\xFF\xFF\xFF\xFF" and data[4:5] in (b"I", b"A")
+
+
+class ReadinessProbe:
+    """Waits for a server started at started_at (time.time()) to be ready.
+
+    rpt_dir is the server's profiles directory, RPT logs created before started_at are
+    ignored. query_address is (host, query port), None to only watch the RPT.
+    """
+
+    def __init__(self, rpt_dir, started_at, query_address=None, markers=None):
+        self.rpt_dir = rpt_dir
+        self.started_at = started_at
+        self.query_address = query_address
+        self.markers = markers or READY_MARKERS
+        self.method = None
+
+    def _start_offset(self, path, file):
+        """Read the RPT from this boot from the beginning, skip anything left from the last one."""
+        if creation_time(path) >= self.started_at - 1:
+            return 0
+        return os.fstat(file.fileno()).st_size
+
+    def wait(self, timeout=300, is_alive=None):
+        """Blocks until the server is ready, returns True, or False if it timed out or is_alive() went False."""
+        deadline = time.monotonic() + timeout
+        next_probe = time.monotonic()
+        tailer = LogTailer(self.rpt_dir, "*.RPT", start_offset=self._start_offset) if os.path.isdir(self.rpt_dir) else None
+        try:
+            while time.monotonic() < deadline:
+                if is_alive and not is_alive():
+                    self.method = "exited"
+                    return False
+                if tailer:
+                    for line in tailer.read_lines(timeout=0.5):
+                        if any(marker in line for marker in self.markers):
+                            self.method = "rpt"
+                            return True
+                else:
+                    time.sleep(0.5)
+                if self.query_address and time.monotonic() >= next_probe:
+                    next_probe = time.monotonic() + PROBE_INTERVAL
+                    if probe_query_port(self.query_address):
+                        self.method = "query"
+                        return True
+            self.method = "timeout"
+            return False
+        finally:
+            if tailer:
+                tailer.close()
+            if self.method:
+                boots.labels(self.method).inc()
+                if self.method in ("rpt", "query"):
+                    ready_seconds.labels(self.method).observe(self.elapsed())
+
+    def elapsed(self):
+        return time.time() - self.started_at
+
+
+def mod_list_digest(mod_list):
+    """Short hash of the mod list, so boot times can be grouped by modpack."""
+    return hashlib.blake2b("\n".join(mod_list).encode('utf-8'), digest_size=6).hexdigest()
+
+
+def record_boot_time(boot_times_path, started_at, ready_seconds, method, mod_list):
+    """Appends one boot to the boot times JSON lines file."""
+    entry = {
+        "started": round(started_at, 3),
+        "ready_seconds": round(ready_seconds, 1) if ready_seconds is not None else None,
+        "method": method,
+        "mod_count": len(mod_list),
+        "mods": mod_list_digest(mod_list),
+    }
+    with open(boot_times_path, 'a', encoding='utf-8') as file:
+        file.write(json.dumps(entry) + "\n")
+
+
+def read_boot_times(boot_times_path):
+    try:
+        with open(boot_times_path, 'r', encoding='utf-8') as file:
+            return [json.loads(line) for line in file if line.strip()]
+    except OSError:
+        return []
+
+
+if __name__ == "__main__":
+    # python Utils/readiness.py [boot times file], prints the average time-to-ready per modpack
+    import sys
+    boot_times = read_boot_times(sys.argv[1] if len(sys.argv) > 1 else "Utils/boot_times.jsonl")
+    by_modpack = {}
+    for boot in boot_times:
+        if boot["ready_seconds"] is not None and boot["method"] in ("rpt", "query"):
+            by_modpack.setdefault((boot["mods"], boot["mod_count"]), []).append(boot["ready_seconds"])
+    for (mods, mod_count), seconds in by_modpack.items():
+        print(f"{mods} ({mod_count} mods): {len(seconds)} boots, average {sum(seconds) / len(seconds):.1f}s, fastest {min(seconds):.1f}s, slowest {max(seconds):.1f}s")
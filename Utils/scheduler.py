@@ -0,0 +1,158 @@
+import time
+import threading
+from datetime import datetime, timedelta
+
+WARNING_MINUTES = [15, 5, 1]  # In-game warnings before a restart
+PLAYER_CHECK_INTERVAL = 30  # Seconds between player count checks while waiting for players to leave
+PLAN_MAX_AGE = 600  # Prepare the launch again if the plan is this much older than the warning window when it's time to restart
+
+
+def default_log(type, message):
+    print(f"{type}: {message}")
+
+
+def parse_schedule(schedule):
+    """["06:00", "18:00"] -> [(6, 0), (18, 0)]"""
+    times = []
+    for entry in schedule:
+        hour, minute = entry.strip().split(":")
+        times.append((int(hour), int(minute)))
+    return sorted(times)
+
+
+def next_scheduled_time(times, now):
+    """The first scheduled (hour, minute) after now, as a datetime."""
+    for day in range(2):
+        date = now.date() + timedelta(days=day)
+        for hour, minute in times:
+            candidate = datetime(date.year, date.month, date.day, hour, minute)
+            if candidate > now:
+                return candidate
+    return None
+
+
+class RestartScheduler:
+    """Restarts the server at fixed times of day, warning players in game first.
+
+    The warning window starts max(warning_minutes) before each scheduled time. prepare()
+    builds a launchplan.LaunchPlan at the start of the window, while the old server keeps
+    running, and restart(plan) is called at the scheduled time. With wait_for_players the
+    restart is held back until get_player_count() is at most player_threshold (or
+    max_delay_minutes have passed), and the warnings count down from then instead.
+
+    announce(message) sends the warnings in game. get_player_count() returns the number of
+    players online, or None if it couldn't find out.
+    """
+
+    def __init__(self, schedule, restart, prepare=None, get_player_count=None, announce=None, log=None,
+                 warning_minutes=None, wait_for_players=False, player_threshold=0, max_delay_minutes=60):
+        self.times = parse_schedule(schedule)
+        self.restart = restart
+        self.prepare = prepare or (lambda: None)
+        self.get_player_count = get_player_count or (lambda: None)
+        self.announce = announce or (lambda message: None)
+        self.log = log or default_log
+        self.warning_minutes = sorted(WARNING_MINUTES if warning_minutes is None else warning_minutes, reverse=True)
+        self.wait_for_players = wait_for_players
+        self.player_threshold = player_threshold
+        self.max_delay = max_delay_minutes * 60
+        self._stopping = threading.Event()
+        self._thread = None
+        self._unscheduled = None
+        self.next_restart = None
+
+    def start(self):
+        if not self.times or (self._thread and self._thread.is_alive()):
+            return
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stopping,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        self._thread = None
+        self.next_restart = None
+
+    def restart_soon(self, minutes, reason):
+        """Restarts minutes from now with the usual warnings, outside the schedule (before memory runs out, say).
+
+        Doesn't wait for players to leave. Returns False if one is already on the way.
+        """
+        if self._unscheduled and self._unscheduled.is_alive():
+            return False
+        if self._stopping.is_set():
+            self._stopping = threading.Event()
+        self.log("Warning", f"Restarting in {minutes} minute{'s' if minutes != 1 else ''}: {reason}")
+        self._unscheduled = threading.Thread(target=self._restart_cycle, args=(time.time() + minutes * 60, minutes * 60, self._stopping, False), daemon=True)
+        self._unscheduled.start()
+        return True
+
+    def _sleep_until(self, timestamp, stopping):
+        """Returns True if we were stopped while waiting."""
+        return stopping.wait(max(0.0, timestamp - time.time()))
+
+    def _player_count(self):
+        try:
+            return self.get_player_count()
+        except Exception as e:
+            self.log("Warning", f"Could not get the player count: {e}")
+            return None
+
+    def _run(self, stopping):
+        while not stopping.is_set():
+            self.next_restart = next_scheduled_time(self.times, datetime.now())
+            self.log("Info", f"Next scheduled restart at {self.next_restart:%Y-%m-%d %H:%M}")
+            restart_at = self.next_restart.timestamp()
+            lead = self.warning_minutes[0] * 60 if self.warning_minutes else 0
+            if self._sleep_until(restart_at - lead, stopping):
+                return
+            self._restart_cycle(restart_at, lead, stopping)
+
+    def _restart_cycle(self, restart_at, lead, stopping, wait_for_players=None):
+        plan = self._prepare()
+        players = self._player_count()
+        if self.wait_for_players if wait_for_players is None else wait_for_players:
+            give_up_at = restart_at + self.max_delay
+            while (players is None or players > self.player_threshold) and time.time() < give_up_at:
+                if stopping.wait(PLAYER_CHECK_INTERVAL):
+                    return
+                players = self._player_count()
+            if players is not None and players <= self.player_threshold:
+                # Restart on schedule if they left in time, otherwise count down from now
+                restart_at = max(restart_at, time.time() + (lead if players else 0))
+            else:
+                self.log("Warning", f"Players still online after waiting {self.max_delay // 60} minutes, restarting anyway")
+                restart_at = max(restart_at, time.time() + lead)
+        if players != 0:
+            for minutes in self.warning_minutes:
+                warn_at = restart_at - minutes * 60
+                if warn_at < time.time() - 30:
+                    continue  # Too late for this one
+                if self._sleep_until(warn_at, stopping):
+                    return
+                self._announce(f"Server restart in {minutes} minute{'s' if minutes != 1 else ''}")
+        if self._sleep_until(restart_at, stopping):
+            return
+        # The plan was made at the start of the warning window, only a restart held back
+        # for players (or a very late one) is worth preparing again
+        if plan is None or plan.age() > lead + PLAN_MAX_AGE:
+            plan = self._prepare()
+        if plan is not None and not plan.is_valid():
+            self.log("Error", f"Scheduled restart skipped: {'; '.join(plan.errors)}")
+            return
+        self.log("Info", "Scheduled restart" if wait_for_players is None else "Restarting")
+        self.restart(plan)
+
+    def _prepare(self):
+        try:
+            return self.prepare()
+        except Exception as e:
+            self.log("Error", f"Could not prepare the restart: {e}")
+            return None
+
+    def _announce(self, message):
+        self.log("Info", message)
+        try:
+            self.announce(message)
+        except Exception as e:
+            self.log("Warning", f"Could not send the in-game warning: {e}")
@@ -1,27 +1,16 @@
 import os
-import subprocess
-import time
-import requests
+import queue
 import threading
 import json
 import tkinter as tk
-from tkinter import messagebox, scrolledtext, ttk
+from tkinter import messagebox, scrolledtext
 import tkinter.font as tkFont
-from datetime import datetime
-import json
 import ttkbootstrap as ttk
-from ttkbootstrap.constants import *
-import re
+from logconsole import LogConsole, LEVEL_TAGS
+from manager import ServerManager, load_config
 
-invalid_workshop_mod_id = r'{"status":1,"error":"steam workshop id not found - (\d+)"}'
-monitoring_process = None
-server_process = None
-stop_monitor_process = False 
 previously_highlighted = None
-discord_killfeed_process = None
-log_steam_ids_process = None
 
-processes = []
 Window = ttk.Window()
 
 # Destroys the windows and displays a message box with the error message
@@ -31,8 +20,7 @@ def show_error_message(title: str, message: str):
 
 # Try and load the config.json
 try:
-    with open('Utils/config.json', 'r') as config_file:
-        config = json.load(config_file)
+    config = load_config()
 except FileNotFoundError:
     show_error_message("File Not Found", "Configuration file not found. Please check the file path.")
 except json.JSONDecodeError:
@@ -40,180 +28,61 @@ except json.JSONDecodeError:
 except Exception as e:
     show_error_message("Unexpected Error", f"An unexpected error occurred: {e}")
 
-# Initalize all the config.json variables
+# The window is just a front end, the server itself is run by the ServerManager, see manager.py
 if 'config' in locals():
-    server_name = config["server_name"]
-    server_endpoint = config["server_endpoint"]
-    server_port = config["server_port"]
-    dzsa_query_port = config["dzsa_query_port"]
-    prefix_directory = config["prefix_directory"]
-    server_dir = config["server_dir"]
-    server_config_dir = config["server_config_dir"]
-    genmods_py_dir = config["genmods_py_dir"]
-    mods_txt_dir = config["mods_txt_dir"]
-    monitordeaths_dir = config["monitordeaths_dir"]
-    steam_ids_script_dir = config["steam_ids_script_dir"]
-    cpu_cores = config["cpu_cores"]
-    retry_limit = config["retry_limit"]
-    auto_start = config["auto_start"]
-    log_steam_ids_active = config.get("log_steam_ids_active", False)  # New configuration
-    killfeed_script_active = config.get("killfeed_script_active", False)  # New configuration
-    dzsa_query_endpoint = f"http://dayzsalauncher.com/api/v1/query/{server_endpoint}/{dzsa_query_port}"
-    dzsa_query_response = ""
-    mod_list = []
-
-# Initialization
-def init():
-    os.chdir(server_dir)
-    run_genmods()
-    read_mods()
+    try:
+        manager = ServerManager(config)
+    except (KeyError, ValueError) as e:
+        show_error_message("Config Error", f"Check your config.json: {e}")
+        raise SystemExit(1)
+    server_name = manager.server_name
+    prefix_directory = manager.prefix_directory
+    auto_start = manager.auto_start
+    log_console_max_lines = config.get("log_console_max_lines", 5000)
+    control_api_active = config.get("control_api_active", False)
+    player_count_interval = config.get("player_check_interval", 20)
 
 # The log function for the text box so we can actually see the logs in real time
+# Safe to call from any thread, the log console draws the lines on the Tk loop
 def DayZPrint(type, param):
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_entry = f"[{current_time}]: {param}\n"
-    # log_entry = f"[{current_time}] [{type}]: {param}\n"
-    if type == "Info":
-        log_text.insert(tk.END, log_entry, "info")
-    elif type == "Success":
-        log_text.insert(tk.END, log_entry, "success") 
-    elif type == "Warning":
-        log_text.insert(tk.END, log_entry, "warning")
-    elif type == "Error":
-        log_text.insert(tk.END, log_entry, "error") 
-    else:
-        log_text.insert(tk.END, log_entry)
-    log_text.see(tk.END)
-
-# Read the mods list from mods.txt and assign it to a variable
-def read_mods():
-    global mod_list
-    with open(mods_txt_dir, "r") as value:
-        mod_list = [line.strip() for line in value if line.strip()]
-
-# Generate the mods via genmods.py
-def run_genmods():
-    process = subprocess.Popen(["pythonw", genmods_py_dir], cwd=server_dir)
-    process.wait()
-
-def run_discord_killfeed():
-    cmd = "start cmd /k python " + monitordeaths_dir
-    discord_killfeed_process = subprocess.Popen(cmd, cwd=server_dir, shell=True)
-    processes.append(discord_killfeed_process)  # Store the process
-    # discord_killfeed_process.wait()  # Wait is usually not required here
-
-def run_log_steam_ids():
-    cmd = "start cmd /k python " + steam_ids_script_dir
-    log_steam_ids_process = subprocess.Popen(cmd, cwd=server_dir, shell=True)
-    processes.append(log_steam_ids_process)  # Store the process
-    # log_steam_ids_process.wait()  # Wait is usually not required here
-
-def close_all_processes():
-    for proc in processes:
-        if proc.poll() is None:  # Check if the process is still running
-            proc.terminate()  # Gracefully terminate the process
-            proc.wait()  # Wait for the process to terminate
-
-# Query response checker
-def receivedInvalidQuery(response_text):
-    invalid_workshop = re.search(invalid_workshop_mod_id, response_text)
-    if invalid_workshop:
-        workshop_id = invalid_workshop.group(1)
-        DayZPrint("Error", f"There is an invalid steam workshop mod ({workshop_id}), please remove it or update it")
-        return True
-    if '"error":"Timeout has occurred"' in response_text:
-        DayZPrint("Warning", "Retrying...")
-        return True
-    return False
-
-# Query Server. Waits until the server is ready then queries DZSA launcher so that it updates to the launcher and all clients
-def query_server():
-    time.sleep(80)
-    DayZPrint("Info", "Updating DZSA Launcher")
-    max_retries = 15  # Number of retries
-    retries = 0      # Initialize retry count
-    while retries <= max_retries:
+    manager.log(type, param)
+
+# Work finished on other threads, handed back to the Tk loop so Tk is only touched from its own thread
+gui_calls = queue.SimpleQueue()
+
+def run_in_background(work, on_done):
+    """Runs work() on a thread, then on_done(result, error) on the Tk loop."""
+    def worker():
+        try:
+            result, error = work(), None
+        except Exception as e:
+            result, error = None, e
+        gui_calls.put(lambda: on_done(result, error))
+    threading.Thread(target=worker, daemon=True).start()
+
+def drain_gui_calls():
+    while True:
         try:
-            response = requests.get(dzsa_query_endpoint)
-            response_text = response.text
-            # Check for invalid workshop mod
-            if receivedInvalidQuery(response_text):
-                retries += 1
-                time.sleep(30)  # Wait before retrying
-                continue
-            DayZPrint("Info", "DZSA Launcher Update Successful")
-            return response_text  # Successful response
-        except requests.RequestException as value:
-            DayZPrint("Error", f"Querying the server: {value}")
-            return ""
-    DayZPrint("Error", "Max retries reached. Server query failed.")
-    return ""  # Return empty string after max retries
-
-# Monitor Server and Restart if Terminated
-def monitor_server():
-    global server_process, stop_monitor_process
-    while not stop_monitor_process:
-        time.sleep(10)
-        # Check if the server process has terminated
-        if server_process and server_process.poll() is not None:  # Process has terminated (crashed or stopped)
-            DayZPrint("Error", "Server process terminated - restarting server")
-            # Ensure the server is completely stopped
-            stop_server()
-            time.sleep(10)  # Small delay before restarting
-            # Restart the server process
-            server_process = start_server()
-            Window.after(0, DayZPrint, "Success", "Server Restarted")
-            # After restarting, query the server immediately
-            query_server()
-
-
-# Start Server
-def start_server():
-    mod_string = ";".join(mod_list)
-    read_mods()
-    command = [
-        "./DayZServer_x64",  # Assuming the server executable is named DayZServer_x64
-        "-profiles=Profiles",
-        "-maxMem=2048",
-        f"-mod={mod_string}",
-        f"-config={server_config_dir}",
-        f"-port={server_port}",
-        f"-cpuCount={cpu_cores}",
-        "-dologs",
-        "-adminlog",
-        "-netlog",
-        "-freezecheck"
-    ]
-    process = subprocess.Popen(command, cwd=server_dir)
-    # threading.Thread(target=query_server, daemon=True).start()  # Run the query_server function in a separate thread
-    return process
-
-# Stop Server
-def stop_server():
-    global server_process
-    close_all_processes()
-    if server_process:
-        server_process.terminate()
-        server_process.wait()
-        server_process = None
- 
-
-# Start Server Button
+            call = gui_calls.get_nowait()
+        except queue.Empty:
+            break
+        call()
+    Window.after(100, drain_gui_calls)
+
+# Start Server Button, starts on a thread as checking the mods can hash gigabytes of PBOs after an update
 def start_server_gui():
-    global server_process, monitoring_process, stop_monitor_process
-    try:
-        init()
-    except Exception as e:
-        DayZPrint("Error", f"Initialization failed: {e}")
-        messagebox.showerror("Error", f"Initialization failed: {e}")
+    start_button.config(state=tk.DISABLED)
+    run_in_background(manager.start, server_started_gui)
+
+def server_started_gui(result, error):
+    start_button.config(state=tk.NORMAL)
+    if error:
+        DayZPrint("Error", f"Initialization failed: {error}")
+        messagebox.showerror("Error", f"Initialization failed: {error}")
         return
-    server_process = start_server()
-    DayZPrint("Success", "Server Booting Up")
-    # Start querying in a separate thread
-    threading.Thread(target=query_server, daemon=True).start()  # Run the query_server function in a separate thread
-    # Start monitoring in a separate thread
-    monitoring_process = threading.Thread(target=monitor_server, daemon=True)
-    monitoring_process.start()
+    started, errors = result
+    if not started:
+        messagebox.showerror("Error", "Cannot start the server:\n" + "\n".join(errors))
 
 # Toggle auto start button
 def toggle_auto_start():
@@ -223,54 +92,84 @@ def toggle_auto_start():
         should_auto_start_button.config(text="Auto Start: Enabled")
     else:
         should_auto_start_button.config(text="Auto Start: Disabled")
-    try:
-        # Read the existing config.json file
-        with open(f'{prefix_directory}config.json', 'r') as file:
-            config = json.load(file)
-    except FileNotFoundError:
-        # If the file doesn't exist, start with an empty config
-        return DayZPrint("Error", "Check your config.json for any errors")
-    config['auto_start'] = auto_start
-    with open(f'{prefix_directory}config.json', 'w') as file:
-        json.dump(config, file, indent=4)
-
-# Stop Server Button
+    manager.set_auto_start(auto_start)
+
+# Stop Server Button, on a thread as it waits for a start or restart that's still preparing the mods
 def stop_server_gui():
-    global stop_monitor_process
-    stop_monitor_process = True
-    stop_server()
-    DayZPrint("Info", "Server Stopped")
+    stop_button.config(state=tk.DISABLED)
+    run_in_background(manager.stop, server_stopped_gui)
+
+def server_stopped_gui(result, error):
+    stop_button.config(state=tk.NORMAL)
+    if error:
+        DayZPrint("Error", f"Failed to stop the server: {error}")
+        messagebox.showerror("Error", f"Failed to stop the server: {error}")
+        return
     messagebox.showinfo("Info", "Server has been stopped")
 
-# Generate mods button
+# Generate mods button, on a thread as it can wait on the manager's lock and syncs the keys
 def generate_mods_gui():
-    try:
-        DayZPrint("Info", "Generating mods...")
-        run_genmods()
-        DayZPrint("Success", "Mods generated successfully.")
-    except Exception as e:
-        DayZPrint("Error", f"Failed to generate mods: {e}")
-        messagebox.showerror("Error", f"Failed to generate mods: {e}")
+    generate_mods_button.config(state=tk.DISABLED)
+    run_in_background(manager.generate_mods, mods_generated_gui)
+
+def mods_generated_gui(result, error):
+    generate_mods_button.config(state=tk.NORMAL)
+    if error:
+        DayZPrint("Error", f"Failed to generate mods: {error}")
+        messagebox.showerror("Error", f"Failed to generate mods: {error}")
 
 # Make sure that they want to quit the application so we don't accidentally close the entire server
 def on_closing():
     if messagebox.askokcancel("Quit", "Do you want to quit? This will stop the server if it's running."):
-        stop_server()
+        manager.shutdown()
         Window.destroy()
 
-# Restart server button
+# Restart server button, runs on its own thread as it prepares everything before the old server is stopped
 def restart_server():
-    global server_process
-    DayZPrint("Info", "Restarting server...")
-    stop_server()  # Stop the server
-    time.sleep(2)  # Optional delay before starting again
-    server_process = start_server()  # Start the server again
-    DayZPrint("Success", "Server Restarted")
-
-def create_init_log_message(log_text):
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_text.insert(tk.END, f"[{current_time}]: ", "default")
-    log_text.insert(tk.END, "DayZ Server Manager Initialized\n")
+    threading.Thread(target=manager.restart, daemon=True).start()
+
+# Player count label, asked for on a thread so a slow query doesn't freeze the window
+def refresh_player_count():
+    def query():
+        player_count = manager.get_player_count()
+        text = f"Players: {player_count}" if player_count is not None else "Players: -"
+        fps = manager.health_monitor.latest_fps()
+        if fps is not None:
+            text += f"  FPS: {fps:.0f}"
+        return text
+    if manager.is_running():
+        run_in_background(query, lambda text, error: player_count_label.config(text=text or "Players: -"))
+    else:
+        player_count_label.config(text="Players: -")
+    Window.after(player_count_interval * 1000, refresh_player_count)
+
+# Memory (blue) and CPU (red) of the server over the sampler's history, see procsampler.py
+def draw_resource_chart():
+    resource_canvas.delete("all")
+    samples = manager.sampler.samples()
+    width, height = int(resource_canvas["width"]), int(resource_canvas["height"])
+    if len(samples) > 1:
+        lowest = min(sample.rss for sample in samples)
+        highest = max(sample.rss for sample in samples)
+        top_cpu = max(100.0, max(sample.cpu for sample in samples))
+        step = width / (len(samples) - 1)
+        rss_points, cpu_points = [], []
+        for index, sample in enumerate(samples):
+            rss_points += [index * step, height - 5 - (sample.rss - lowest) / ((highest - lowest) or 1) * (height - 25)]
+            cpu_points += [index * step, height - 5 - sample.cpu / top_cpu * (height - 25)]
+        resource_canvas.create_line(*cpu_points, fill="red")
+        resource_canvas.create_line(*rss_points, fill="blue", width=2)
+    latest = manager.sampler.latest()
+    text = f"RSS {latest.rss / 1048576:.0f} MB  CPU {latest.cpu:.0f}%" if latest else "RSS -  CPU -"
+    resource_canvas.create_text(5, 5, anchor=tk.NW, text=text)
+    Window.after(int(manager.sampler.interval * 1000), draw_resource_chart)
+
+def create_init_log_message():
+    DayZPrint("Default", "DayZ Server Manager Initialized")
+
+# Show or hide a log level in the log text box
+def toggle_log_level(type, variable):
+    log_console.set_level_visible(type, variable.get())
 
 # Open text editor function
 def open_text_editor(file_name):
@@ -340,12 +239,27 @@ edit_config_button.grid(row=1, column=1, padx=5, pady=5)  # Place in row 0, colu
 # Auto start
 should_auto_start_button = tk.Button(Window, text="Auto Start: Enabled" if auto_start else "Auto Start: Disabled", command=toggle_auto_start, width=18, height=2)
 should_auto_start_button.grid(row=1, column=2, padx=5, pady=5)
+# Log level filters
+log_filter_frame = tk.Frame(Window)
+log_filter_frame.grid(row=1, column=3, columnspan=2, padx=5, pady=5)
+log_level_variables = {}
+for log_level in LEVEL_TAGS:
+    log_level_variables[log_level] = tk.BooleanVar(value=True)
+    tk.Checkbutton(log_filter_frame, text=log_level, variable=log_level_variables[log_level], command=lambda level=log_level: toggle_log_level(level, log_level_variables[level])).pack(side=tk.LEFT)
+# Player count
+player_count_label = tk.Label(log_filter_frame, text="Players: -", padx=10)
+player_count_label.pack(side=tk.LEFT)
+# Server memory and CPU chart
+resource_canvas = tk.Canvas(Window, width=260, height=80, bg="white")
+resource_canvas.grid(row=0, column=5, rowspan=2, padx=5, pady=5)
 # Log text box
 log_text = scrolledtext.ScrolledText(Window, width=120, height=200, state='normal', font=custom_font)
-log_text.grid(row=2, column=0, columnspan=5, pady=10)  # Log text spans all columns
+log_text.grid(row=2, column=0, columnspan=6, pady=10)  # Log text spans all columns
+log_console = LogConsole(log_text, max_lines=log_console_max_lines)
+manager.add_listener(log_console.write)
 
 # Create the initial log message in the window
-create_init_log_message(log_text)
+create_init_log_message()
 
 # Handle closing the window
 Window.protocol("WM_DELETE_WINDOW", on_closing)
@@ -353,10 +267,15 @@ Window.protocol("WM_DELETE_WINDOW", on_closing)
 # The window icon
 Window.iconbitmap(r'Utils\small.ico')
 
-if killfeed_script_active:
-    run_discord_killfeed()
-if log_steam_ids_active:
-    run_log_steam_ids()
+manager.start_helpers()
+drain_gui_calls()
+refresh_player_count()
+draw_resource_chart()
+
+# Lets managerctl.py and scripts drive this window's server too, see daemon.py
+if control_api_active:
+    from daemon import start_control_server
+    start_control_server(manager, config)
 
 # The windows main loop (to draw it?)
 Window.mainloop()
@@ -0,0 +1,162 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+# Startup timing harness: how long from starting Python to exec'ing DayZServer_x64.
+#
+#   python Utils/startuptime.py [--mods 80] [--runs 5] [--json]
+#
+# Builds a throwaway server folder with --mods fake mods (a .pbo and a .bikey each), a
+# serverDZ.cfg and a stand-in DayZServer_x64, then starts a fresh interpreter for each run
+# that imports the manager and calls ServerManager.start() against it. The first run has
+# no caches (mods_cache.json, mod manifest, key state), the rest are warm. Also prints
+# which imports cost the most, from python -X importtime.
+
+UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def build_fixture(root, mod_count):
+    os.makedirs(os.path.join(root, "Utils"))
+    os.makedirs(os.path.join(root, "Profiles"))
+    os.makedirs(os.path.join(root, "keys"))
+    for index in range(mod_count):
+        mod_path = os.path.join(root, f"@Mod{index:03d}")
+        os.makedirs(os.path.join(mod_path, "addons"))
+        os.makedirs(os.path.join(mod_path, "keys"))
+        with open(os.path.join(mod_path, "addons", f"mod{index}.pbo"), "wb") as file:
+            file.write(os.urandom(64 * 1024))
+        with open(os.path.join(mod_path, "keys", f"mod{index}.bikey"), "wb") as file:
+            file.write(os.urandom(160))
+    with open(os.path.join(root, "serverDZ.cfg"), "w") as file:
+        file.write('hostname = "startup test";\nclass Missions\n{\n    class DayZ\n    {\n        template="dayzOffline.chernarusplus";\n    };\n};\n')
+    if os.name == "nt":
+        # Any executable will do, it's stopped as soon as it has been started
+        shutil.copy(os.environ.get("COMSPEC", r"C:\Windows\System32\cmd.exe"), os.path.join(root, "DayZServer_x64.exe"))
+    else:
+        server_path = os.path.join(root, "DayZServer_x64")
+        with open(server_path, "w") as file:
+            file.write("#!/bin/sh\nexec sleep 60\n")
+        os.chmod(server_path, 0o755)
+    with open(os.path.join(UTILS_DIR, "config.json"), "r") as file:
+        config = json.load(file)
+    config.update({
+        "server_dir": ".",
+        "mods_dir": ".",
+        "priority_mods": [],
+        "server_keys_dir": "keys",
+        "auto_start": False,
+        "log_steam_ids_active": False,
+        "killfeed_script_active": False,
+        "ready_probe_query_port": False,
+        "ready_timeout": 1,
+        "restart_schedule": [],
+        "instances": [],
+        "cpu_affinity": [],
+    })
+    with open(os.path.join(root, "Utils", "config.json"), "w") as file:
+        json.dump(config, file, indent=4)
+
+
+def child(t0):
+    """One run, inside a fresh interpreter started at t0."""
+    interpreter_ready = time.time()
+    sys.path.insert(0, UTILS_DIR)
+    from manager import ServerManager, load_config
+    imported = time.time()
+    manager = ServerManager(load_config())
+    manager.add_listener(lambda type, message: None)
+    started, errors = manager.start()
+    result = {
+        "interpreter": interpreter_ready - t0,
+        "imports": imported - interpreter_ready,
+        "prepare": manager.server_started_at - imported if started else None,
+        "time_to_exec": manager.server_started_at - t0 if started else None,
+        "errors": errors,
+    }
+    manager.stop()
+    print(json.dumps(result))
+
+
+def import_costs(module="manager", top=8):
+    """The slowest top level imports of module, from python -X importtime."""
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=UTILS_DIR, capture_output=True, text=True)
+    costs = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0 and name.strip() != module:
+            costs = []  # Imported by the interpreter itself (site) before module, not its cost
+        elif depth <= 1:
+            costs.append((name.strip(), int(cumulative) / 1e6))
+    return sorted(costs, key=lambda cost: cost[1], reverse=True)[:top]
+
+
+def run(mod_count, runs):
+    root = tempfile.mkdtemp(prefix="startuptime_")
+    try:
+        build_fixture(root, mod_count)
+        results = []
+        for _ in range(runs):
+            t0 = time.time()
+            process = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", repr(t0)], cwd=root, capture_output=True, text=True)
+            lines = [line for line in process.stdout.splitlines() if line.startswith("{")]
+            if process.returncode != 0 or not lines:
+                raise RuntimeError(f"Startup run failed:\n{process.stdout}\n{process.stderr}")
+            results.append(json.loads(lines[-1]))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return results
+
+
+def summarise(results):
+    warm = [result["time_to_exec"] for result in results[1:] if result["time_to_exec"] is not None]
+    return {
+        "cold_time_to_exec": results[0]["time_to_exec"],
+        "warm_time_to_exec_median": statistics.median(warm) if warm else None,
+        "imports_median": statistics.median(result["imports"] for result in results),
+        "prepare_median": statistics.median([result["prepare"] for result in results if result["prepare"] is not None] or [0]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time from interpreter start to DayZServer_x64 exec")
+    parser.add_argument("--mods", type=int, default=80)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print one JSON object instead of a table")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(float(args.child))
+
+    results = run(args.mods, max(args.runs, 2))
+    summary = summarise(results)
+    costs = import_costs()
+    if args.json:
+        print(json.dumps({"mods": args.mods, "runs": results, "summary": summary, "import_costs": costs}, indent=4))
+        return
+    print(f"{args.mods} mods, {len(results)} runs (the first one cold)")
+    for index, result in enumerate(results):
+        if result["errors"]:
+            print(f"  run {index + 1}: failed to start: {'; '.join(result['errors'])}")
+            continue
+        print(f"  run {index + 1}: interpreter {result['interpreter'] * 1000:.0f} ms, imports {result['imports'] * 1000:.0f} ms, "
+              f"prepare {result['prepare'] * 1000:.0f} ms, time to exec {result['time_to_exec'] * 1000:.0f} ms")
+    if summary["cold_time_to_exec"] is not None and summary["warm_time_to_exec_median"] is not None:
+        print(f"Cold time to exec: {summary['cold_time_to_exec'] * 1000:.0f} ms, warm median: {summary['warm_time_to_exec_median'] * 1000:.0f} ms")
+    print("Slowest imports of manager:")
+    for name, seconds in costs:
+        print(f"  {name}: {seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import os
+import re
+import json
+import time
+from steamstore import journal_path_for, read_journal
+
+# Matches the " (2)" style suffix DayZ adds when a name is already taken on the server
+name_suffix_pattern = re.compile(r'\s*\(\d+\)$')
+
+
+def normalise_player_name(player_name):
+    """Strips the duplicate name suffix, 'Survivor (2)' -> 'Survivor'."""
+    return name_suffix_pattern.sub('', player_name).strip()
+
+
+class SteamIdIndex:
+    """Reverse index of player name -> Steam ID built from steam_ids.json and its journal.
+
+    Current names are preferred over names from duplicateSteamIDs and both are tried
+    with the suffix stripped if the exact name isn't known. The files are re-checked at
+    most every reload_interval seconds and only the entries that changed are re-indexed.
+    """
+
+    def __init__(self, steam_ids_json_file_path, reload_interval=5.0):
+        self.steam_ids_json_file_path = steam_ids_json_file_path
+        self.reload_interval = reload_interval
+        self._entries = {}  # steam_id -> (current name, aliases)
+        self._indexes = ({}, {}, {}, {})  # exact current, exact alias, normalised current, normalised alias
+        self._live = set()  # Steam IDs recorded in this process, fresher than whatever is on disk
+        self._file_signature = None
+        self.journal_path = journal_path_for(steam_ids_json_file_path)
+        self._journal_offset = 0
+        self._journal_seq = 0
+        self._last_check = 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _add_name(self, index, name, steam_id):
+        steam_id_list = index.setdefault(name, [])
+        if steam_id not in steam_id_list:
+            steam_id_list.append(steam_id)
+
+    def _remove_name(self, index, name, steam_id):
+        steam_id_list = index.get(name)
+        if steam_id_list and steam_id in steam_id_list:
+            steam_id_list.remove(steam_id)
+            if not steam_id_list:
+                del index[name]
+
+    def _index_entry(self, steam_id, entry, add):
+        update = self._add_name if add else self._remove_name
+        current_name, aliases = entry
+        exact_current, exact_alias, normalised_current, normalised_alias = self._indexes
+        update(exact_current, current_name, steam_id)
+        update(normalised_current, normalise_player_name(current_name), steam_id)
+        for alias in aliases:
+            update(exact_alias, alias, steam_id)
+            update(normalised_alias, normalise_player_name(alias), steam_id)
+
+    def update_entries(self, entries):
+        """Applies {steam_id: (current name, aliases)}, re-indexing only the entries that changed."""
+        removed = [steam_id for steam_id in self._entries if steam_id not in entries and steam_id not in self._live]
+        for steam_id in removed:
+            self._index_entry(steam_id, self._entries.pop(steam_id), add=False)
+        changed = sum(self._set_entry(steam_id, entry) for steam_id, entry in entries.items())
+        return changed + len(removed)
+
+    def _set_entry(self, steam_id, entry):
+        old_entry = self._entries.get(steam_id)
+        if old_entry == entry:
+            return False
+        if old_entry is not None:
+            self._index_entry(steam_id, old_entry, add=False)
+        self._entries[steam_id] = entry
+        self._index_entry(steam_id, entry, add=True)
+        return True
+
+    def _apply_join(self, player_name, steam_id):
+        old_entry = self._entries.get(steam_id)
+        if old_entry is None:
+            entry = (player_name, ())
+        else:
+            old_name, aliases = old_entry
+            entry = (player_name, aliases + tuple(name for name in (old_name, player_name) if name not in aliases))
+        self._set_entry(steam_id, entry)
+
+    def record_player(self, player_name, steam_id):
+        """Indexes a player join as it happens, the latest name wins and the old one becomes an alias."""
+        self._live.add(steam_id)
+        self._apply_join(player_name, steam_id)
+
+    def load(self, steam_ids, duplicate_ids):
+        """Indexes the steam_ids / duplicateSteamIDs dicts as found in steam_ids.json."""
+        entries = {}
+        for steam_id, info in steam_ids.items():
+            entries[steam_id] = (info['player_name'], tuple(duplicate_ids.get(steam_id, ())))
+        for steam_id, aliases in duplicate_ids.items():
+            if steam_id not in entries and aliases:
+                entries[steam_id] = (aliases[-1], tuple(aliases))
+        for steam_id in self._live:
+            entries.pop(steam_id, None)
+        return self.update_entries(entries)
+
+    def _refresh_snapshot(self):
+        try:
+            stat = os.stat(self.steam_ids_json_file_path)
+        except OSError:
+            return False
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._file_signature:
+            return False
+        try:
+            with open(self.steam_ids_json_file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            # Most likely caught the file halfway through a write, keep the old index and try again later
+            print(f"Error reloading Steam IDs: {e}")
+            return False
+        self._file_signature = signature
+        changed = self.load(data.get('steam_ids', {}), data.get('duplicateSteamIDs', {}))
+        # Journal entries after the snapshot have to be applied again on top of it
+        self._journal_seq = data.get('journalSeq', 0)
+        self._journal_offset = 0
+        if changed:
+            print(f"Reloaded Steam IDs: {changed} changed, {len(self)} total")
+        return True
+
+    def _refresh_journal(self):
+        """Applies joins appended to the steam_ids journal since we last looked, see steamstore.py."""
+        try:
+            size = os.path.getsize(self.journal_path)
+        except OSError:
+            return False
+        if size < self._journal_offset:  # Compacted since we last read it
+            self._journal_offset = 0
+        if size == self._journal_offset:
+            return False
+        entries, self._journal_offset = read_journal(self.journal_path, self._journal_offset)
+        for seq, steam_id, player_name in entries:
+            if seq > self._journal_seq:
+                self._apply_join(player_name, steam_id)
+                self._journal_seq = seq
+        return bool(entries)
+
+    def refresh(self, force=False):
+        """Reloads steam_ids.json and its journal if they changed on disk, returns True if the index was updated."""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.reload_interval:
+            return False
+        self._last_check = now
+        snapshot_changed = self._refresh_snapshot()
+        journal_changed = self._refresh_journal()
+        return snapshot_changed or journal_changed
+
+    def find_steam_id(self, player_name):
+        """Returns the Steam ID for a player name or None if we've never seen them."""
+        if player_name is None:
+            return None
+        self.refresh()
+        exact_current, exact_alias, normalised_current, normalised_alias = self._indexes
+        for index, key in ((exact_current, player_name), (exact_alias, player_name)):
+            steam_id_list = index.get(key)
+            if steam_id_list:
+                return steam_id_list[0]
+        normalised_name = normalise_player_name(player_name)
+        for index in (normalised_current, normalised_alias):
+            steam_id_list = index.get(normalised_name)
+            if steam_id_list:
+                return steam_id_list[0]
+        return None
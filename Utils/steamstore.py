@@ -0,0 +1,187 @@
+import os
+import json
+import threading
+from jsonfile import write_json_atomic
+
+
+def journal_path_for(snapshot_path):
+    """steam_ids.json -> steam_ids.journal"""
+    return os.path.splitext(snapshot_path)[0] + ".journal"
+
+
+def player_entry(player_name):
+    """Returns the steam_ids.json entry for a player name."""
+    return {
+        "player_name": player_name,
+        "comment": "This player has a suffix" if "(2)" in player_name or "(3)" in player_name else ""
+    }
+
+
+def read_journal(journal_path, offset=0):
+    """Reads journal entries after offset, returns ([(seq, steam_id, player_name)], offset after the last complete entry).
+
+    A half written last line (the process died mid-append) is left alone.
+    """
+    try:
+        with open(journal_path, 'rb') as file:
+            file.seek(offset)
+            data = file.read()
+    except OSError:
+        return [], offset
+    end = data.rfind(b"\n") + 1
+    entries = []
+    for line in data[:end].splitlines():
+        try:
+            entry = json.loads(line)
+            entries.append((entry["seq"], entry["id"], entry["name"]))
+        except (ValueError, KeyError):
+            continue
+    return entries, offset + end
+
+
+class SteamIdStore:
+    """The Steam ID registry: a steam_ids.json snapshot plus an append-only journal.
+
+    Every join is one appended journal line, so recording a player costs the same no
+    matter how many players we know about. compact() folds the journal into a new
+    snapshot, written atomically, either on demand or from a background thread. The
+    snapshot keeps the steam_ids / duplicateSteamIDs layout everything else reads, with
+    an extra journalSeq so entries already in it aren't replayed twice.
+    """
+
+    def __init__(self, snapshot_path, journal_path=None, compact_interval=60.0):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or journal_path_for(snapshot_path)
+        self.compact_interval = compact_interval
+        self.names = {}  # steam_id -> current player name
+        self.duplicates = {}  # steam_id -> set of every name seen for it
+        self.seq = 0
+        self._journal = None
+        self._pending = []  # Journal entries written since the last compaction started
+        self._dirty = False
+        self._lock = threading.RLock()
+        self._compactor = None
+        self._stop = threading.Event()
+
+    def __len__(self):
+        return len(self.names)
+
+    def clear(self):
+        with self._lock:
+            self.names = {}
+            self.duplicates = {}
+            self._dirty = True
+
+    def load(self):
+        """Loads the snapshot and replays the journal on top of it, raises if the snapshot is unreadable."""
+        with self._lock:
+            self.clear()
+            self._dirty = False
+            snapshot_seq = 0
+            if os.path.exists(self.snapshot_path):
+                with open(self.snapshot_path, 'r', encoding='utf-8') as file:
+                    data = json.load(file)
+                self.names = {steam_id: info["player_name"] for steam_id, info in data["steam_ids"].items()}
+                self.duplicates = {steam_id: set(names) for steam_id, names in data["duplicateSteamIDs"].items()}
+                snapshot_seq = data.get("journalSeq", 0)
+            self.seq = snapshot_seq
+            entries, end = read_journal(self.journal_path)
+            if os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) > end:
+                # Drop a half written last entry, or the next join would be appended onto it
+                with open(self.journal_path, 'r+b') as file:
+                    file.truncate(end)
+            for seq, steam_id, player_name in entries:
+                if seq > snapshot_seq:
+                    self._apply(player_name, steam_id)
+                    self._pending.append((seq, steam_id, player_name))
+                    self.seq = max(self.seq, seq)
+                    self._dirty = True
+
+    def _apply(self, player_name, steam_id):
+        """Latest name wins, older names go into duplicates (same rules logsteamids always had)."""
+        old_name = self.names.get(steam_id)
+        if old_name is not None:
+            names = self.duplicates.get(steam_id)
+            if names is None:
+                names = self.duplicates[steam_id] = set()
+            names.add(old_name)
+            names.add(player_name)
+        self.names[steam_id] = player_name
+
+    def record(self, player_name, steam_id, journal=True):
+        """Records a player join. With journal=False it only changes memory, for bulk loads that finish with compact()."""
+        with self._lock:
+            self._apply(player_name, steam_id)
+            self._dirty = True
+            if not journal:
+                return
+            self.seq += 1
+            if self._journal is None:
+                self._journal = open(self.journal_path, 'a', encoding='utf-8')
+            self._journal.write(json.dumps({"seq": self.seq, "id": steam_id, "name": player_name}) + "\n")
+            self._pending.append((self.seq, steam_id, player_name))
+
+    def flush(self):
+        """Pushes journal writes to the OS so other processes can see them."""
+        with self._lock:
+            if self._journal:
+                self._journal.flush()
+
+    def export(self):
+        """Returns the registry in the steam_ids.json format."""
+        with self._lock:
+            return {
+                "steam_ids": {steam_id: player_entry(player_name) for steam_id, player_name in self.names.items()},
+                "duplicateSteamIDs": {steam_id: list(names) for steam_id, names in self.duplicates.items()},
+            }
+
+    def compact(self):
+        """Writes a new snapshot atomically and drops the journal entries it now contains."""
+        with self._lock:
+            if not self._dirty and os.path.exists(self.snapshot_path):
+                return False
+            data = self.export()
+            data["journalSeq"] = self.seq
+            snapshot_seq = self.seq
+            self._pending = []
+            self._dirty = False
+        # Serialising a big registry takes a while, joins keep going to the journal meanwhile
+        write_json_atomic(self.snapshot_path, data)
+        with self._lock:
+            if self._journal:
+                self._journal.close()
+                self._journal = None
+            remaining = [entry for entry in self._pending if entry[0] > snapshot_seq]
+            temp_path = self.journal_path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                for seq, steam_id, player_name in remaining:
+                    file.write(json.dumps({"seq": seq, "id": steam_id, "name": player_name}) + "\n")
+            os.replace(temp_path, self.journal_path)
+        return True
+
+    def start_compactor(self):
+        """Compacts every compact_interval seconds on a background thread."""
+        if self._compactor:
+            return
+        self._stop.clear()
+        self._compactor = threading.Thread(target=self._compact_loop, name="SteamIdStoreCompactor", daemon=True)
+        self._compactor.start()
+
+    def _compact_loop(self):
+        while not self._stop.wait(self.compact_interval):
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"Error compacting Steam IDs: {e}")
+
+    def close(self):
+        """Stops the compactor and writes a final snapshot."""
+        self._stop.set()
+        if self._compactor:
+            self._compactor.join()
+            self._compactor = None
+        self.compact()
+        with self._lock:
+            if self._journal:
+                self._journal.close()
+                self._journal = None
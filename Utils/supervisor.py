@@ -0,0 +1,167 @@
+import sys
+import json
+import time
+import threading
+import metrics
+from collections import deque
+
+RESTART_BACKOFF = [0, 5, 15, 30, 60]  # Seconds to wait before each restart in a row
+STABLE_UPTIME = 600  # A run that lasted this long resets the backoff
+CRASH_LOOP_MAX_CRASHES = 5
+CRASH_LOOP_WINDOW_MINUTES = 10
+
+crashes = metrics.counter("server_crashes_total", "Times the server exited without being stopped", ["instance"])
+restarts = metrics.counter("server_restarts_total", "Times the supervisor restarted a crashed server", ["instance"])
+crash_loops = metrics.counter("server_crash_loops_total", "Times the server was left down after crashing too often", ["instance"])
+recovery_seconds = metrics.histogram("server_recovery_seconds", "Time from a crash to the restarted server being ready", ["instance"], metrics.BOOT_BUCKETS)
+
+
+def default_log(type, message):
+    print(f"{type}: {message}")
+
+
+class ServerSupervisor:
+    """Restarts the server as soon as it exits, unless it was stopped on purpose.
+
+    A thread blocks on process.wait() so a crash is noticed immediately. Restarts back off
+    through the backoff list while the server keeps dying shortly after starting, and if it
+    crashes max_crashes times within window_minutes it is left down with an error instead.
+
+    start_server(stopping) has to start a new server process and return it, or return None
+    without starting anything if the stopping event is set by the time it gets to it (a
+    stop or restart that was already under way when the server crashed). wait_ready(), if given,
+    blocks until the restarted server is up and returns whether it made it, and on_ready()
+    is called after that (updating the DZSA Launcher). Every exit and recovery is appended
+    to history_path as a JSON line, see summarise_history(). name labels its metrics.
+    """
+
+    def __init__(self, start_server, wait_ready=None, on_ready=None, log=None, history_path=None,
+                 backoff=None, stable_uptime=STABLE_UPTIME, max_crashes=CRASH_LOOP_MAX_CRASHES,
+                 window_minutes=CRASH_LOOP_WINDOW_MINUTES, name="main"):
+        self.start_server = start_server
+        self.wait_ready = wait_ready
+        self.on_ready = on_ready
+        self.log = log or default_log
+        self.history_path = history_path
+        self.backoff = backoff or RESTART_BACKOFF
+        self.stable_uptime = stable_uptime
+        self.max_crashes = max_crashes
+        self.window_seconds = window_minutes * 60
+        self.name = name
+        self.restarts = 0
+        self._crash_times = deque()
+        self._consecutive_crashes = 0
+        self._stopping = threading.Event()
+        self._thread = None
+        self.process = None
+
+    def watch(self, process):
+        """Starts supervising an already running server process."""
+        self.stop()
+        self._stopping = threading.Event()  # A fresh one, the old thread may still be waking up from its own stop
+        self.process = process
+        self._crash_times.clear()  # Starting the server by hand gets it a clean slate
+        self._consecutive_crashes = 0
+        self._thread = threading.Thread(target=self._run, args=(process, time.time(), self._stopping), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops supervising, call this before stopping the server on purpose."""
+        self._stopping.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(1)
+        self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _record(self, entry):
+        if not self.history_path:
+            return
+        try:
+            with open(self.history_path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            self.log("Warning", f"Could not write the run history: {e}")
+
+    def _is_crash_loop(self, now):
+        self._crash_times.append(now)
+        while self._crash_times and now - self._crash_times[0] > self.window_seconds:
+            self._crash_times.popleft()
+        return len(self._crash_times) >= self.max_crashes
+
+    def _run(self, process, started_at, stopping):
+        while True:
+            exit_code = process.wait()
+            exited_at = time.time()
+            uptime = exited_at - started_at
+            if stopping.is_set():
+                self._record({"event": "exit", "reason": "stopped", "started": round(started_at, 3), "ended": round(exited_at, 3),
+                              "uptime": round(uptime, 1), "exit_code": exit_code, "restarts": self.restarts})
+                return
+            crash_loop = self._is_crash_loop(exited_at)
+            crashes.labels(self.name).inc()
+            self._record({"event": "exit", "reason": "crash_loop" if crash_loop else "crash", "started": round(started_at, 3),
+                          "ended": round(exited_at, 3), "uptime": round(uptime, 1), "exit_code": exit_code, "restarts": self.restarts})
+            if crash_loop:
+                crash_loops.labels(self.name).inc()
+                self.log("Error", f"Server crashed {len(self._crash_times)} times in {self.window_seconds // 60} minutes (last exit code {exit_code}), "
+                                  "not restarting it. Check the RPT log for a broken or outdated mod.")
+                return
+            if uptime >= self.stable_uptime:
+                self._consecutive_crashes = 0
+            delay = self.backoff[min(self._consecutive_crashes, len(self.backoff) - 1)]
+            self._consecutive_crashes += 1
+            self.log("Error", f"Server exited with code {exit_code} after {uptime:.0f}s, restarting" + (f" in {delay}s" if delay else ""))
+            if stopping.wait(delay):
+                return
+            try:
+                process = self.start_server(stopping)
+            except Exception as e:
+                self.log("Error", f"Could not restart the server: {e}")
+                return
+            if process is None:
+                return  # Stopped or restarted on purpose while we were waiting to start it
+            started_at = time.time()
+            self.process = process
+            self.restarts += 1
+            restarts.labels(self.name).inc()
+            self.log("Success", f"Server restarted (restart {self.restarts})")
+            if self.wait_ready:
+                ready = self.wait_ready()
+                if ready:
+                    recovery_seconds.labels(self.name).observe(time.time() - exited_at)
+                    self._record({"event": "recovered", "exited": round(exited_at, 3), "recovery_seconds": round(time.time() - exited_at, 1), "restarts": self.restarts})
+                    if self.on_ready:
+                        self.on_ready()
+
+
+def read_history(history_path):
+    try:
+        with open(history_path, 'r', encoding='utf-8') as file:
+            return [json.loads(line) for line in file if line.strip()]
+    except OSError:
+        return []
+
+
+def summarise_history(entries):
+    """Run count, crashes, mean uptime and mean time to recover from a run history."""
+    exits = [entry for entry in entries if entry["event"] == "exit"]
+    crashes = [entry for entry in exits if entry["reason"] != "stopped"]
+    recoveries = [entry["recovery_seconds"] for entry in entries if entry["event"] == "recovered"]
+    exit_codes = {}
+    for entry in crashes:
+        exit_codes[entry["exit_code"]] = exit_codes.get(entry["exit_code"], 0) + 1
+    return {
+        "runs": len(exits),
+        "crashes": len(crashes),
+        "crash_loops": sum(1 for entry in crashes if entry["reason"] == "crash_loop"),
+        "mean_uptime": round(sum(entry["uptime"] for entry in exits) / len(exits), 1) if exits else None,
+        "mttr": round(sum(recoveries) / len(recoveries), 1) if recoveries else None,
+        "exit_codes": exit_codes,
+    }
+
+
+if __name__ == "__main__":
+    # python Utils/supervisor.py [run history file]
+    print(json.dumps(summarise_history(read_history(sys.argv[1] if len(sys.argv) > 1 else "Utils/run_history.jsonl")), indent=4))
@@ -0,0 +1,194 @@
+import time
+import queue
+import threading
+from collections import deque
+import requests
+import metrics
+
+DISCORD_MESSAGE_LIMIT = 2000  # Discord rejects message content longer than this
+
+posts = metrics.counter("webhook_posts_total", "Webhook post attempts by result: sent, rate_limited (429), server_error, rejected or network_error", ["result"])
+failed = metrics.counter("webhook_failed_total", "Webhook messages given up on after every attempt failed")
+dropped = metrics.counter("webhook_dropped_total", "Messages dropped because the webhook queue was full")
+post_seconds = metrics.histogram("webhook_post_seconds", "Time for Discord to answer one webhook post")
+delivery_seconds = metrics.histogram("webhook_delivery_seconds", "Time from a message being queued to it being posted, batch window included")
+
+
+class WebhookDispatcher:
+    """Sends Discord webhook messages from its own thread.
+
+    submit() never blocks, messages go into a bounded queue and anything that doesn't
+    fit is dropped. Messages that arrive within batch_window seconds of each other are
+    joined into one multi-line message. Discord's rate limit headers and 429 retry_after
+    are honoured, and one requests.Session keeps the connection alive between posts.
+    """
+
+    def __init__(self, webhook_url, batch_window=1.0, queue_size=1000, timeout=10, max_attempts=5, session=None):
+        self.webhook_url = webhook_url
+        self.batch_window = batch_window
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.session = session or requests.Session()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._pending = deque()  # The message taken off the queue that didn't fit in the last post, at most one
+        self._blocked_until = 0.0  # monotonic time the rate limit bucket resets
+        self._thread = None
+        self._running = False
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.rate_limited = 0
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="WebhookDispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10):
+        """Stops the dispatcher after it has tried to send whatever is still queued."""
+        self._running = False
+        try:
+            self._queue.put_nowait(None)  # Wakes the thread if it's waiting on an empty queue
+        except queue.Full:
+            pass  # It isn't waiting then, and _running being False ends it once the queue is sent
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def queue_depth(self):
+        return self._queue.qsize() + len(self._pending)
+
+    def submit(self, content):
+        """Queues a message to send, returns False if the queue is full and it was dropped."""
+        try:
+            self._queue.put_nowait((time.monotonic(), content))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            dropped.inc()
+            print(f"Webhook queue full, dropped: {content}")
+            return False
+
+    def _next_batch(self):
+        """Waits for a message then collects whatever else fits in one post.
+
+        Only messages that fit are taken off the queue, so a backlog stays in the bounded
+        queue (and new messages are dropped when it's full) instead of piling up here. The
+        batch window is only waited for when there's no message carried over from the last
+        post, with a backlog the next post goes straight away.
+
+        Returns (when the oldest message in the batch was queued, the batch's content).
+        """
+        carried_over = bool(self._pending)
+        if not carried_over:
+            if not self._running and self._queue.empty():
+                return None
+            item = self._queue.get()
+            if item is None:
+                return None
+            self._pending.append(item)
+        queued_at, content = self._pending.popleft()
+        batch = [content[:DISCORD_MESSAGE_LIMIT]]
+        length = len(batch[0])
+        deadline = time.monotonic() + (0 if carried_over else self.batch_window)
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0 and self._running:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                deadline = 0  # Stopping, send what's already queued without waiting
+                continue
+            content = item[1][:DISCORD_MESSAGE_LIMIT]
+            if length + 1 + len(content) > DISCORD_MESSAGE_LIMIT:
+                self._pending.append(item)  # Starts the next post
+                break
+            batch.append(content)
+            length += 1 + len(content)
+        return queued_at, "\n".join(batch)
+
+    def _run(self):
+        while True:
+            try:
+                batch = self._next_batch()
+                if batch is None:
+                    if not self._running and not self._pending and self._queue.empty():
+                        return
+                    continue
+                queued_at, content = batch
+                if self._send(content):
+                    delivery_seconds.observe(time.monotonic() - queued_at)
+            except Exception as e:
+                # Keep going, a dead thread would leave every later message sitting in the queue
+                print(f"Webhook dispatcher error: {e}")
+                time.sleep(1)
+
+    def _wait_for_rate_limit(self):
+        delay = self._blocked_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _update_rate_limit(self, response):
+        """Reads Discord's bucket headers so we wait before the next post instead of hitting a 429."""
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset_after = response.headers.get("X-RateLimit-Reset-After")
+        if remaining == "0" and reset_after:
+            try:
+                self._blocked_until = time.monotonic() + float(reset_after)
+            except ValueError:
+                pass
+
+    def _retry_after(self, response):
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        try:
+            if isinstance(data, dict) and "retry_after" in data:
+                return float(data["retry_after"])
+            return float(response.headers.get("Retry-After", 1))
+        except (TypeError, ValueError):
+            return 1.0
+
+    def _send(self, content):
+        for attempt in range(self.max_attempts):
+            self._wait_for_rate_limit()
+            started = time.perf_counter()
+            try:
+                response = self.session.post(self.webhook_url, json={"content": content}, timeout=self.timeout)
+            except requests.RequestException as e:
+                posts.labels("network_error").inc()
+                print(f"Error sending webhook: {e}")
+                time.sleep(min(2 ** attempt, 30))
+                continue
+            post_seconds.observe(time.perf_counter() - started)
+            self._update_rate_limit(response)
+            if response.status_code in (200, 204):
+                self.sent += 1
+                posts.labels("sent").inc()
+                print(f"Webhook sent: {content}")
+                return True
+            if response.status_code == 429:
+                self.rate_limited += 1
+                posts.labels("rate_limited").inc()
+                retry_after = self._retry_after(response)
+                print(f"Webhook rate limited, retrying in {retry_after:.2f}s")
+                self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+                continue
+            if response.status_code >= 500:
+                posts.labels("server_error").inc()
+                print(f"Failed to send webhook: {response.status_code}, retrying")
+                time.sleep(min(2 ** attempt, 30))
+                continue
+            posts.labels("rejected").inc()
+            print(f"Failed to send webhook: {response.status_code} - {response.text}")
+            break
+        self.failed += 1
+        failed.inc()
+        return False
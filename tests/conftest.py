@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The scripts in Utils import each other directly (they're run from the resources folder
+# with Utils on the path), so the tests put Utils on the path the same way.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Utils"))
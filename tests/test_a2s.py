@@ -0,0 +1,64 @@
+import pytest
+from a2s import A2SClient, A2SError
+from fakea2s import FakeA2SServer
+
+
+@pytest.fixture
+def fake():
+    server = FakeA2SServer(["Alice", "Bob", "Charlie"], max_players=60).start()
+    yield server
+    server.stop()
+
+
+def test_info_answers_the_challenge(fake):
+    client = A2SClient(fake.address, timeout=1)
+    info = client.info()
+    assert info["name"] == "Fake server"
+    assert info["players"] == 3
+    assert info["max_players"] == 60
+    assert client.queries_sent == 2  # The first request only gets the challenge back
+
+
+def test_info_without_a_challenge():
+    fake = FakeA2SServer(["Alice"], challenge=None).start()
+    try:
+        client = A2SClient(fake.address, timeout=1)
+        assert client.player_count() == 1
+        assert client.queries_sent == 1
+    finally:
+        fake.stop()
+
+
+def test_players(fake):
+    players = A2SClient(fake.address, timeout=1).players()
+    assert [player["name"] for player in players] == ["Alice", "Bob", "Charlie"]
+    assert players[1]["duration"] == pytest.approx(120.0)
+
+
+def test_split_answers_are_put_back_together():
+    names = [f"Survivor number {index}" for index in range(40)]
+    fake = FakeA2SServer(names, split_size=200).start()
+    try:
+        players = A2SClient(fake.address, timeout=1).players()
+        assert [player["name"] for player in players] == names
+    finally:
+        fake.stop()
+
+
+def test_answers_are_cached(fake):
+    client = A2SClient(fake.address, timeout=1, ttl=60)
+    assert client.player_count() == 3
+    sent = client.queries_sent
+    fake.players.append("Dave")
+    assert client.player_count() == 3
+    assert client.queries_sent == sent
+    assert client.player_count(max_age=0) == 4
+
+
+def test_silent_server(fake):
+    fake.silent = True
+    client = A2SClient(fake.address, timeout=0.2)
+    assert client.player_count() is None
+    assert "No answer" in client.last_error
+    with pytest.raises(A2SError):
+        client.info(max_age=0)
@@ -0,0 +1,99 @@
+import threading
+import pytest
+import requests
+from dzsaquery import DzsaClient, OK, INVALID_WORKSHOP, TIMEOUT, ERROR
+from fakedzsa import FakeDzsaServer, OK_RESPONSE, TIMEOUT_RESPONSE, invalid_workshop_response
+
+
+@pytest.fixture
+def fake():
+    server = FakeDzsaServer().start()
+    yield server
+    server.stop()
+
+
+class FlakySession:
+    """Fails the first failures requests like a dropped connection, then really sends them."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.session = requests.Session()
+
+    def get(self, url, timeout=None):
+        if self.failures:
+            self.failures -= 1
+            raise requests.ConnectionError("connection reset")
+        return self.session.get(url, timeout=timeout)
+
+
+def test_answers_are_reused_for_the_ttl(fake):
+    client = DzsaClient(ttl=60)
+    assert client.player_count(fake.url()) == 3
+    assert client.player_count(fake.url()) == 3
+    assert len(fake.requests) == 1
+    assert client.query(fake.url(), max_age=0).ok
+    assert len(fake.requests) == 2
+
+
+def test_concurrent_callers_share_one_request():
+    fake = FakeDzsaServer(delay=0.3).start()
+    try:
+        client = DzsaClient(ttl=60)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(client.player_count(fake.url()))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == [3] * 8
+        assert len(fake.requests) == 1
+        assert client.requests_sent == 1
+    finally:
+        fake.stop()
+
+
+def test_invalid_workshop_answer():
+    fake = FakeDzsaServer([invalid_workshop_response("1559212036")]).start()
+    try:
+        result = DzsaClient().query(fake.url())
+        assert result.status == INVALID_WORKSHOP
+        assert result.workshop_id == "1559212036"
+        assert result.players is None
+    finally:
+        fake.stop()
+
+
+def test_timeout_answers_are_not_cached():
+    fake = FakeDzsaServer([TIMEOUT_RESPONSE, OK_RESPONSE]).start()
+    try:
+        client = DzsaClient(ttl=60)
+        assert client.query(fake.url()).status == TIMEOUT
+        assert client.query(fake.url()).status == OK
+        assert len(fake.requests) == 2
+    finally:
+        fake.stop()
+
+
+def test_non_json_error_page(fake):
+    fake.responses = [(502, "Bad Gateway")]
+    result = DzsaClient().query(fake.url())
+    assert result.status == ERROR
+
+
+def test_update_launcher_retries_until_it_gets_an_answer():
+    fake = FakeDzsaServer([TIMEOUT_RESPONSE, invalid_workshop_response("123"), OK_RESPONSE]).start()
+    try:
+        delays = []
+        result = DzsaClient(session=FlakySession(failures=2)).update_launcher(fake.url(), log=lambda type, message: None, sleep=delays.append)
+        assert result.ok
+        assert len(delays) == 4  # Two dropped connections, a timeout and an invalid workshop answer
+        assert len(fake.requests) == 3
+    finally:
+        fake.stop()
+
+
+def test_update_launcher_gives_up_after_max_retries():
+    client = DzsaClient(session=FlakySession(failures=100))
+    result = client.update_launcher("http://127.0.0.1:1/api/v1/query/127.0.0.1/27016", max_retries=3, log=lambda type, message: None, sleep=lambda delay: None)
+    assert result.status == ERROR
+    assert client.requests_sent == 4
@@ -0,0 +1,61 @@
+import os
+import genmods
+from genmods import sync_keys
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(content)
+
+
+def make_mods(tmp_path):
+    write(str(tmp_path / "@CF" / "keys" / "cf.bikey"), "cf key")
+    write(str(tmp_path / "@Trader" / "Keys" / "trader.bikey"), "trader key")
+    os.makedirs(str(tmp_path / "@NoKeys" / "addons"))
+    return str(tmp_path), ["@CF", "@Trader", "@NoKeys"], str(tmp_path / "keys"), str(tmp_path / "keys_state.json")
+
+
+def test_keys_are_copied_once(tmp_path):
+    mods_dir, mod_list, server_keys, state = make_mods(tmp_path)
+    assert sync_keys(mods_dir, mod_list, server_keys, state)["copied"] == 2
+    assert sorted(os.listdir(server_keys)) == ["cf.bikey", "trader.bikey"]
+    assert sync_keys(mods_dir, mod_list, server_keys, state) == {"copied": 0, "removed": 0, "keys": 2}
+
+
+def test_unchanged_run_does_not_search_the_mod_folders(tmp_path, monkeypatch):
+    mods_dir, mod_list, server_keys, state = make_mods(tmp_path)
+    sync_keys(mods_dir, mod_list, server_keys, state)
+    searched = []
+    find_keys_dir = genmods.find_keys_dir
+    monkeypatch.setattr(genmods, "find_keys_dir", lambda mod_path: searched.append(mod_path) or find_keys_dir(mod_path))
+    sync_keys(mods_dir, mod_list, server_keys, state)
+    assert searched == []
+
+
+def test_key_overwritten_in_place_is_copied_again(tmp_path):
+    mods_dir, mod_list, server_keys, state = make_mods(tmp_path)
+    sync_keys(mods_dir, mod_list, server_keys, state)
+    source = os.path.join(mods_dir, "@CF", "keys", "cf.bikey")
+    write(source, "re-signed cf key")
+    os.utime(source, ns=(os.stat(source).st_atime_ns, os.stat(source).st_mtime_ns + 10 ** 9))
+    assert sync_keys(mods_dir, mod_list, server_keys, state)["copied"] == 1
+    with open(os.path.join(server_keys, "cf.bikey")) as file:
+        assert file.read() == "re-signed cf key"
+
+
+def test_keys_of_removed_mods_are_removed(tmp_path):
+    mods_dir, mod_list, server_keys, state = make_mods(tmp_path)
+    write(os.path.join(server_keys, "dayz.bikey"), "the game's own key")
+    sync_keys(mods_dir, mod_list, server_keys, state)
+    assert sync_keys(mods_dir, ["@CF", "@NoKeys"], server_keys, state)["removed"] == 1
+    assert sorted(os.listdir(server_keys)) == ["cf.bikey", "dayz.bikey"]
+
+
+def test_keys_folder_added_to_a_mod_later(tmp_path):
+    mods_dir, mod_list, server_keys, state = make_mods(tmp_path)
+    sync_keys(mods_dir, mod_list, server_keys, state)
+    no_keys = os.path.join(mods_dir, "@NoKeys")
+    write(os.path.join(no_keys, "keys", "nokeys.bikey"), "new key")
+    os.utime(no_keys, ns=(os.stat(no_keys).st_atime_ns, os.stat(no_keys).st_mtime_ns + 10 ** 9))
+    assert sync_keys(mods_dir, mod_list, server_keys, state)["copied"] == 1
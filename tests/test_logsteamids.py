@@ -0,0 +1,45 @@
+import io
+from logcheckpoint import LogCheckpoint
+from logsteamids import process_new_lines
+
+
+class Store:
+    def __init__(self):
+        self.seen = []
+
+    def record(self, player_name, steam_id, journal=True):
+        self.seen.append((player_name, steam_id))
+
+
+def join_line(index):
+    return f'12:00:{index % 60:02} | Player "Survivor{index}" (steamid=7656119{index:010}) is connected\n'.encode()
+
+
+def test_lines_are_read_in_chunks():
+    data = b"".join(join_line(index) for index in range(200))
+    store = Store()
+    end, found = process_new_lines(io.BytesIO(data), 0, store, chunk_size=37)  # Chunks end mid line
+    assert end == len(data)
+    assert found == 200
+    assert store.seen[199] == ("Survivor199", "76561190000000199")
+
+
+def test_partial_last_line_is_left_unless_final():
+    complete = join_line(1)
+    data = complete + join_line(2).rstrip(b"\n")
+    end, found = process_new_lines(io.BytesIO(data), 0, Store())
+    assert (end, found) == (len(complete), 1)
+    end, found = process_new_lines(io.BytesIO(data), end, Store(), final=True)
+    assert (end, found) == (len(data), 1)
+
+
+def test_partly_parsed_file_is_not_unchanged(tmp_path):
+    log_file = tmp_path / "server.log"
+    log_file.write_bytes(join_line(1) + b"half a line")
+    checkpoint = LogCheckpoint(str(tmp_path / "checkpoint.json"))
+    with open(log_file, "rb") as file:
+        checkpoint.update(str(log_file), file, len(join_line(1)))
+    assert not checkpoint.is_unchanged(str(log_file))
+    with open(log_file, "rb") as file:
+        checkpoint.update(str(log_file), file, log_file.stat().st_size)
+    assert checkpoint.is_unchanged(str(log_file))
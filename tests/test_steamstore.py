@@ -0,0 +1,80 @@
+import os
+import json
+import pytest
+import steamstore
+from steamstore import SteamIdStore
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "steam_ids.json"), str(tmp_path / "steam_ids.journal")
+
+
+def reopen(snapshot_path):
+    store = SteamIdStore(snapshot_path)
+    store.load()
+    return store
+
+
+def journal_lines(journal_path):
+    with open(journal_path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file]
+
+
+def test_crash_between_snapshot_and_journal_rewrite_replays_once(paths, monkeypatch):
+    snapshot_path, journal_path = paths
+    store = SteamIdStore(snapshot_path)
+    store.record("Alice", "1")
+    store.record("Bob", "2")
+    store.flush()
+    real_replace = os.replace
+
+    def crash_on_journal(source, destination):
+        if destination == journal_path:
+            raise OSError("power cut")
+        real_replace(source, destination)
+    monkeypatch.setattr(steamstore.os, "replace", crash_on_journal)
+    with pytest.raises(OSError):
+        store.compact()  # The snapshot is written, the journal still has both joins in it
+    monkeypatch.undo()
+    with open(journal_path, "a", encoding="utf-8") as file:
+        file.write(json.dumps({"seq": 3, "id": "1", "name": "Alice (2)"}) + "\n")  # After the snapshot
+
+    loaded = reopen(snapshot_path)
+    assert loaded.names == {"1": "Alice (2)", "2": "Bob"}
+    # Replaying Bob's join on top of the snapshot again would have made him a duplicate of himself
+    assert loaded.duplicates == {"1": {"Alice", "Alice (2)"}}
+    assert loaded.seq == 3
+
+
+def test_joins_during_compact_survive(paths, monkeypatch):
+    snapshot_path, journal_path = paths
+    store = SteamIdStore(snapshot_path)
+    store.record("Alice", "1")
+    real_write = steamstore.write_json_atomic
+
+    def write_while_joining(path, data, indent=4):
+        store.record("Carol", "3")  # Arrives while the snapshot is being written, outside the lock
+        real_write(path, data, indent)
+    monkeypatch.setattr(steamstore, "write_json_atomic", write_while_joining)
+    assert store.compact()
+    store.flush()
+
+    with open(snapshot_path, encoding="utf-8") as file:
+        assert list(json.load(file)["steam_ids"]) == ["1"]
+    assert [entry["name"] for entry in journal_lines(journal_path)] == ["Carol"]
+    assert reopen(snapshot_path).names == {"1": "Alice", "3": "Carol"}
+
+
+def test_load_with_a_truncated_last_journal_line(paths):
+    snapshot_path, journal_path = paths
+    with open(journal_path, "w", encoding="utf-8") as file:
+        file.write(json.dumps({"seq": 1, "id": "1", "name": "Alice"}) + "\n")
+        file.write(json.dumps({"seq": 2, "id": "2", "name": "Bob"}) + "\n")
+        file.write('{"seq": 3, "id": "3", "na')  # The process died mid-append
+    loaded = reopen(snapshot_path)
+    assert loaded.names == {"1": "Alice", "2": "Bob"}
+    assert loaded.seq == 2
+    loaded.record("Carol", "3")
+    loaded.flush()  # No compaction, Carol is only in the journal
+    assert reopen(snapshot_path).names == {"1": "Alice", "2": "Bob", "3": "Carol"}
@@ -0,0 +1,134 @@
+import time
+import pytest
+from fakewebhook import FakeWebhookServer
+from webhook import WebhookDispatcher
+
+
+@pytest.fixture
+def fake():
+    server = FakeWebhookServer().start()
+    yield server
+    server.stop()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_messages_within_the_batch_window_are_joined(fake):
+    dispatcher = WebhookDispatcher(fake.url(), batch_window=0.3)
+    dispatcher.start()
+    for index in range(5):
+        dispatcher.submit(f"kill {index}")
+    dispatcher.stop()
+    assert [content for _, content in fake.received] == ["\n".join(f"kill {index}" for index in range(5))]
+    assert dispatcher.sent == 1
+
+
+def test_batches_are_split_at_the_discord_limit(fake):
+    dispatcher = WebhookDispatcher(fake.url(), batch_window=0.2)
+    dispatcher.start()
+    for index in range(3):
+        dispatcher.submit(str(index) * 900)
+    dispatcher.stop()
+    assert [len(content) for _, content in fake.received] == [1801, 900]
+
+
+def test_rate_limited_posts_wait_for_retry_after():
+    fake = FakeWebhookServer(rate_limit_every=2, retry_after=0.3).start()
+    try:
+        dispatcher = WebhookDispatcher(fake.url(), batch_window=0)
+        dispatcher.start()
+        dispatcher.submit("first")
+        assert wait_for(lambda: len(fake.received) == 1)
+        dispatcher.submit("second")  # The fake answers this one with a 429
+        assert wait_for(lambda: len(fake.received) == 2)
+        dispatcher.stop()
+        assert [content for _, content in fake.received] == ["first", "second"]
+        assert dispatcher.rate_limited == 1
+        assert dispatcher.failed == 0
+        assert fake.received[1][0] - fake.received[0][0] >= 0.3
+    finally:
+        fake.stop()
+
+
+def test_messages_are_dropped_when_the_queue_is_full(fake):
+    dispatcher = WebhookDispatcher(fake.url(), queue_size=2)
+    assert dispatcher.submit("one")
+    assert dispatcher.submit("two")
+    assert not dispatcher.submit("three")
+    assert dispatcher.dropped == 1
+    assert dispatcher.queue_depth() == 2
+
+
+def test_stop_with_a_full_queue_does_not_block(fake):
+    dispatcher = WebhookDispatcher(fake.url(), queue_size=1)
+    dispatcher.submit("never sent")
+    started = time.monotonic()
+    dispatcher.stop()  # Never started, nothing will ever take from the queue
+    assert time.monotonic() - started < 1
+
+
+class SlowSession:
+    """Answers every post with a 204 after delay seconds."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.posts = []
+
+    def post(self, url, json=None, timeout=None):
+        time.sleep(self.delay)
+        self.posts.append(json["content"])
+
+        class Response:
+            status_code = 204
+            headers = {}
+        return Response()
+
+
+def test_a_backlog_stays_in_the_bounded_queue():
+    session = SlowSession(0.2)
+    dispatcher = WebhookDispatcher("http://127.0.0.1:1/webhook", batch_window=0.5, queue_size=10, session=session)
+    dispatcher.start()
+    for _ in range(75):
+        dispatcher.submit("x" * 1500)
+        assert len(dispatcher._pending) <= 1
+        time.sleep(0.02)
+    assert dispatcher.dropped > 0
+    assert dispatcher.queue_depth() <= 11
+    # With a backlog the posts go one after another, not a batch window apart
+    assert len(session.posts) >= 6
+    dispatcher.stop(timeout=0)
+
+
+def test_retry_after_from_a_body_that_is_not_an_object():
+    class Response:
+        headers = {"Retry-After": "2.5"}
+
+        def json(self):
+            return ["not", "a", "dict"]
+    assert WebhookDispatcher("http://127.0.0.1:1/webhook")._retry_after(Response()) == 2.5
+
+
+def test_dispatcher_survives_an_unexpected_error(fake):
+    dispatcher = WebhookDispatcher(fake.url(), batch_window=0)
+    sends = []
+    real_send = dispatcher._send
+
+    def send(content):
+        sends.append(content)
+        if len(sends) == 1:
+            raise RuntimeError("boom")
+        return real_send(content)
+    dispatcher._send = send
+    dispatcher.start()
+    dispatcher.submit("lost")
+    assert wait_for(lambda: len(sends) == 1)
+    dispatcher.submit("delivered")
+    assert wait_for(lambda: [content for _, content in fake.received] == ["delivered"])
+    dispatcher.stop()